@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals, print_function
+
+# Measure the per-video cost of the format selection over YouTube-like
+# format lists, compiling the format spec for every video as well as
+# reusing the selector cached by YoutubeDL
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from youtube_dlc import YoutubeDL
+from youtube_dlc.extractor.youtube import YoutubeIE
+
+VIDEOS = 50
+
+FORMAT_SPECS = (
+    'bestvideo+bestaudio/best',
+    'bestvideo[height<=720][ext=mp4]+bestaudio[ext=m4a]/best[height<=720]',
+    '137+140/22/18/best',
+    'best[filesize<100M][protocol^=http]/worst',
+)
+
+
+def youtube_formats():
+    formats = []
+    for itag, info in YoutubeIE._formats.items():
+        if not itag.isdigit():
+            continue
+        f = dict(info)
+        f.update({
+            'format_id': itag,
+            'format': '%s - %s' % (itag, f.get('format_note') or f.get('height') or 'audio'),
+            'url': 'https://r1---sn-abcdef.googlevideo.com/videoplayback?itag=%s&expire=1600000000&sig=%s' % (itag, 'A' * 80),
+            'protocol': 'https',
+            'filesize': int(itag) * 1000000,
+            'tbr': f.get('abr', 0) + f.get('height', 0) * 3,
+            'http_headers': {'User-Agent': 'Mozilla/5.0', 'Accept-Language': 'en-us,en;q=0.5'},
+            'downloader_options': {'http_chunk_size': 10485760},
+        })
+        if f.get('format_note') == 'DASH video':
+            # Formats from the DASH manifest come with their fragments
+            f['fragments'] = [
+                {'path': 'sq/%d' % i, 'duration': 5.0} for i in range(100)]
+        formats.append(f)
+    formats.sort(key=lambda f: (f.get('height') or 0, f['tbr']))
+    return formats
+
+
+def select(format_selector, formats):
+    return list(format_selector({'formats': formats, 'incomplete_formats': False}))
+
+
+def main():
+    formats = youtube_formats()
+    ydl = YoutubeDL({'quiet': True})
+    print('%d formats, %d videos per run' % (len(formats), VIDEOS))
+    for format_spec in FORMAT_SPECS:
+        compile_time = min(timeit.repeat(
+            lambda: [select(ydl.build_format_selector(format_spec), formats) for _ in range(VIDEOS)],
+            number=1, repeat=3))
+        cached_time = min(timeit.repeat(
+            lambda: [select(ydl._get_format_selector(format_spec), formats) for _ in range(VIDEOS)],
+            number=1, repeat=3))
+        print(format_spec)
+        print('    compiled per video: %7.1fus/video' % (compile_time * 1e6 / VIDEOS))
+        print('    cached selector:    %7.1fus/video' % (cached_time * 1e6 / VIDEOS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals, print_function
+
+# Measure the start-up time of youtube-dlc (importing it and setting up a
+# YoutubeDL with the default extractors) with and without the lazy
+# extractors module, run "make lazy-extractors" to build it first
+
+import os
+import subprocess
+import sys
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 10
+
+STARTUP_SCRIPT = '''
+from youtube_dlc import YoutubeDL
+ydl = YoutubeDL({'quiet': True})
+url = 'https://vimeo.com/56015672'
+ydl.get_info_extractor(next(ie.ie_key() for ie in ydl._ies if ie.suitable(url)))
+'''
+
+
+def startup_time(lazy):
+    env = dict(os.environ)
+    if lazy:
+        env.pop('YOUTUBE_DLC_NO_LAZY_EXTRACTORS', None)
+    else:
+        env['YOUTUBE_DLC_NO_LAZY_EXTRACTORS'] = '1'
+    times = []
+    for _ in range(RUNS):
+        start = timeit.default_timer()
+        subprocess.check_call([sys.executable, '-c', STARTUP_SCRIPT], cwd=ROOT_DIR, env=env)
+        times.append(timeit.default_timer() - start)
+    return min(times)
+
+
+def main():
+    if not os.path.exists(os.path.join(ROOT_DIR, 'youtube_dlc', 'extractor', 'lazy_extractors.py')):
+        sys.exit('youtube_dlc/extractor/lazy_extractors.py is missing, run "make lazy-extractors"')
+    eager = startup_time(lazy=False)
+    lazy = startup_time(lazy=True)
+    print('Eager extractors: %.3fs' % eager)
+    print('Lazy extractors:  %.3fs (%.1fx faster)' % (lazy, eager / lazy))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals, print_function
+
+# Measure the time per call of the functions interpreted by JSInterpreter:
+# the test_jsinterp.py functions, a signature function like those of the
+# YouTube players and the players of test_youtube_signature.py that were
+# downloaded to test/testdata by running it
+
+import io
+import os
+import string
+import sys
+import timeit
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from test.test_youtube_signature import _TESTS as SIGNATURE_TESTS
+from youtube_dlc.extractor import YoutubeIE
+from youtube_dlc.jsinterp import JSInterpreter
+
+CALLS = 2000
+
+PLAYER = '''
+var Bo={Ww:function(a,b){a.splice(0,b)},
+lS:function(a){a.reverse()},
+Bm:function(a,b){var c=a[0];a[0]=a[b%a.length];a[b%a.length]=c}};
+Co=function(a){a=a.split("");Bo.lS(a,47);Bo.Bm(a,15);Bo.Ww(a,2);Bo.Bm(a,12);Bo.Ww(a,3);Bo.lS(a,59);Bo.Bm(a,36);return a.join("")};
+'''
+
+CASES = (
+    ('calc', 'function x4(a){return 2*a+1;}', 'x4', (3,)),
+    ('parens', 'function f(){return (1) + (2) * ((( (( (((((3)))))) )) ));}', 'f', ()),
+    ('assignments', 'function f(){var x = 20; x += 30 + 1; return x;}', 'f', ()),
+    ('array access', 'function f(){var x = [1,2,3]; x[0] = 4; x[0] = 5; x[2] = 7; return x;}', 'f', ()),
+    ('precedence', '''
+        function x() {
+            var a = [10, 20, 30, 40, 50];
+            var b = 6;
+            a[0]=a[b%a.length];
+            return a;
+        }''', 'x', ()),
+    ('call', '''
+        function x() { return 2; }
+        function y(a) { return x() + a; }
+        function z() { return y(3); }
+        ''', 'z', ()),
+    ('signature', PLAYER, 'Co', (string.printable[:86],)),
+)
+
+
+def player_cases():
+    testdata_dir = os.path.join(ROOT_DIR, 'test', 'testdata')
+    ie = YoutubeIE()
+    for url, stype, sig_input, _ in SIGNATURE_TESTS:
+        if stype != 'js':
+            continue
+        fn = os.path.join(testdata_dir, 'player-%s.js' % YoutubeIE._extract_player_info(url)[1])
+        if not os.path.exists(fn):
+            continue
+        with io.open(fn, encoding='utf-8') as f:
+            func = ie._parse_sig_js(f.read())
+        if isinstance(sig_input, int):
+            sig_input = string.printable[:sig_input]
+        yield os.path.basename(fn), func, sig_input
+
+
+def main():
+    print('%d calls per function' % CALLS)
+    for name, code, funcname, args in CASES:
+        func = JSInterpreter(code).extract_function(funcname)
+        call_time = timeit.timeit(lambda: func(args), number=CALLS)
+        print('%-24s %8.2fus/call' % (name, call_time * 1e6 / CALLS))
+    for name, func, sig_input in player_cases():
+        call_time = timeit.timeit(lambda: func(sig_input), number=CALLS)
+        print('%-24s %8.2fus/call' % (name, call_time * 1e6 / CALLS))
+
+
+if __name__ == '__main__':
+    main()
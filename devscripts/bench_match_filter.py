@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals, print_function
+
+# Compare parsing --match-filter for every entry with the compiled filter
+# on a large synthetic flat playlist
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from youtube_dlc.utils import (
+    _match_one,
+    match_filter_func,
+)
+
+ENTRIES = 20000
+
+FILTERS = (
+    'view_count > 10K',
+    'duration >= 60 & duration <=? 3600 & like_count >? 100 & !is_live',
+    "uploader = 'Some Channel' & view_count > 1M & title",
+)
+
+
+def make_entries():
+    rnd = random.Random(0)
+    return [{
+        '_type': 'url',
+        'id': 'video%d' % i,
+        'title': 'Video %d' % i,
+        'uploader': rnd.choice(('Some Channel', 'Other Channel')),
+        'view_count': rnd.randint(0, 10 ** 7),
+        'like_count': rnd.choice((None, rnd.randint(0, 10 ** 5))),
+        'duration': rnd.randint(10, 7200),
+        'is_live': i % 100 == 0,
+    } for i in range(ENTRIES)]
+
+
+def parsed_per_entry(filter_str, entry):
+    return all(_match_one(filter_part, entry) for filter_part in filter_str.split('&'))
+
+
+def main():
+    entries = make_entries()
+    print('%d entries' % len(entries))
+    for filter_str in FILTERS:
+        parsed_time = min(timeit.repeat(
+            lambda: [parsed_per_entry(filter_str, e) for e in entries], number=1, repeat=3))
+        match_filter = match_filter_func(filter_str)
+        compiled_time = min(timeit.repeat(
+            lambda: [match_filter(e) for e in entries], number=1, repeat=3))
+        print(filter_str)
+        print('    parsed per entry: %6.2fus/entry' % (parsed_time * 1e6 / len(entries)))
+        print('    compiled:         %6.2fus/entry (%.1fx faster)' % (
+            compiled_time * 1e6 / len(entries), parsed_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main()
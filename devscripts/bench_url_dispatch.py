@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+from __future__ import unicode_literals, print_function
+
+# Compare the linear scan over all the extractors with the dispatch index
+# when looking for the extractor suitable for the URLs of the test cases
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test.helper import gettestcases
+from youtube_dlc.extractor import gen_extractor_classes
+from youtube_dlc.extractor.dispatch import ExtractorDispatchIndex
+
+
+def first_suitable(ies, url):
+    for ie in ies:
+        if ie.suitable(url):
+            return ie
+
+
+def main():
+    ies = gen_extractor_classes()
+    urls = [tc['url'] for tc in gettestcases(include_onlymatching=True)]
+    # Compile all the _VALID_URL regexes beforehand
+    for url in urls:
+        first_suitable(ies, url)
+
+    start = timeit.default_timer()
+    index = ExtractorDispatchIndex(ies)
+    build_time = timeit.default_timer() - start
+
+    linear_time = min(timeit.repeat(
+        lambda: [first_suitable(ies, url) for url in urls], number=1, repeat=3))
+    index_time = min(timeit.repeat(
+        lambda: [first_suitable(index.candidates(url), url) for url in urls], number=1, repeat=3))
+
+    candidates = sum(len(index.candidates(url)) for url in urls)
+    print('%d extractors, %d URLs' % (len(ies), len(urls)))
+    print('Index build:  %.3fs' % build_time)
+    print('Linear scan:  %.3fs (%.1fus/URL)' % (linear_time, linear_time * 1e6 / len(urls)))
+    print('Index lookup: %.3fs (%.1fus/URL, %.1f candidates/URL)' % (
+        index_time, index_time * 1e6 / len(urls), candidates / len(urls)))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,20 @@ from __future__ import unicode_literals
 import re
 
 
-class LazyLoadExtractor(object):
+class LazyLoadMetaClass(type):
+    def __getattr__(cls, name):
+        # Attributes missing from the lazy class are looked up on the real
+        # one, importing its module on first access
+        return getattr(cls._get_real_class(), name)
+
+    def _get_real_class(cls):
+        if '_real_class' not in cls.__dict__:
+            mod = __import__(cls._module, fromlist=(cls.__name__,))
+            cls._real_class = getattr(mod, cls.__name__)
+        return cls._real_class
+
+
+class LazyLoadExtractor(LazyLoadMetaClass(str('LazyLoadBase'), (object,), {})):
     _module = None
 
     @classmethod
@@ -12,8 +25,7 @@ class LazyLoadExtractor(object):
         return cls.__name__[:-2]
 
     def __new__(cls, *args, **kwargs):
-        mod = __import__(cls._module, fromlist=(cls.__name__,))
-        real_cls = getattr(mod, cls.__name__)
+        real_cls = cls._get_real_class()
         instance = real_cls.__new__(real_cls)
         instance.__init__(*args, **kwargs)
         return instance
@@ -5,8 +5,7 @@ import io
 import os
 from os.path import dirname as dirn
 import sys
-
-print('WARNING: Lazy loading extractors is an experimental feature that may not always work', file=sys.stderr)
+import types
 
 sys.path.insert(0, dirn(dirn((os.path.abspath(__file__)))))
 
@@ -14,6 +13,7 @@ lazy_extractors_filename = sys.argv[1]
 if os.path.exists(lazy_extractors_filename):
     os.remove(lazy_extractors_filename)
 
+from youtube_dlc import compat, utils
 from youtube_dlc.extractor import _ALL_CLASSES
 from youtube_dlc.extractor.common import InfoExtractor, SearchInfoExtractor
 
@@ -24,6 +24,10 @@ module_contents = [
     module_template + '\n' + getsource(InfoExtractor.suitable) + '\n',
     'class LazyLoadSearchExtractor(LazyLoadExtractor):\n    pass\n']
 
+# Helpers from compat and utils used by the suitable() overrides:
+# module -> names
+helper_imports = {}
+
 ie_template = '''
 class {name}({bases}):
     _VALID_URL = {valid_url!r}
@@ -46,6 +50,18 @@ def get_base_name(base):
         return base.__name__
 
 
+def add_helper_imports(func):
+    module_globals = func.__globals__
+    for name in func.__code__.co_names:
+        value = module_globals.get(name)
+        if value is None or isinstance(value, types.ModuleType):
+            continue
+        for module in (compat, utils):
+            if getattr(module, name, None) is value:
+                helper_imports.setdefault(module.__name__, set()).add(name)
+                break
+
+
 def build_lazy_ie(ie, name):
     valid_url = getattr(ie, '_VALID_URL', None)
     s = ie_template.format(
@@ -55,6 +71,7 @@ def build_lazy_ie(ie, name):
         module=ie.__module__)
     if ie.suitable.__func__ is not InfoExtractor.suitable.__func__:
         s += '\n' + getsource(ie.suitable)
+        add_helper_imports(ie.suitable.__func__)
     if hasattr(ie, '_make_valid_url'):
         # search extractors
         s += make_valid_template.format(valid_url=ie._make_valid_url())
@@ -94,6 +111,12 @@ for ie in ordered_cls:
 module_contents.append(
     '_ALL_CLASSES = [{0}]'.format(', '.join(names)))
 
+module_contents[0] = module_contents[0].replace('\nimport re\n', '\nimport re\n\n' + ''.join(
+    'from %s import (\n%s)\n' % (
+        module.replace('youtube_dlc', '.'),
+        ''.join('    %s,\n' % import_name for import_name in sorted(import_names)))
+    for module, import_names in sorted(helper_imports.items())), 1)
+
 module_src = '\n'.join(module_contents) + '\n'
 
 with io.open(lazy_extractors_filename, 'wt', encoding='utf-8') as f:
@@ -2,6 +2,7 @@
 # coding: utf-8
 
 from setuptools import setup, Command, find_packages
+from setuptools.command.build_py import build_py
 import os.path
 import warnings
 import sys
@@ -58,6 +59,15 @@ class build_lazy_extractors(Command):
             dry_run=self.dry_run,
         )
 
+
+class build_py_with_lazy_extractors(build_py):
+    # Ship the lazy extractors module, it is the default way of loading
+    # extractors when present
+    def run(self):
+        self.run_command('build_lazy_extractors')
+        build_py.run(self)
+
+
 setup(
     name="youtube_dlc",
     version=__version__,
@@ -98,6 +108,9 @@ setup(
     ],
     python_requires='>=2.6',
 	
-	cmdclass={'build_lazy_extractors': build_lazy_extractors},
+	cmdclass={
+        'build_lazy_extractors': build_lazy_extractors,
+        'build_py': build_py_with_lazy_extractors,
+    },
     **params
 )
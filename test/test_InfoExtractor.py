@@ -5,32 +5,71 @@ from __future__ import unicode_literals
 # Allow direct execution
 import io
 import os
+import shutil
 import sys
 import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from test.helper import FakeYDL, expect_dict, expect_value, http_server_port
-from youtube_dlc.compat import compat_etree_fromstring, compat_http_server
+from youtube_dlc.compat import compat_etree_fromstring, compat_http_server, compat_urllib_error
 from youtube_dlc.extractor.common import InfoExtractor
-from youtube_dlc.extractor import YoutubeIE, get_info_extractor
+from youtube_dlc.extractor import GenericIE, YoutubeIE, get_info_extractor
 from youtube_dlc.utils import encode_data_uri, strip_jsonp, ExtractorError, RegexNotFoundError
+import tempfile
 import threading
 
 
 TEAPOT_RESPONSE_STATUS = 418
 TEAPOT_RESPONSE_BODY = "<h1>418 I'm a teapot</h1>"
+HTTP_CACHE_REQUESTS = []
+PAGE_REQUESTS = []
 
 
 class InfoExtractorTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
     def log_message(self, format, *args):
         pass
 
+    def _page_headers(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self.path == '/page':
+            self._page_headers()
+        else:
+            assert False
+
     def do_GET(self):
-        if self.path == '/teapot':
+        if self.path == '/page':
+            PAGE_REQUESTS.append(self.path)
+            self._page_headers()
+            self.wfile.write(b'<html><title>page</title><p>nothing to see</p></html>')
+        elif self.path == '/teapot':
             self.send_response(TEAPOT_RESPONSE_STATUS)
             self.send_header('Content-Type', 'text/html; charset=utf-8')
             self.end_headers()
             self.wfile.write(TEAPOT_RESPONSE_BODY.encode())
+        elif self.path in ('/fresh', '/etag', '/cookie', '/private'):
+            if self.path == '/etag' and self.headers.get('If-None-Match') == '"v1"':
+                HTTP_CACHE_REQUESTS.append(self.path + ' 304')
+                self.send_response(304)
+                self.end_headers()
+                return
+            HTTP_CACHE_REQUESTS.append(self.path)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            if self.path == '/etag':
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('ETag', '"v1"')
+            elif self.path == '/private':
+                self.send_header('Cache-Control', 'private, max-age=3600')
+            else:
+                self.send_header('Cache-Control', 'max-age=3600')
+            if self.path == '/cookie':
+                self.send_header('Set-Cookie', 'session=1')
+            self.end_headers()
+            self.wfile.write(('content of %s' % self.path).encode())
         else:
             assert False
 
@@ -39,6 +78,10 @@ class TestIE(InfoExtractor):
     pass
 
 
+class NoHTTPCacheIE(InfoExtractor):
+    _HTTP_CACHE = False
+
+
 class TestInfoExtractor(unittest.TestCase):
     def setUp(self):
         self.ie = TestIE(FakeYDL())
@@ -107,6 +150,95 @@ class TestInfoExtractor(unittest.TestCase):
         self.assertRaises(ExtractorError, self.ie._download_json, uri, None)
         self.assertEqual(self.ie._download_json(uri, None, fatal=False), None)
 
+    def test_paginate(self):
+        requested = []
+
+        def numbered_page(pagenum, page_num):
+            requested.append((pagenum, page_num))
+            return range((pagenum - 1) * 3, min(pagenum * 3, 8))
+
+        for prefetch in (0, 1, 3):
+            del requested[:]
+            self.assertEqual(
+                list(self.ie._paginate(numbered_page, None, prefetch=prefetch)), list(range(8)))
+            self.assertEqual(requested, [(1, 1), (2, 2), (3, 3), (4, 4)])
+        del requested[:]
+        self.assertEqual(
+            list(self.ie._paginate(numbered_page, None, page_size=3, prefetch=0)), list(range(8)))
+        self.assertEqual(len(requested), 3)
+        # No page is prefetched for a consumer taking the first entries only
+        del requested[:]
+        entries = self.ie._paginate(numbered_page, None, prefetch=3)
+        self.assertEqual([next(entries), next(entries)], [0, 1])
+        entries.close()
+        self.assertEqual(requested, [(1, 1)])
+
+        # Page functions run in the calling thread unless prefetch is given
+        threads = set()
+
+        def thread_page(pagenum, page_num):
+            threads.add(threading.current_thread())
+            return [pagenum] if pagenum < 4 else []
+
+        self.assertEqual(list(self.ie._paginate(thread_page, None)), [1, 2, 3])
+        self.assertEqual(threads, set([threading.current_thread()]))
+        ie = TestIE(FakeYDL({'concurrent_pages': 0}))
+        self.assertEqual(list(ie._paginate(thread_page, None, prefetch=None)), [1, 2, 3])
+        self.assertEqual(threads, set([threading.current_thread()]))
+
+        def offset_page(offset, page_num):
+            requested.append(offset)
+            return [None if i % 2 else i for i in range(offset, min(offset + 4, 10))]
+
+        del requested[:]
+        self.assertEqual(
+            list(self.ie._paginate(offset_page, None, style='offset', page_size=4)), [0, 2, 4, 6, 8])
+        self.assertEqual(requested, [0, 4, 8])
+
+        # Page functions telling whether another page follows
+        def more_page(pagenum, page_num):
+            requested.append(pagenum)
+            return [] if pagenum == 2 else [pagenum], pagenum < 3
+
+        del requested[:]
+        self.assertEqual(list(self.ie._paginate(more_page, None, start=1)), [1, 3])
+        self.assertEqual(requested, [1, 2, 3])
+        del requested[:]
+        self.assertEqual(
+            list(self.ie._paginate(more_page, None, style='offset', start=1, page_size=1)), [1, 3])
+        self.assertEqual(requested, [1, 2, 3])
+
+        def cursor_page(cursor, page_num):
+            return [cursor], (cursor + 'a' if len(cursor) < 3 else None)
+
+        self.assertEqual(
+            list(self.ie._paginate(cursor_page, None, style='cursor', start='a')), ['a', 'aa', 'aaa'])
+
+        failures = []
+
+        def flaky_page(pagenum, page_num):
+            if pagenum == 2 and not failures:
+                failures.append(pagenum)
+                raise ExtractorError('page failed', cause=compat_urllib_error.URLError('timed out'))
+            if pagenum == 3:
+                raise ExtractorError('not found', expected=True)
+            return [pagenum]
+
+        ie = TestIE(FakeYDL({'extractor_retries': 1}))
+        ie._downloader.expect_warning(r'\[Test\] Unable to download page 2')
+        entries = ie._paginate(flaky_page, None)
+        self.assertEqual([next(entries), next(entries)], [1, 2])
+        self.assertRaises(ExtractorError, next, entries)
+        self.assertEqual(failures, [2])
+
+        # Unset retries count as the default
+        del failures[:]
+        ie = TestIE(FakeYDL({'extractor_retries': None}))
+        ie._downloader.expect_warning(r'\[Test\] Unable to download page 2')
+        entries = ie._paginate(flaky_page, None)
+        self.assertEqual([next(entries), next(entries)], [1, 2])
+        self.assertEqual(failures, [2])
+
     def test_parse_html5_media_entries(self):
         # from https://www.r18.com/
         # with kpbs in label
@@ -1066,6 +1198,64 @@ jwplayer("mediaplayer").setup({"abouttext":"Visit Indie DB","aboutlink":"http:\/
             expected_status=TEAPOT_RESPONSE_STATUS)
         self.assertEqual(content, TEAPOT_RESPONSE_BODY)
 
+    def test_http_cache(self):
+        httpd = compat_http_server.HTTPServer(
+            ('127.0.0.1', 0), InfoExtractorTestRequestHandler)
+        port = http_server_port(httpd)
+        server_thread = threading.Thread(target=httpd.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+
+        cache_dir = tempfile.mkdtemp()
+        try:
+            # One run per extractor
+            params = {'cachedir': cache_dir, 'http_cache': True}
+            ies = [ie_class(FakeYDL(params)) for ie_class in (TestIE, TestIE, NoHTTPCacheIE)]
+            for ie in ies:
+                for path in ('/fresh', '/etag', '/cookie'):
+                    self.assertEqual(
+                        ie._download_webpage('http://127.0.0.1:%d%s' % (port, path), None),
+                        'content of %s' % path)
+            self.assertEqual(HTTP_CACHE_REQUESTS, [
+                '/fresh', '/etag', '/cookie',
+                '/etag 304', '/cookie',
+                '/fresh', '/etag', '/cookie'])
+            self.assertEqual(ies[1]._downloader.http_cache.stats, {
+                'fresh_hits': 1, 'revalidated': 1, 'misses': 1, 'stores': 1})
+
+            # Responses are stored per cookie and private ones only for
+            # requests without credentials
+            del HTTP_CACHE_REQUESTS[:]
+            for cookie in (None, None, 'tv', 'tv'):
+                ie = TestIE(FakeYDL(params))
+                if cookie:
+                    ie._set_cookie('127.0.0.1', 'platform', cookie)
+                for path in ('/fresh', '/private'):
+                    self.assertEqual(
+                        ie._download_webpage('http://127.0.0.1:%d%s' % (port, path), None),
+                        'content of %s' % path)
+            self.assertEqual(HTTP_CACHE_REQUESTS, [
+                '/private', '/fresh', '/private', '/private'])
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_generic_memo(self):
+        httpd = compat_http_server.HTTPServer(
+            ('127.0.0.1', 0), InfoExtractorTestRequestHandler)
+        port = http_server_port(httpd)
+        server_thread = threading.Thread(target=httpd.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+
+        # The webpage fetched by the generic extractor is not requested
+        # again by another extractor of the run
+        ydl = FakeYDL()
+        url = 'http://127.0.0.1:%d/page' % port
+        self.assertRaises(ExtractorError, GenericIE(ydl).extract, url)
+        self.assertIn('nothing to see', TestIE(ydl)._download_webpage(url, None))
+        self.assertEqual(PAGE_REQUESTS, ['/page'])
+        self.assertEqual(ydl.response_memo.stats['hits'], 1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -10,6 +10,10 @@ import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import copy
+import shutil
+import tempfile
+import threading
+import time
 
 from test.helper import FakeYDL, assertRegexpMatches
 from youtube_dlc import YoutubeDL
@@ -17,7 +21,7 @@ from youtube_dlc.compat import compat_str, compat_urllib_error
 from youtube_dlc.extractor import YoutubeIE
 from youtube_dlc.extractor.common import InfoExtractor
 from youtube_dlc.postprocessor.common import PostProcessor
-from youtube_dlc.utils import ExtractorError, match_filter_func
+from youtube_dlc.utils import DateRange, ExtractorError, match_filter_func
 
 TEST_URL = 'http://localhost/sample.mp4'
 
@@ -454,6 +458,24 @@ class TestFormatSelection(unittest.TestCase):
         ydl.process_ie_result(info_dict.copy())
         self.assertEqual(ydl.downloaded_info_dicts[0]['format_id'], 'video+audio')
 
+    def test_format_selector_cache(self):
+        formats = [
+            {'format_id': 'video', 'ext': 'mp4', 'height': 720, 'acodec': 'none', 'url': TEST_URL},
+            {'format_id': 'audio', 'ext': 'm4a', 'vcodec': 'none', 'url': TEST_URL},
+        ]
+        ydl = YDL({'format': 'bestvideo[height<=720]+bestaudio'})
+        for _ in range(2):
+            info_dict = _make_result(copy.deepcopy(formats))
+            ydl.process_ie_result(info_dict)
+            # The selected formats are copies of the formats of the info dict
+            requested_formats = ydl.downloaded_info_dicts[-1]['requested_formats']
+            self.assertEqual(requested_formats, info_dict['formats'])
+            for f, original in zip(requested_formats, info_dict['formats']):
+                self.assertIsNot(f, original)
+        self.assertEqual(list(ydl._format_selectors), ['bestvideo[height<=720]+bestaudio'])
+        self.assertEqual(
+            [f['format_id'] for f in ydl.downloaded_info_dicts], ['video+audio', 'video+audio'])
+
     def test_invalid_format_specs(self):
         def assert_syntax_error(format_spec):
             ydl = YDL({'format': format_spec})
@@ -656,6 +678,20 @@ class TestYoutubeDL(unittest.TestCase):
         self.assertEqual(fname('%%(width)06d.%(ext)s'), '%(width)06d.mp4')
         self.assertEqual(fname('Hello %(title1)s'), 'Hello $PATH')
         self.assertEqual(fname('Hello %(title2)s'), 'Hello %PATH%')
+        self.assertEqual(fname('%(resolution)s.%(ext)s'), '1080p.mp4')
+        self.assertEqual(fname('%(playlist_index)s.%(ext)s'), 'NA.mp4')
+        self.assertEqual(fname('%(autonumber)s.%(ext)s'), '00000.mp4')
+
+    def test_prepare_filename_unused_fields(self):
+        class Unprintable(object):
+            def __str__(self):
+                raise AssertionError('unused fields must not be formatted')
+            __unicode__ = __str__
+
+        ydl = YoutubeDL({'outtmpl': '%(title)s [%(id)s].%(ext)s'})
+        info = {'id': '1234', 'ext': 'mp4', 'title': 'a/b', 'description': Unprintable()}
+        self.assertEqual(ydl.prepare_filename(info), 'a_b [1234].mp4')
+        self.assertEqual(ydl._outtmpl_fields('%(title)s [%(id)s].%(ext)s'), set(['title', 'id', 'ext']))
 
     def test_format_note(self):
         ydl = YoutubeDL()
@@ -989,6 +1025,271 @@ class TestYoutubeDL(unittest.TestCase):
         self.assertEqual(downloaded['extractor'], 'Video')
         self.assertEqual(downloaded['extractor_key'], 'Video')
 
+    def test_concurrent_playlist_entries(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'max_running': 0}
+
+        class Logger(object):
+            def __init__(self):
+                self.msgs = []
+
+            def debug(self, msg):
+                self.msgs.append(msg)
+
+            warning = error = debug
+
+        class _YDL(YDL):
+            # Keep the output of the extraction threads in order
+            to_screen = YoutubeDL.to_screen
+
+            def trouble(self, s, tb=None):
+                self.to_stderr(s)
+
+        class VideoIE(InfoExtractor):
+            _VALID_URL = r'video:(?P<id>\d+)'
+
+            def _real_extract(self, url):
+                video_id = self._match_id(url)
+                with lock:
+                    state['running'] += 1
+                    state['max_running'] = max(state['max_running'], state['running'])
+                # Later entries are extracted faster
+                time.sleep(0.01 * (10 - int(video_id)))
+                with lock:
+                    state['running'] -= 1
+                self.to_screen('%s: extracting' % video_id)
+                if video_id == '3':
+                    raise ExtractorError('unavailable', expected=True)
+                return {
+                    'id': video_id,
+                    'title': 'Video %s' % video_id,
+                    'url': TEST_URL,
+                }
+
+        class PlaylistIE(InfoExtractor):
+            _VALID_URL = r'playlist:'
+
+            def _entries(self):
+                for n in range(1, 10):
+                    yield self.url_result(
+                        'video:%d' % n, VideoIE.ie_key(), compat_str(n), 'Video %d' % n)
+
+            def _real_extract(self, url):
+                return self.playlist_result(self._entries())
+
+        def run(concurrency):
+            state['max_running'] = 0
+            logger = Logger()
+            ydl = _YDL({
+                'concurrent_playlist_entries': concurrency,
+                'ignoreerrors': True,
+                'logger': logger,
+                'playliststart': 2,
+                'matchtitle': '^(?!Video 5$)',
+            })
+            ydl.add_info_extractor(VideoIE(ydl))
+            ydl.add_info_extractor(PlaylistIE(ydl))
+            ydl.extract_info('playlist:')
+            return logger.msgs, [
+                (info['id'], info['playlist_index']) for info in ydl.downloaded_info_dicts]
+
+        sequential_msgs, sequential_downloads = run(1)
+        self.assertEqual(state['max_running'], 1)
+        concurrent_msgs, concurrent_downloads = run(4)
+        self.assertEqual(state['max_running'], 4)
+        self.assertEqual(concurrent_msgs, sequential_msgs)
+        self.assertEqual(concurrent_downloads, sequential_downloads)
+        self.assertEqual(sequential_downloads, [
+            ('2', 2), ('4', 4), ('6', 6), ('7', 7), ('8', 8), ('9', 9)])
+
+    def test_lazy_playlist(self):
+        yielded = []
+
+        class _YDL(YDL):
+            def process_info(self, info_dict):
+                info_dict['yielded'] = len(yielded)
+                super(_YDL, self).process_info(info_dict)
+
+        class PlaylistIE(InfoExtractor):
+            _VALID_URL = r'playlist:'
+
+            def _entries(self):
+                for n in range(1, 6):
+                    yielded.append(n)
+                    yield {
+                        'id': compat_str(n),
+                        'title': 'Video %d' % n,
+                        'url': TEST_URL,
+                    }
+
+            def _real_extract(self, url):
+                return self.playlist_result(self._entries())
+
+        def run(params):
+            del yielded[:]
+            ydl = _YDL(dict(params, lazy_playlist=True, playliststart=2))
+            ydl.add_info_extractor(PlaylistIE(ydl))
+            result = ydl.extract_info('playlist:')
+            return result, [
+                (info['id'], info['playlist_index'], info['n_entries'], info['yielded'])
+                for info in ydl.downloaded_info_dicts]
+
+        for concurrency in (1, 3):
+            result, downloads = run({'concurrent_playlist_entries': concurrency})
+            # Each entry is processed before the next ones are extracted,
+            # except for the ones extracted ahead
+            self.assertEqual(downloads, [
+                (compat_str(n), n, None, min(n + concurrency, 5) if concurrency > 1 else n)
+                for n in range(2, 6)])
+            self.assertEqual(result['entries'], [])
+
+        result, downloads = run({'dump_single_json': True})
+        self.assertEqual([e['id'] for e in result['entries']], ['2', '3', '4', '5'])
+
+        # Ordering options need all the entries
+        result, downloads = run({'playlistreverse': True})
+        self.assertEqual(downloads, [
+            (compat_str(n), 7 - n, 4, 5) for n in range(5, 1, -1)])
+
+    def test_playlist_filter_pushdown(self):
+        yielded = []
+        extracted = []
+
+        class VideoIE(InfoExtractor):
+            _VALID_URL = r'video:(?P<id>\d+)'
+
+            def _real_extract(self, url):
+                video_id = self._match_id(url)
+                extracted.append(video_id)
+                return {
+                    'id': video_id,
+                    'title': 'Video %s' % video_id,
+                    'url': TEST_URL,
+                    'upload_date': '2020010%d' % (7 - int(video_id)),
+                    'duration': 30 * int(video_id),
+                }
+
+        class PlaylistIE(InfoExtractor):
+            _VALID_URL = r'playlist:(?P<id>.*)'
+
+            def _entries(self, flat_fields):
+                # Newest first
+                for n in range(1, 7):
+                    yielded.append(n)
+                    entry = self.url_result('video:%d' % n, 'Video', compat_str(n))
+                    if flat_fields:
+                        entry.update({
+                            'upload_date': '2020010%d' % (7 - n),
+                            'duration': 30 * n if n != 1 else None,
+                        })
+                    yield entry
+
+            def _real_extract(self, url):
+                return self.playlist_result(self._entries(self._match_id(url)))
+
+        def run(params, flat_fields=True):
+            del yielded[:]
+            del extracted[:]
+            ydl = YDL(params)
+            ydl.add_info_extractor(PlaylistIE(ydl))
+            ydl.add_info_extractor(VideoIE(ydl))
+            ydl.extract_info('playlist:' + ('yes' if flat_fields else ''))
+            return [info['id'] for info in ydl.downloaded_info_dicts]
+
+        # Entries whose flat fields do not pass the filter are not extracted,
+        # the first entry has no duration yet (YDL.process_info does not
+        # filter the extracted videos)
+        downloads = run({'match_filter': match_filter_func('duration > 60')})
+        self.assertEqual(downloads, ['1', '3', '4', '5', '6'])
+        self.assertEqual(extracted, ['1', '3', '4', '5', '6'])
+
+        daterange = DateRange('20200104')
+        downloads = run({'daterange': daterange})
+        self.assertEqual(downloads, ['1', '2', '3'])
+        self.assertEqual(extracted, ['1', '2', '3'])
+        self.assertEqual(len(yielded), 6)
+
+        # The pages after the first entry older than the date range are not fetched
+        for params in ({}, {'lazy_playlist': True}, {'concurrent_playlist_entries': 2}):
+            downloads = run(dict(params, daterange=daterange, break_on_dateafter=True))
+            self.assertEqual(downloads, ['1', '2', '3'])
+            self.assertEqual(extracted, ['1', '2', '3'])
+            self.assertLessEqual(len(yielded), 5)
+
+        # Without dates in the flat entries it stops after processing the
+        # first older entry
+        downloads = run({'daterange': daterange, 'break_on_dateafter': True, 'lazy_playlist': True}, flat_fields=False)
+        self.assertEqual(downloads, ['1', '2', '3', '4'])
+        self.assertEqual(extracted, ['1', '2', '3', '4'])
+        self.assertEqual(len(yielded), 4)
+
+    def test_playlist_sync(self):
+        playlist_ids = []
+        yielded = []
+        extracted = []
+        failing = set()
+
+        class _YDL(YDL):
+            def trouble(self, message=None, tb=None):
+                # Extraction errors are ignored
+                pass
+
+        class VideoIE(InfoExtractor):
+            _VALID_URL = r'video:(?P<id>\d+)'
+
+            def _real_extract(self, url):
+                video_id = self._match_id(url)
+                extracted.append(video_id)
+                if video_id in failing:
+                    raise ExtractorError('failed', expected=True)
+                return {'id': video_id, 'title': video_id, 'url': TEST_URL}
+
+        class PlaylistIE(InfoExtractor):
+            _VALID_URL = r'playlist:(?P<id>.+)'
+
+            def _entries(self):
+                for video_id in playlist_ids:
+                    yielded.append(video_id)
+                    yield self.url_result('video:%s' % video_id, 'Video', video_id)
+
+            def _real_extract(self, url):
+                return self.playlist_result(self._entries(), self._match_id(url))
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+
+        def run(ids, playlist_id='pl', **params):
+            playlist_ids[:] = ids
+            del yielded[:]
+            del extracted[:]
+            ydl = _YDL(dict(params, playlist_sync=True, cachedir=cache_dir, ignoreerrors=True))
+            ydl.add_info_extractor(PlaylistIE(ydl))
+            ydl.add_info_extractor(VideoIE(ydl))
+            ydl.extract_info('playlist:' + playlist_id)
+            return [info['id'] for info in ydl.downloaded_info_dicts]
+
+        failing.add('4')
+        self.assertEqual(run(['6', '5', '4', '3', '2', '1']), ['6', '5', '3', '2', '1'])
+        failing.clear()
+        # The failed entry is retried and the pages after known entries are
+        # not fetched
+        self.assertEqual(run(['8', '7', '6', '5', '4', '3', '2', '1']), ['8', '7', '4'])
+        self.assertEqual(yielded, ['8', '7', '6', '5', '4', '3', '2', '1'])
+        self.assertEqual(run(['10', '9', '8', '7', '6', '5', '4', '3', '2', '1']), ['10', '9'])
+        self.assertEqual(yielded, ['10', '9', '8', '7', '6'])
+        # Some reordering is tolerated
+        self.assertEqual(run(['1', '11', '10', '9', '8', '7', '6'], lazy_playlist=True), ['11'])
+        self.assertEqual(yielded, ['1', '11', '10', '9', '8'])
+        # Playlists are synced separately
+        self.assertEqual(run(['6', '5'], playlist_id='other'), ['6', '5'])
+        # Dry runs skip the known entries but do not record any
+        for params in ({'simulate': True}, {'skip_download': True}):
+            self.assertEqual(run(['14', '13', '12', '11', '10', '9'], **params), ['14', '13', '12'])
+        self.assertEqual(run(['14', '13', '12', '11', '10', '9']), ['14', '13', '12'])
+        # Entries rejected by a filter are not recorded
+        self.assertEqual(run(['15', '14', '13', '12'], match_filter=match_filter_func("id != '15'")), [])
+        self.assertEqual(run(['15', '14', '13', '12']), ['15'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -17,6 +17,10 @@ from youtube_dlc.extractor import (
     gen_extractors,
     YoutubeIE,
 )
+from youtube_dlc.extractor.dispatch import (
+    ExtractorDispatchIndex,
+    url_host_keys,
+)
 
 
 class TestAllURLsMatching(unittest.TestCase):
@@ -124,6 +128,42 @@ class TestAllURLsMatching(unittest.TestCase):
         self.assertMatch('http://video.pbs.org/viralplayer/2365173446/', ['pbs'])
         self.assertMatch('http://video.pbs.org/widget/partnerplayer/980042464/', ['pbs'])
 
+    def test_dispatch_index(self):
+        def first_suitable(ies, url):
+            for ie in ies:
+                if ie.suitable(url):
+                    return ie.ie_key()
+
+        index = ExtractorDispatchIndex(self.ies)
+        urls = [tc['url'] for tc in gettestcases(include_onlymatching=True)]
+        urls.extend([
+            'HTTPS://WWW.YOUTUBE.COM/watch?v=BaW_jenozKc',
+            'https://www.youtube.com.example.org/watch?v=BaW_jenozKc',
+            'https://example.org/redirect?to=https://vimeo.com/56015672',
+            'http://www.\u0131nfo.example/',
+            'BaW_jenozKc',
+            'ytsearch5:youtube-dl test video',
+        ])
+        for url in urls:
+            self.assertEqual(
+                first_suitable(index.candidates(url), url),
+                first_suitable(self.ies, url), url)
+
+    def test_url_host_keys(self):
+        self.assertEqual(
+            url_host_keys(r'https?://(?:www\.)?vimeo\.com/(?P<id>\d+)'),
+            set([(True, '/', 'vimeo.com')]))
+        self.assertEqual(
+            url_host_keys(r'https?://[^/]+\.tumblr\.com/post/'),
+            set([(True, '/', '.tumblr.com')]))
+        self.assertEqual(
+            url_host_keys(r'(?:https?://(?:www\.)?foo\.com/|foo:)(?P<id>\d+)'),
+            set([(True, '/', 'foo.com'), (False, ':', 'foo')]))
+        # Hosts of these may be anything
+        self.assertEqual(url_host_keys(r'https?://.+/video/(?P<id>\d+)'), None)
+        self.assertEqual(url_host_keys(r'https?://(?:www\.)?foo\.com'), None)
+        self.assertEqual(url_host_keys(r'[a-zA-Z0-9_-]{11}'), None)
+
     def test_no_duplicated_ie_names(self):
         name_accu = collections.defaultdict(list)
         for ie in self.ies:
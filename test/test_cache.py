@@ -3,7 +3,10 @@
 
 from __future__ import unicode_literals
 
+import io
 import shutil
+import threading
+import time
 
 # Allow direct execution
 import os
@@ -13,7 +16,12 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 from test.helper import FakeYDL
-from youtube_dlc.cache import Cache
+from youtube_dlc.cache import Cache, ResponseMemo
+from youtube_dlc.compat import (
+    compat_cookiejar_Cookie,
+    compat_urllib_response,
+)
+from youtube_dlc.utils import sanitized_Request
 
 
 def _is_empty(d):
@@ -54,6 +62,127 @@ class TestCache(unittest.TestCase):
         self.assertFalse(os.path.exists(self.test_dir))
         self.assertEqual(c.load('test_cache', 'k.'), None)
 
+    def test_prune(self):
+        ydl = FakeYDL({
+            'cachedir': self.test_dir,
+        })
+        c = Cache(ydl)
+        c.prune('test_prune', 2)
+        for i in range(4):
+            c.store('test_prune', 'k%d' % i, i)
+            fn = c._get_cache_fn('test_prune', 'k%d' % i, 'json')
+            os.utime(fn, (1000 + i, 1000 + i))
+        c.store('test_other', 'k', 0)
+        c.prune('test_prune', 2)
+        self.assertEqual([c.load('test_prune', 'k%d' % i) for i in range(4)], [None, None, 2, 3])
+        self.assertEqual(c.load('test_other', 'k'), 0)
+
+    def test_memory(self):
+        ydl = FakeYDL({
+            'cachedir': self.test_dir,
+        })
+        c = Cache(ydl)
+        c.store('test_memory', 'k', {'x': [1]})
+        obj = c.load('test_memory', 'k')
+        obj['x'].append(2)
+        self.assertEqual(c.load('test_memory', 'k'), {'x': [1]})
+        self.assertEqual(c.stats['memory_hits'], 2)
+        self.assertEqual(c.stats['disk_hits'], 0)
+
+        # Entries rewritten by another process are read again
+        Cache(ydl).store('test_memory', 'k', {'x': [1, 2, 3]})
+        fn = c._get_cache_fn('test_memory', 'k', 'json')
+        os.utime(fn, (1000, 1000))
+        self.assertEqual(c.load('test_memory', 'k'), {'x': [1, 2, 3]})
+        self.assertEqual(c.stats['disk_hits'], 1)
+        self.assertEqual(Cache(ydl).load('test_memory', 'k'), {'x': [1, 2, 3]})
+
+    def test_ttl(self):
+        ydl = FakeYDL({
+            'cachedir': self.test_dir,
+        })
+        c = Cache(ydl)
+        c._SECTION_TTLS = {'test_ttl': 60}
+        c.store('test_ttl', 'k', 1)
+        c.store('test_ttl', 'old', 2)
+        c.store('test_other', 'old', 3)
+        for section in ('test_ttl', 'test_other'):
+            fn = c._get_cache_fn(section, 'old', 'json')
+            os.utime(fn, (time.time() - 120, time.time() - 120))
+        self.assertEqual(c.load('test_ttl', 'k'), 1)
+        self.assertEqual(c.load('test_ttl', 'old'), None)
+        self.assertEqual(c.stats['expired'], 1)
+        self.assertFalse(os.path.exists(c._get_cache_fn('test_ttl', 'old', 'json')))
+        self.assertEqual(c.load('test_other', 'old'), 3)
+
+    def test_evict(self):
+        ydl = FakeYDL({
+            'cachedir': self.test_dir,
+        })
+        c = Cache(ydl)
+        for i in range(4):
+            c.store('test_evict', 'k%d' % i, 'x' * 100)
+            fn = c._get_cache_fn('test_evict', 'k%d' % i, 'json')
+            os.utime(fn, (1000 + i, 1000 + i))
+        # Loading marks the entry as recently used
+        self.assertEqual(c.load('test_evict', 'k0'), 'x' * 100)
+        c._MAX_SIZE = 250
+        c.evict()
+        self.assertEqual(
+            [os.path.exists(c._get_cache_fn('test_evict', 'k%d' % i, 'json')) for i in range(4)],
+            [True, False, False, True])
+        self.assertEqual(c.stats['evictions'], 2)
+        self.assertEqual(c.load('test_evict', 'k1'), None)
+
+
+class TestResponseMemo(unittest.TestCase):
+    def test_response_memo(self):
+        def request_func():
+            requests.append(1)
+            started.set()
+            release.wait()
+            return compat_urllib_response.addinfourl(
+                io.BytesIO(b'body'), {}, 'http://example.com/', 200)
+
+        def fetch(req):
+            results.append(memo.fetch(req, request_func).read())
+
+        ydl = FakeYDL()
+        memo = ResponseMemo(ydl)
+        requests, results = [], []
+        started, release = threading.Event(), threading.Event()
+        req = sanitized_Request('http://example.com/', headers={'X': '1'})
+        threads = [threading.Thread(target=fetch, args=(req, ))]
+        threads[0].start()
+        started.wait()
+        threads.append(threading.Thread(target=fetch, args=(req, )))
+        threads[1].start()
+        release.set()
+        for t in threads:
+            t.join()
+        fetch(sanitized_Request('http://example.com/', headers={'X': '1'}))
+        self.assertEqual(results, [b'body'] * 3)
+        self.assertEqual(len(requests), 1)
+        # The second request either waited for the first one or came after it
+        self.assertEqual(memo.stats['hits'] + memo.stats['coalesced'], 2)
+        self.assertEqual(memo.stats['misses'], 1)
+
+        fetch(sanitized_Request('http://example.com/', headers={'X': '2'}))
+        fetch(sanitized_Request('http://example.com/', data=b'x', headers={'X': '1'}))
+        self.assertEqual(len(requests), 3)
+
+        # Requests sending other cookies get another response
+        ydl.cookiejar.set_cookie(compat_cookiejar_Cookie(
+            0, 'platform', 'tv', None, False, 'example.com', True, False, '/',
+            True, False, None, False, None, None, {}))
+        fetch(sanitized_Request('http://example.com/', headers={'X': '1'}))
+        fetch(sanitized_Request('http://example.com/', headers={'X': '1'}))
+        self.assertEqual(len(requests), 4)
+
+        ydl.params['webpage_memo'] = False
+        fetch(sanitized_Request('http://example.com/', headers={'X': '1'}))
+        self.assertEqual(len(requests), 5)
+
 
 if __name__ == '__main__':
     unittest.main()
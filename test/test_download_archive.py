@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# coding: utf-8
+from __future__ import unicode_literals
+
+# Allow direct execution
+import io
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test.helper import FakeYDL
+from youtube_dlc.archive import (
+    detect_archive_format,
+    open_download_archive,
+    sqlite3,
+    SQLiteDownloadArchive,
+    TextDownloadArchive,
+)
+
+
+class TestDownloadArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.text_fn = os.path.join(self.tmp_dir, 'archive.txt')
+        self.sqlite_fn = os.path.join(self.tmp_dir, 'archive.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def read_text(self, fn):
+        with io.open(fn, encoding='utf-8') as f:
+            return f.read()
+
+    def test_text_archive(self):
+        with io.open(self.text_fn, 'w', encoding='utf-8') as f:
+            f.write('youtube abc\n\nvimeo 123\n')
+        archive = TextDownloadArchive(self.text_fn)
+        self.assertIn('youtube abc', archive)
+        self.assertNotIn('youtube def', archive)
+        archive.add('youtube def')
+        archive.add('youtube abc')
+        self.assertIn('youtube def', archive)
+        self.assertEqual(
+            self.read_text(self.text_fn), 'youtube abc\n\nvimeo 123\nyoutube def\n')
+        self.assertEqual(list(archive), ['vimeo 123', 'youtube abc', 'youtube def'])
+
+        self.assertIn('youtube def', TextDownloadArchive(self.text_fn))
+        self.assertNotIn('youtube abc', TextDownloadArchive(os.path.join(self.tmp_dir, 'missing')))
+
+    @unittest.skipIf(sqlite3 is None, 'sqlite3 is not available')
+    def test_sqlite_archive(self):
+        archive = open_download_archive(self.sqlite_fn, 'sqlite')
+        self.addCleanup(archive.close)
+        archive.add('youtube abc')
+        archive.add('youtube abc')
+        self.assertIn('youtube abc', archive)
+        self.assertNotIn('youtube def', archive)
+        self.assertEqual(detect_archive_format(self.sqlite_fn), 'sqlite')
+        self.assertEqual(detect_archive_format(self.text_fn), 'text')
+
+        # Entries added by another writer are seen without reopening
+        other = open_download_archive(self.sqlite_fn)
+        self.addCleanup(other.close)
+        self.assertIsInstance(other, SQLiteDownloadArchive)
+        other.add('vimeo 123')
+        self.assertIn('vimeo 123', archive)
+        self.assertEqual(list(archive), ['youtube abc', 'vimeo 123'])
+
+    @unittest.skipIf(sqlite3 is None, 'sqlite3 is not available')
+    def test_import_export(self):
+        with io.open(self.text_fn, 'w', encoding='utf-8') as f:
+            f.write('youtube abc\nvimeo 123\nyoutube abc\n')
+        archive = SQLiteDownloadArchive(self.sqlite_fn)
+        self.addCleanup(archive.close)
+        archive.BATCH_SIZE = 1
+        archive.import_text(self.text_fn)
+        self.assertEqual(list(archive), ['youtube abc', 'vimeo 123'])
+
+        export_fn = os.path.join(self.tmp_dir, 'export.txt')
+        archive.export_text(export_fn)
+        self.assertEqual(self.read_text(export_fn), 'youtube abc\nvimeo 123\n')
+
+    @unittest.skipIf(sqlite3 is None, 'sqlite3 is not available')
+    def test_concurrent_writers(self):
+        archives = [SQLiteDownloadArchive(self.sqlite_fn) for _ in range(4)]
+
+        def record(archive, n):
+            for i in range(50):
+                archive.add('test %d' % (i * len(archives) + n))
+                # Everybody records this one
+                archive.add('test shared')
+
+        threads = [
+            threading.Thread(target=record, args=(archive, n))
+            for n, archive in enumerate(archives)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ids = list(archives[0])
+        for archive in archives:
+            archive.close()
+        self.assertEqual(len(ids), 201)
+        self.assertEqual(set(ids), set(['test %d' % i for i in range(200)] + ['test shared']))
+
+    @unittest.skipIf(sqlite3 is None, 'sqlite3 is not available')
+    def test_youtubedl(self):
+        info_dict = {'id': 'abc', 'extractor_key': 'Youtube'}
+        with FakeYDL({'download_archive': self.sqlite_fn, 'download_archive_format': 'sqlite'}) as ydl:
+            self.assertFalse(ydl.in_download_archive(info_dict))
+            ydl.record_download_archive(info_dict)
+            self.assertTrue(ydl.in_download_archive(info_dict))
+        with FakeYDL({'download_archive': self.sqlite_fn}) as ydl:
+            self.assertTrue(ydl.in_download_archive(info_dict))
+
+
+if __name__ == '__main__':
+    unittest.main()
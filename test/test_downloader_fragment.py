@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# coding: utf-8
+from __future__ import unicode_literals
+
+# Allow direct execution
+import binascii
+import glob
+import json
+import os
+import re
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test.helper import http_server_port, try_rm
+from youtube_dlc import YoutubeDL
+from youtube_dlc.aes import aes_cbc_encrypt
+from youtube_dlc.compat import compat_http_server, compat_struct_pack
+from youtube_dlc.downloader.dash import DashSegmentsFD
+from youtube_dlc.downloader.hls import HlsFD, can_decrypt_frag
+from youtube_dlc.utils import bytes_to_intlist, encodeFilename, intlist_to_bytes
+import threading
+
+
+FRAGMENT_COUNT = 20
+MISSING_FRAGMENT = 7
+# The HLS fragments switch to the second key, with an explicit IV, from
+# this one on
+KEY_CHANGE_FRAGMENT = 12
+HLS_KEYS = [b'0123456789abcdef', b'fedcba9876543210']
+HLS_IV = b'\x00' * 15 + b'\x42'
+KEY_REQUESTS = []
+
+
+def fragment_content(num):
+    return ('<fragment %d>' % num).encode('ascii') * (num + 1)
+
+
+def hls_fragment_content(num):
+    # Whole AES blocks, as the HLS downloader does not unpad
+    return ('%016d' % num).encode('ascii') * (num + 1)
+
+
+def hls_manifest():
+    lines = ['#EXTM3U', '#EXT-X-TARGETDURATION:10', '#EXT-X-MEDIA-SEQUENCE:0']
+    for num in range(FRAGMENT_COUNT):
+        if num == 0:
+            lines.append('#EXT-X-KEY:METHOD=AES-128,URI="key/0"')
+        elif num == KEY_CHANGE_FRAGMENT:
+            lines.append('#EXT-X-KEY:METHOD=AES-128,URI="key/1",IV=0x%s' % binascii.hexlify(HLS_IV).decode('ascii'))
+        lines.extend(['#EXTINF:10,', 'frag/%d' % num])
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def hls_encrypted_fragment(num):
+    if num < KEY_CHANGE_FRAGMENT:
+        key, iv = HLS_KEYS[0], compat_struct_pack('>8xq', num)
+    else:
+        key, iv = HLS_KEYS[1], HLS_IV
+    return intlist_to_bytes(aes_cbc_encrypt(
+        bytes_to_intlist(hls_fragment_content(num)), bytes_to_intlist(key), bytes_to_intlist(iv)))
+
+
+class HTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/hls/index.m3u8':
+            content = hls_manifest()
+        elif self.path.startswith('/hls/key/'):
+            KEY_REQUESTS.append(self.path)
+            content = HLS_KEYS[int(self.path[len('/hls/key/'):])]
+        else:
+            mobj = re.match(r'^(/hls)?/frag/(\d+)$', self.path)
+            if not mobj or int(mobj.group(2)) == MISSING_FRAGMENT:
+                self.send_response(404)
+                self.end_headers()
+                return
+            num = int(mobj.group(2))
+            content = hls_encrypted_fragment(num) if mobj.group(1) else fragment_content(num)
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeLogger(object):
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+class TestFragmentFD(unittest.TestCase):
+    def setUp(self):
+        self.httpd = compat_http_server.HTTPServer(
+            ('127.0.0.1', 0), HTTPTestRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        self.filename = 'testfile.mp4'
+        self.cleanup()
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.cleanup()
+
+    def cleanup(self):
+        for fn in glob.glob(self.filename + '*'):
+            try_rm(fn)
+
+    def download(self, params, fragment_nums, fd_class=DashSegmentsFD):
+        params.setdefault('fragment_retries', 0)
+        params['logger'] = FakeLogger()
+        ydl = YoutubeDL(params)
+        downloader = fd_class(ydl, params)
+        result = downloader.real_download(self.filename, {
+            'fragment_base_url': 'http://127.0.0.1:%d/frag/' % self.port,
+            'fragments': [{'path': '%d' % num} for num in fragment_nums],
+        })
+        if not result:
+            return None
+        with open(encodeFilename(self.filename), 'rb') as f:
+            return f.read()
+
+    def expected_content(self, fragment_nums):
+        return b''.join(
+            fragment_content(num) for num in fragment_nums
+            if num != MISSING_FRAGMENT)
+
+    def test_sequential(self):
+        nums = list(range(FRAGMENT_COUNT))
+        self.assertEqual(self.download({}, nums), self.expected_content(nums))
+
+    def test_concurrent(self):
+        nums = list(range(FRAGMENT_COUNT))
+        self.assertEqual(
+            self.download({'concurrent_fragment_downloads': 4}, nums),
+            self.expected_content(nums))
+
+    def test_keep_fragments(self):
+        nums = list(range(3))
+        self.assertEqual(
+            self.download({'keep_fragments': True}, nums),
+            self.expected_content(nums))
+        for i, num in enumerate(nums):
+            with open(encodeFilename('%s.part-Frag%d' % (self.filename, i)), 'rb') as f:
+                self.assertEqual(f.read(), fragment_content(num))
+
+    def test_resume(self):
+        nums = list(range(FRAGMENT_COUNT))
+        byte_offset = len(self.expected_content(nums[:5]))
+        # Fragments appended after the last checkpoint must be discarded
+        with open(encodeFilename(self.filename + '.part'), 'wb') as f:
+            f.write(self.expected_content(nums[:6]) + b'junk')
+        with open(encodeFilename(self.filename + '.ytdl'), 'w') as f:
+            f.write(json.dumps({'downloader': {'current_fragment': {
+                'index': 5,
+                'byte_offset': byte_offset,
+            }}}))
+        self.assertEqual(self.download({}, nums), self.expected_content(nums))
+
+    def test_resume_inconsistent(self):
+        nums = list(range(FRAGMENT_COUNT))
+        with open(encodeFilename(self.filename + '.part'), 'wb') as f:
+            f.write(b'junk')
+        with open(encodeFilename(self.filename + '.ytdl'), 'w') as f:
+            f.write(json.dumps({'downloader': {'current_fragment': {
+                'index': 5,
+                'byte_offset': 1000,
+            }}}))
+        self.assertEqual(self.download({}, nums), self.expected_content(nums))
+
+    def test_checkpoints(self):
+        checkpoints = []
+
+        class CountingDashSegmentsFD(DashSegmentsFD):
+            _CHECKPOINT_FRAGMENTS = 8
+            _CHECKPOINT_INTERVAL = float('inf')
+
+            def _write_ytdl_file(self, ctx):
+                checkpoints.append((ctx['fragment_index'], ctx['dest_size']))
+                super(CountingDashSegmentsFD, self)._write_ytdl_file(ctx)
+
+        nums = list(range(FRAGMENT_COUNT))
+        self.assertEqual(
+            self.download({}, nums, CountingDashSegmentsFD),
+            self.expected_content(nums))
+        self.assertEqual(checkpoints, [
+            (0, 0),
+            (9, len(self.expected_content(nums[:9]))),
+            (17, len(self.expected_content(nums[:17]))),
+        ])
+
+    def test_concurrent_abort_on_unavailable_fragment(self):
+        nums = list(range(FRAGMENT_COUNT))
+        self.assertEqual(self.download({
+            'concurrent_fragment_downloads': 4,
+            'skip_unavailable_fragments': False,
+            'ignoreerrors': True,
+        }, nums), None)
+
+    @unittest.skipUnless(can_decrypt_frag, 'pycrypto is not installed')
+    def test_hls_key_change(self):
+        nums = [num for num in range(FRAGMENT_COUNT) if num != MISSING_FRAGMENT]
+        expected = b''.join(hls_fragment_content(num) for num in nums)
+        for concurrency in (1, 4):
+            del KEY_REQUESTS[:]
+            self.cleanup()
+            ydl = YoutubeDL({'logger': FakeLogger()})
+            params = {
+                'concurrent_fragment_downloads': concurrency,
+                'fragment_retries': 0,
+            }
+            # The unavailable fragment is skipped
+            self.assertTrue(HlsFD(ydl, params).real_download(self.filename, {
+                'url': 'http://127.0.0.1:%d/hls/index.m3u8' % self.port,
+            }))
+            with open(encodeFilename(self.filename), 'rb') as f:
+                self.assertEqual(f.read(), expected)
+            # Each key is requested once
+            self.assertEqual(KEY_REQUESTS, ['/hls/key/0', '/hls/key/1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 
 # Allow direct execution
+import io
 import os
 import re
 import sys
@@ -102,6 +103,21 @@ class TestHttpFD(unittest.TestCase):
         for ep in ('regular', 'no-content-length', 'no-range', 'no-range-no-content-length'):
             self.download(params, ep)
 
+    def download_to_buffer(self, params, ep):
+        params['logger'] = FakeLogger()
+        ydl = YoutubeDL(params)
+        downloader = HttpFD(ydl, params)
+        buf = io.BytesIO()
+        self.assertTrue(downloader.real_download(buf, {
+            'url': 'http://127.0.0.1:%d/%s' % (self.port, ep),
+        }))
+        self.assertEqual(buf.getvalue(), b'#' * TEST_SIZE)
+
+    def test_buffer(self):
+        for ep in ('regular', 'no-content-length', 'no-range', 'no-range-no-content-length'):
+            self.download_to_buffer({}, ep)
+            self.download_to_buffer({'http_chunk_size': 1000}, ep)
+
     def test_regular(self):
         self.download_all({})
 
@@ -10,9 +10,17 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from test.helper import http_server_port
 from youtube_dlc import YoutubeDL
-from youtube_dlc.compat import compat_http_server, compat_urllib_request
+from youtube_dlc.compat import (
+    compat_http_client,
+    compat_http_server,
+    compat_urllib_error,
+    compat_urllib_request,
+)
+from youtube_dlc.utils import sanitized_Request
+import socket
 import ssl
 import threading
+import zlib
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -106,6 +114,176 @@ class TestHTTPS(unittest.TestCase):
         self.assertEqual(r['entries'][0]['url'], 'https://127.0.0.1:%d/vid.mp4' % self.port)
 
 
+KEEP_ALIVE_POSTS = []
+
+
+class KeepAliveHTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        content = ('%d ' % self.client_address[1]).encode('utf-8') * 1000
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        self.wfile.write(content)
+        if self.path == '/drop':
+            # Drop the connection without announcing it, like a server
+            # timing out an idle keep-alive connection
+            self.close_connection = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        KEEP_ALIVE_POSTS.append(self.path)
+        # Close the connection without a response, like a server failing
+        # while processing the request
+        self.close_connection = True
+
+
+class TestKeepAlive(unittest.TestCase):
+    def setUp(self):
+        self.httpd = compat_http_server.HTTPServer(
+            ('127.0.0.1', 0), KeepAliveHTTPTestRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+    def urlopen(self, ydl, path):
+        return ydl.urlopen('http://127.0.0.1:%d%s' % (self.port, path))
+
+    def client_port(self, ydl, path):
+        return int(self.urlopen(ydl, path).read().decode('utf-8').split()[0])
+
+    @unittest.skipIf(sys.version_info < (3, 0), 'Keep-alive requires Python 3')
+    def test_reuse(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        port = self.client_port(ydl, '/a')
+        self.assertEqual(self.client_port(ydl, '/b'), port)
+        self.assertEqual(self.client_port(ydl, '/c'), port)
+        self.assertEqual(ydl._connection_pool.opened, 1)
+        self.assertEqual(ydl._connection_pool.reused, 2)
+
+    @unittest.skipIf(sys.version_info < (3, 0), 'Keep-alive requires Python 3')
+    def test_partially_read_response(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        resp = self.urlopen(ydl, '/a')
+        resp.read(10)
+        resp.close()
+        self.client_port(ydl, '/b')
+        self.assertEqual(ydl._connection_pool.opened, 2)
+        self.assertEqual(ydl._connection_pool.reused, 0)
+
+    @unittest.skipIf(sys.version_info < (3, 0), 'Keep-alive requires Python 3')
+    def test_stale_connection(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        port = self.client_port(ydl, '/drop')
+        self.assertNotEqual(self.client_port(ydl, '/a'), port)
+        self.assertEqual(ydl._connection_pool.opened, 2)
+
+    @unittest.skipIf(sys.version_info < (3, 0), 'Keep-alive requires Python 3')
+    def test_stale_connection_post(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        self.client_port(ydl, '/a')
+        # The server may have acted on the request, so it is not resent
+        self.assertRaises(
+            (compat_urllib_error.URLError, compat_http_client.HTTPException, socket.error),
+            ydl.urlopen, sanitized_Request(
+                'http://127.0.0.1:%d/post' % self.port, data=b'x'))
+        self.assertEqual(KEEP_ALIVE_POSTS, ['/post'])
+
+    def test_no_keep_alive(self):
+        ydl = YoutubeDL({'logger': FakeLogger(), 'keep_alive': False})
+        self.assertNotEqual(self.client_port(ydl, '/a'), self.client_port(ydl, '/b'))
+        self.assertIsNone(ydl._connection_pool)
+
+
+def _gzip(data):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _deflate(data, wbits):
+    compressor = zlib.compressobj(9, zlib.DEFLATED, wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+ENCODED_CONTENT = b'<html>' + b'content ' * 100000 + b'</html>'
+ENCODED_RESPONSES = {
+    '/gzip': ('gzip', _gzip(ENCODED_CONTENT)),
+    '/gzip-junk': ('gzip', _gzip(ENCODED_CONTENT) + b'\x00junk'),
+    '/gzip-magic-junk': ('gzip', _gzip(ENCODED_CONTENT) + b'\x1f\x8bjunk'),
+    '/gzip-magic': ('gzip', _gzip(ENCODED_CONTENT) + b'\x1f\x8b'),
+    '/gzip-members': ('gzip', _gzip(ENCODED_CONTENT[:1000]) + _gzip(ENCODED_CONTENT[1000:])),
+    '/deflate': ('deflate', _deflate(ENCODED_CONTENT, -zlib.MAX_WBITS)),
+    '/deflate-zlib': ('deflate', _deflate(ENCODED_CONTENT, zlib.MAX_WBITS)),
+}
+TRUNCATED_RESPONSES = {
+    '/gzip-truncated': ('gzip', _gzip(ENCODED_CONTENT)[:-10]),
+    '/gzip-members-truncated': ('gzip', _gzip(ENCODED_CONTENT[:1000]) + _gzip(ENCODED_CONTENT[1000:])[:100]),
+    '/deflate-truncated': ('deflate', _deflate(ENCODED_CONTENT, -zlib.MAX_WBITS)[:100]),
+}
+
+
+class ContentEncodingHTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        content_encoding, content = ENCODED_RESPONSES.get(self.path) or TRUNCATED_RESPONSES[self.path]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Encoding', content_encoding)
+        self.send_header('Content-Length', len(content))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class TestContentEncoding(unittest.TestCase):
+    def setUp(self):
+        self.httpd = compat_http_server.HTTPServer(
+            ('127.0.0.1', 0), ContentEncodingHTTPTestRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+    def urlopen(self, ydl, path):
+        return ydl.urlopen('http://127.0.0.1:%d%s' % (self.port, path))
+
+    def test_decoding(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        for path in ENCODED_RESPONSES:
+            resp = self.urlopen(ydl, path)
+            self.assertEqual(resp.read(), ENCODED_CONTENT, path)
+            self.assertIsNone(resp.headers.get('Content-Encoding'))
+
+    def test_incremental_read(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        resp = self.urlopen(ydl, '/gzip')
+        self.assertEqual(resp.read(6), b'<html>')
+        self.assertEqual(resp.readline(), b'content ' * 100000 + b'</html>')
+        self.assertEqual(resp.read(), b'')
+
+    def test_truncated(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        for path in TRUNCATED_RESPONSES:
+            resp = self.urlopen(ydl, path)
+            self.assertRaises(IOError, resp.read)
+
+    @unittest.skipIf(sys.version_info < (3, 0), 'Keep-alive requires Python 3')
+    def test_reuse(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        self.urlopen(ydl, '/gzip-junk').read()
+        self.urlopen(ydl, '/deflate').read()
+        self.assertEqual(ydl._connection_pool.opened, 1)
+
+
 def _build_proxy_handler(name):
     class HTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
         proxy_name = name
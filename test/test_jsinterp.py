@@ -8,7 +8,8 @@ import sys
 import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from youtube_dlc.jsinterp import JSInterpreter
+from youtube_dlc.jsinterp import JSInterpreter, _Parser
+from youtube_dlc.utils import ExtractorError
 
 
 class TestJSInterpreter(unittest.TestCase):
@@ -112,6 +113,37 @@ class TestJSInterpreter(unittest.TestCase):
         ''')
         self.assertEqual(jsi.call_function('z'), 5)
 
+    def test_associativity(self):
+        jsi = JSInterpreter('function f(){return 10 - 2 - 3 + 8 % 5 * 2;}')
+        self.assertEqual(jsi.call_function('f'), 11)
+
+    def test_strings(self):
+        jsi = JSInterpreter('''function f(a){var b = a.split(""); b[0] = 'x'; return b.join(";");}''')
+        self.assertEqual(jsi.call_function('f', 'abc'), 'x;b;c')
+
+    def test_member_call(self):
+        jsi = JSInterpreter('''
+        var o={ab:function(a,b){a.splice(0,b)},cd:function(a){a.reverse()}};
+        function f(a){a=a.split("");o.cd(a);o["ab"](a,2);return a.join("")}
+        ''')
+        self.assertEqual(jsi.call_function('f', 'abcdef'), 'dcba')
+
+    def test_unsupported(self):
+        jsi = JSInterpreter('function f(){if (a) return 1;}')
+        self.assertRaises(ExtractorError, jsi.call_function, 'f')
+
+    def test_parsed_once(self):
+        code = 'function f(a){var b = a * 2; return b + 1;}'
+        f = JSInterpreter(code).extract_function('f')
+        self.assertEqual([f([n]) for n in range(3)], [1, 3, 5])
+        # The same function of another interpreter is not parsed again
+        parse_body = _Parser.parse_body
+        _Parser.parse_body = None
+        try:
+            self.assertEqual(JSInterpreter(code).call_function('f', 5), 11)
+        finally:
+            _Parser.parse_body = parse_body
+
 
 if __name__ == '__main__':
     unittest.main()
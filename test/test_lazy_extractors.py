@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+rootDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Extract an URL with the lazy extractors and list the extractor modules
+# that got imported
+_CHECK_SCRIPT = '''
+import json, sys
+from youtube_dlc import YoutubeDL
+from youtube_dlc.extractor import _LAZY_LOADER
+
+url = 'https://vimeo.com/56015672'
+ydl = YoutubeDL({'quiet': True})
+ie_key = next(ie.ie_key() for ie in ydl._ies if ie.suitable(url))
+ie = ydl.get_info_extractor(ie_key)
+print(json.dumps({
+    'lazy_loader': _LAZY_LOADER,
+    'ie_name': ie.IE_NAME,
+    'ie_module': type(ie).__module__,
+    'modules': sorted(m for m in sys.modules if m.startswith('youtube_dlc.extractor.')),
+}))
+'''
+
+
+class TestLazyExtractors(unittest.TestCase):
+    def setUp(self):
+        # Build the lazy extractors in a copy of the package, the source
+        # tree must not be altered while other tests are running
+        self.tmp_dir = tempfile.mkdtemp()
+        for path in ('youtube_dlc', 'devscripts'):
+            shutil.copytree(
+                os.path.join(rootDir, path), os.path.join(self.tmp_dir, path),
+                ignore=shutil.ignore_patterns('*.pyc', '__pycache__', 'lazy_extractors.py'))
+        subprocess.check_call(
+            [sys.executable, 'devscripts/make_lazy_extractors.py',
+             'youtube_dlc/extractor/lazy_extractors.py'],
+            cwd=self.tmp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_lazy_loading(self):
+        env = dict(os.environ)
+        env.pop('YOUTUBE_DLC_NO_LAZY_EXTRACTORS', None)
+        output = subprocess.check_output(
+            [sys.executable, '-c', _CHECK_SCRIPT], cwd=self.tmp_dir, env=env)
+        result = json.loads(output.decode('utf-8'))
+        self.assertTrue(result['lazy_loader'])
+        # The real extractor is instantiated
+        self.assertEqual(result['ie_name'], 'vimeo')
+        self.assertEqual(result['ie_module'], 'youtube_dlc.extractor.vimeo')
+        # Only a few modules are imported instead of all the extractors
+        self.assertIn('youtube_dlc.extractor.vimeo', result['modules'])
+        self.assertNotIn('youtube_dlc.extractor.youtube', result['modules'])
+        self.assertLess(len(result['modules']), 20)
+
+    def test_disabled(self):
+        env = dict(os.environ)
+        env['YOUTUBE_DLC_NO_LAZY_EXTRACTORS'] = '1'
+        output = subprocess.check_output(
+            [sys.executable, '-c', _CHECK_SCRIPT], cwd=self.tmp_dir, env=env)
+        result = json.loads(output.decode('utf-8'))
+        self.assertFalse(result['lazy_loader'])
+        self.assertEqual(result['ie_name'], 'vimeo')
+        self.assertIn('youtube_dlc.extractor.youtube', result['modules'])
+
+
+if __name__ == '__main__':
+    unittest.main()
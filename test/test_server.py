@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+# coding: utf-8
+from __future__ import unicode_literals
+
+# Allow direct execution
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import time
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test.helper import http_server_port
+from youtube_dlc.compat import (
+    compat_http_server,
+    compat_socketserver,
+    compat_urllib_error,
+    compat_urllib_request,
+)
+from youtube_dlc.server import (
+    JobManager,
+    make_server,
+    parse_server_address,
+)
+import threading
+
+
+VIDEO_CONTENT = b'\x00\x00\x00\x18ftypmp42' * 100
+
+
+class HTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _headers(self):
+        if self.path != '/video.mp4':
+            self.send_response(404)
+            self.end_headers()
+            return False
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', len(VIDEO_CONTENT))
+        self.end_headers()
+        return True
+
+    def do_HEAD(self):
+        self._headers()
+
+    def do_GET(self):
+        if self._headers():
+            self.wfile.write(VIDEO_CONTENT)
+
+
+class SlowHTTPTestRequestHandler(HTTPTestRequestHandler):
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def _headers(self):
+        cls = SlowHTTPTestRequestHandler
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        time.sleep(0.2)
+        with cls.lock:
+            cls.active -= 1
+        return HTTPTestRequestHandler._headers(self)
+
+
+class ThreadingHTTPServer(compat_socketserver.ThreadingMixIn, compat_http_server.HTTPServer):
+    daemon_threads = True
+
+
+class FakeLogger(object):
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+def start_server(server):
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.media_httpd = compat_http_server.HTTPServer(
+            ('127.0.0.1', 0), HTTPTestRequestHandler)
+        start_server(self.media_httpd)
+        self.video_url = 'http://127.0.0.1:%d/video.mp4' % http_server_port(self.media_httpd)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.ydl_opts = {
+            'logger': FakeLogger(),
+            'outtmpl': os.path.join(self.tmp_dir, '%(id)s.%(ext)s'),
+        }
+
+    def tearDown(self):
+        self.media_httpd.shutdown()
+        self.media_httpd.server_close()
+        shutil.rmtree(self.tmp_dir)
+
+    def start_job_server(self, job_manager):
+        server = make_server('127.0.0.1:0', job_manager)
+        start_server(server)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return 'http://127.0.0.1:%d' % http_server_port(server)
+
+    def request(self, url, data=None, method=None, headers={}):
+        if data is not None:
+            data = json.dumps(data).encode('utf-8')
+            headers = dict({'Content-Type': 'application/json'}, **headers)
+        req = compat_urllib_request.Request(url, data=data, headers=headers)
+        if method:
+            req.get_method = lambda: method
+        try:
+            response = compat_urllib_request.urlopen(req)
+        except compat_urllib_error.HTTPError as err:
+            response = err
+        return response.getcode(), json.loads(response.read().decode('utf-8'))
+
+    def wait_for_job(self, base_url, job_id):
+        for _ in range(100):
+            _, job = self.request('%s/jobs/%s' % (base_url, job_id))
+            if job['status'] not in ('queued', 'running'):
+                return job
+            time.sleep(0.1)
+        self.fail('job %s did not finish' % job_id)
+
+    def test_parse_server_address(self):
+        self.assertEqual(parse_server_address('8080'), (socket.AF_INET, ('127.0.0.1', 8080)))
+        self.assertEqual(parse_server_address('0.0.0.0:8080'), (socket.AF_INET, ('0.0.0.0', 8080)))
+        self.assertEqual(parse_server_address('[::1]:8080'), (socket.AF_INET6, ('::1', 8080)))
+        self.assertRaises(ValueError, parse_server_address, 'localhost')
+        if hasattr(socket, 'AF_UNIX'):
+            self.assertEqual(
+                parse_server_address('unix:/tmp/ytdl.sock'), (socket.AF_UNIX, '/tmp/ytdl.sock'))
+            # Existing files are not replaced
+            path = os.path.join(self.tmp_dir, 'notes.txt')
+            with open(path, 'w') as f:
+                f.write('notes')
+            self.assertRaises(ValueError, parse_server_address, 'unix:' + path)
+            self.assertRaises(ValueError, make_server, 'unix:' + path, JobManager(self.ydl_opts, workers=0))
+            self.assertTrue(os.path.isfile(path))
+
+    def test_download_job(self):
+        job_manager = JobManager(self.ydl_opts, workers=2)
+        self.addCleanup(job_manager.close)
+        base_url = self.start_job_server(job_manager)
+
+        status, job = self.request(base_url + '/jobs', {
+            'url': self.video_url,
+            'params': {'match_filter': 'id != video'},
+        })
+        self.assertEqual(status, 201)
+        job = self.wait_for_job(base_url, job['id'])
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['params'], {'match_filter': 'id != video'})
+        self.assertEqual(job['files'], [])
+
+        # The overrides only apply to their job
+        _, job = self.request(base_url + '/jobs', {'url': self.video_url})
+        job = self.wait_for_job(base_url, job['id'])
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['retcode'], 0)
+        filename = os.path.join(self.tmp_dir, 'video.mp4')
+        self.assertEqual(job['files'], [filename])
+        self.assertEqual(job['progress']['status'], 'finished')
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), VIDEO_CONTENT)
+
+        _, jobs = self.request(base_url + '/jobs')
+        self.assertEqual([j['id'] for j in jobs], ['1', '2'])
+
+    def test_shared_host_limits(self):
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), SlowHTTPTestRequestHandler)
+        start_server(httpd)
+        self.addCleanup(httpd.server_close)
+        self.addCleanup(httpd.shutdown)
+        video_url = 'http://127.0.0.1:%d/video.mp4' % http_server_port(httpd)
+
+        # A single request at once to the host from all the workers
+        job_manager = JobManager(dict(
+            self.ydl_opts, skip_download=True, host_limits={'127.0.0.1': (None, 1)}), workers=2)
+        self.addCleanup(job_manager.close)
+        job_ids = [job_manager.submit(video_url)['id'] for _ in range(2)]
+        for job_id in job_ids:
+            for _ in range(100):
+                if job_manager.get(job_id)['status'] not in ('queued', 'running'):
+                    break
+                time.sleep(0.1)
+            self.assertEqual(job_manager.get(job_id)['status'], 'finished')
+        self.assertEqual(SlowHTTPTestRequestHandler.max_active, 1)
+        # Identical webpage requests of the jobs share their response too
+        self.assertIs(job_manager._ydls[1].response_memo, job_manager._ydls[0].response_memo)
+
+    def test_shared_archive(self):
+        ydl_module = sys.modules['youtube_dlc.YoutubeDL']
+        open_download_archive = ydl_module.open_download_archive
+        opened = []
+
+        def counting_open_download_archive(*args):
+            opened.append(args)
+            return open_download_archive(*args)
+
+        ydl_module.open_download_archive = counting_open_download_archive
+        try:
+            job_manager = JobManager(dict(
+                self.ydl_opts, download_archive=os.path.join(self.tmp_dir, 'archive.txt')), workers=3)
+            self.addCleanup(job_manager.close)
+        finally:
+            ydl_module.open_download_archive = open_download_archive
+        self.assertEqual(len(opened), 1)
+        archives = [ydl.archive for ydl in job_manager._ydls]
+        self.assertTrue(all(archive is archives[0] for archive in archives))
+        self.assertTrue(all(
+            ydl.params['download_archive'] == os.path.join(self.tmp_dir, 'archive.txt')
+            for ydl in job_manager._ydls))
+
+    def test_failed_job(self):
+        job_manager = JobManager(self.ydl_opts)
+        self.addCleanup(job_manager.close)
+        base_url = self.start_job_server(job_manager)
+        _, job = self.request(base_url + '/jobs', {'url': self.video_url[:-4] + '.missing'})
+        job = self.wait_for_job(base_url, job['id'])
+        self.assertEqual(job['status'], 'error')
+        self.assertEqual(job['retcode'], 1)
+        self.assertTrue(job['error'])
+
+    def test_invalid_requests(self):
+        job_manager = JobManager(self.ydl_opts)
+        self.addCleanup(job_manager.close)
+        base_url = self.start_job_server(job_manager)
+        self.assertEqual(self.request(base_url + '/jobs', {})[0], 400)
+        for params in (
+                {'proxy': 'http://127.0.0.1:1'},
+                {'outtmpl': '/tmp/%(id)s'},
+                {'external_downloader': 'curl', 'external_downloader_args': ['-o', '/tmp/x']},
+                {'match_filter': 42}):
+            self.assertEqual(self.request(base_url + '/jobs', {
+                'url': self.video_url,
+                'params': params,
+            })[0], 400)
+        self.assertEqual(self.request(base_url + '/jobs', {'url': self.video_url}, headers={
+            'Content-Type': 'text/plain',
+        })[0], 415)
+        # Requests from web pages
+        for data in (None, {'url': self.video_url}):
+            self.assertEqual(self.request(base_url + '/jobs', data, headers={
+                'Origin': 'http://example.com',
+            })[0], 403)
+        self.assertEqual(job_manager.list(), [])
+        self.assertEqual(self.request(base_url + '/jobs/42')[0], 404)
+
+    def test_cancel(self):
+        # Without workers jobs stay queued
+        job_manager = JobManager(self.ydl_opts, workers=0)
+        base_url = self.start_job_server(job_manager)
+        _, job = self.request(base_url + '/jobs', {'url': self.video_url})
+        status, job = self.request('%s/jobs/%s' % (base_url, job['id']), method='DELETE')
+        self.assertEqual(status, 200)
+        self.assertEqual(job['status'], 'cancelled')
+        self.assertEqual(self.request(base_url + '/jobs/42', method='DELETE')[0], 404)
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'Unix sockets are not supported')
+    def test_unix_socket(self):
+        job_manager = JobManager(self.ydl_opts, workers=0)
+        path = os.path.join(self.tmp_dir, 'ytdl.sock')
+        server = make_server('unix:' + path, job_manager)
+        start_server(server)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+        body = json.dumps({'url': self.video_url}).encode('utf-8')
+        sock.sendall(
+            ('POST /jobs HTTP/1.0\r\nContent-Type: application/json\r\n'
+             'Content-Length: %d\r\n\r\n' % len(body)).encode('ascii') + body)
+        response = b''
+        while True:
+            data = sock.recv(4096)
+            if not data:
+                break
+            response += data
+        sock.close()
+        headers, _, body = response.partition(b'\r\n\r\n')
+        self.assertTrue(headers.startswith(b'HTTP/1.0 201'))
+        self.assertEqual(json.loads(body.decode('utf-8'))['status'], 'queued')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Various small unit tests
 import io
 import json
+import threading
+import time
 import xml.etree.ElementTree
 
 from youtube_dlc.utils import (
@@ -65,8 +67,10 @@ from youtube_dlc.utils import (
     sanitize_path,
     sanitize_url,
     expand_path,
+    prefetch_iter,
     prepend_extension,
     replace_extension,
+    RequestScheduler,
     remove_start,
     remove_end,
     remove_quotes,
@@ -98,6 +102,7 @@ from youtube_dlc.utils import (
     xpath_attr,
     render_table,
     match_str,
+    compile_match_str,
     parse_dfxp_time_expr,
     dfxp2srt,
     cli_option,
@@ -625,13 +630,16 @@ class TestUtil(unittest.TestCase):
                 for i in range(firstid, upto):
                     yield i
 
-            pl = OnDemandPagedList(get_page, pagesize)
-            got = pl.getslice(*sliceargs)
-            self.assertEqual(got, expected)
+            for concurrency in (1, 3):
+                pl = OnDemandPagedList(get_page, pagesize)
+                pl.concurrency = concurrency
+                got = pl.getslice(*sliceargs)
+                self.assertEqual(got, expected)
 
-            iapl = InAdvancePagedList(get_page, size // pagesize + 1, pagesize)
-            got = iapl.getslice(*sliceargs)
-            self.assertEqual(got, expected)
+                iapl = InAdvancePagedList(get_page, size // pagesize + 1, pagesize)
+                iapl.concurrency = concurrency
+                got = iapl.getslice(*sliceargs)
+                self.assertEqual(got, expected)
 
         testPL(5, 2, (), [0, 1, 2, 3, 4])
         testPL(5, 2, (1,), [1, 2, 3, 4])
@@ -642,6 +650,121 @@ class TestUtil(unittest.TestCase):
         testPL(5, 2, (2, 99), [2, 3, 4])
         testPL(5, 2, (20, 99), [])
 
+    def test_paged_list_concurrency(self):
+        requested = []
+        lock = threading.Lock()
+
+        def get_page(pagenum):
+            with lock:
+                requested.append(pagenum)
+            # 10 pages of 3 entries, the last page is short
+            return range(pagenum * 3, min(pagenum * 3 + 3, 29))
+
+        pl = OnDemandPagedList(get_page, 3, cache_size=4)
+        pl.concurrency = 4
+        self.assertEqual(pl.getslice(), list(range(29)))
+        # The pages after the short one are not requested in excess
+        self.assertEqual(sorted(requested), list(range(max(requested) + 1)))
+        self.assertLessEqual(max(requested), 9 + 3)
+
+        # Only the most recently used pages are cached
+        del requested[:]
+        self.assertEqual(pl.getslice(0, 6), list(range(6)))
+        self.assertEqual(sorted(requested), [0, 1])
+        del requested[:]
+        pl.concurrency = 1
+        self.assertEqual(pl.getslice(3, 6), [3, 4, 5])
+        self.assertEqual(requested, [])
+
+        del requested[:]
+        iapl = InAdvancePagedList(get_page, 10, 3)
+        iapl.concurrency = 4
+        self.assertEqual(iapl.getslice(4, 10), list(range(4, 10)))
+        self.assertEqual(sorted(requested), [1, 2, 3])
+
+    def test_prefetch_iter(self):
+        produced = []
+
+        def pages():
+            for pagenum in range(10):
+                produced.append(pagenum)
+                yield [pagenum]
+
+        for depth in (0, 1, 3):
+            del produced[:]
+            self.assertEqual(list(prefetch_iter(pages(), depth)), [[n] for n in range(10)])
+
+        # Nothing is prefetched until the second item is asked for, then the
+        # worker stays at most depth items ahead of the consumer
+        del produced[:]
+        it = prefetch_iter(pages(), 2)
+        self.assertEqual(next(it), [0])
+        time.sleep(0.05)
+        self.assertEqual(produced, [0])
+        self.assertEqual(next(it), [1])
+        for _ in range(50):
+            if len(produced) >= 4:
+                break
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(produced, [0, 1, 2, 3])
+        it.close()
+
+        def failing():
+            yield 1
+            raise ExtractorError('page 2 failed')
+
+        it = prefetch_iter(failing())
+        self.assertEqual(next(it), 1)
+        self.assertRaises(ExtractorError, next, it)
+
+    def test_request_scheduler(self):
+        scheduler = RequestScheduler({'example.com': (20, None), '*': (None, 1)})
+        scheduler.INITIAL_BACKOFF = 0.2
+
+        # Paced at 20 requests per second, after a burst of one
+        start = time.time()
+        for _ in range(5):
+            scheduler.acquire('www.example.com')
+            self.assertIsNone(scheduler.release('www.example.com'))
+        self.assertGreaterEqual(time.time() - start, 0.19)
+
+        # A single request at once to the other hosts
+        acquired = []
+        scheduler.acquire('example.org')
+        t = threading.Thread(target=lambda: acquired.append(scheduler.acquire('example.org')))
+        t.start()
+        time.sleep(0.05)
+        self.assertEqual(acquired, [])
+        scheduler.release('example.org')
+        t.join()
+        self.assertEqual(acquired, [None])
+        scheduler.release('example.org')
+
+        # Held back on 429 and 503, then ramped up again
+        scheduler.acquire('example.net')
+        self.assertEqual(scheduler.release('example.net', 429, '0'), 0)
+        scheduler.acquire('example.net')
+        self.assertEqual(scheduler.release('example.net', 503), 0.2)
+        start = time.time()
+        scheduler.acquire('example.net')
+        self.assertGreaterEqual(time.time() - start, 0.15)
+        scheduler.release('example.net', 503)
+        state = scheduler._hosts['example.net']
+        self.assertEqual(state.backoff, 0.8)
+        # Requests failing without a response change nothing
+        rate = state.rate
+        scheduler.acquire('example.net')
+        self.assertIsNone(scheduler.release('example.net', failed=True))
+        self.assertEqual((state.backoff, state.rate), (0.8, rate))
+        scheduler.acquire('example.net')
+        scheduler.release('example.net')
+        self.assertEqual(state.backoff, 0.2)
+        state.rate = RequestScheduler.MAX_ADAPTIVE_RATE
+        scheduler.release('example.net')
+        self.assertIsNone(state.rate)
+        self.assertIsNone(scheduler.release(None))
+
     def test_read_batch_urls(self):
         f = io.StringIO('''\xef\xbb\xbf foo
             bar\r
@@ -1214,6 +1337,28 @@ ffmpeg version 2.4.4 Copyright (c) 2000-2014 the FFmpeg ...'''), '2.4.4')
         self.assertFalse(match_str('!title', {'title': 'abc'}))
         self.assertFalse(match_str('!title', {'title': ''}))
 
+    def test_compile_match_str(self):
+        match = compile_match_str('like_count > 1K & dislike_count <? 50 & !is_live')
+        self.assertTrue(match({'like_count': 1200}))
+        self.assertFalse(match({'like_count': 1200, 'dislike_count': 60}))
+        self.assertFalse(match({'like_count': 1200, 'is_live': True}))
+        self.assertFalse(match({'like_count': 900}))
+        # Numbers are compared as strings to string fields
+        match = compile_match_str('x=42')
+        self.assertTrue(match({'x': 42}))
+        self.assertTrue(match({'x': '42'}))
+        # Conditions on missing fields are ignored for incomplete dicts
+        match = compile_match_str('like_count > 1K & !is_live & title')
+        self.assertTrue(match({}, incomplete=True))
+        self.assertFalse(match({'like_count': 10}, incomplete=True))
+        self.assertFalse(match({'is_live': True}, incomplete=True))
+        self.assertTrue(match_str('x>?5 & y', {'x': 10}, incomplete=True))
+        self.assertFalse(match_str('x>?5 & y', {'x': 10}))
+        # Invalid parts are reported when they are evaluated
+        match = compile_match_str('x & y>foo')
+        self.assertFalse(match({}))
+        self.assertRaises(ValueError, match, {'x': 1})
+
     def test_parse_dfxp_time_expr(self):
         self.assertEqual(parse_dfxp_time_expr(None), None)
         self.assertEqual(parse_dfxp_time_expr(''), None)
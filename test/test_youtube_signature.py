@@ -10,7 +10,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import io
 import re
+import shutil
 import string
+import tempfile
 
 from test.helper import FakeYDL
 from youtube_dlc.extractor import YoutubeIE
@@ -96,6 +98,48 @@ class TestPlayerInfo(unittest.TestCase):
             self.assertEqual(player_id, expected_player_id)
 
 
+class TestSignatureCache(unittest.TestCase):
+    PLAYER_URL = 'https://www.youtube.com/s/player/0123abcd/player_ias.vflset/en_US/base.js'
+    PLAYER_CODE = (
+        'var Xy={ab:function(a,b){a.splice(0,b)},cd:function(a){a.reverse()}};'
+        'zz=function(a){a=a.split("");Xy.cd(a,1);Xy.ab(a,2);return a.join("")};')
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def make_ie(self):
+        def download_webpage(*args, **kwargs):
+            downloads.append(args[0])
+            return self.PLAYER_CODE
+
+        downloads = []
+        ie = YoutubeIE(FakeYDL({'cachedir': self.cache_dir}))
+        ie._download_webpage = download_webpage
+        return ie, downloads
+
+    def test_player_cache(self):
+        ie, downloads = self.make_ie()
+        self.assertEqual(ie._decrypt_signature('abcdef', None, self.PLAYER_URL), 'dcba')
+        self.assertEqual(ie._decrypt_signature('ghijkl', None, self.PLAYER_URL), 'jihg')
+        self.assertEqual(ie._decrypt_signature('abcdefgh', None, self.PLAYER_URL), 'fedcba')
+        self.assertEqual(downloads, [self.PLAYER_URL])
+        cache = ie._downloader.cache
+        self.assertEqual(cache.load('youtube-sigfuncs', 'js_0123abcd_6'), [3, 2, 1, 0])
+        self.assertEqual(cache.load('youtube-players', 'js_0123abcd'), self.PLAYER_CODE)
+
+        # Another process neither downloads nor interprets the player for
+        # the known signature lengths, nor downloads it for a new one
+        ie, downloads = self.make_ie()
+        ie._parse_sig_js = None
+        self.assertEqual(ie._decrypt_signature('abcdef', None, self.PLAYER_URL), 'dcba')
+        ie, downloads = self.make_ie()
+        self.assertEqual(ie._decrypt_signature('abcdefghij', None, self.PLAYER_URL), 'hgfedcba')
+        self.assertEqual(downloads, [])
+
+
 class TestSignature(unittest.TestCase):
     def setUp(self):
         TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -21,6 +21,7 @@ import shutil
 import subprocess
 import socket
 import sys
+import threading
 import time
 import tokenize
 import traceback
@@ -28,6 +29,12 @@ import random
 
 from string import ascii_letters
 
+try:
+    import concurrent.futures
+    can_threaded_extraction = True
+except ImportError:
+    can_threaded_extraction = False
+
 from .compat import (
     compat_basestring,
     compat_cookiejar,
@@ -39,6 +46,7 @@ from .compat import (
     compat_str,
     compat_tokenize_tokenize,
     compat_urllib_error,
+    compat_urllib_parse_urlparse,
     compat_urllib_request,
     compat_urllib_request_DataHandler,
 )
@@ -60,9 +68,9 @@ from .utils import (
     format_bytes,
     formatSeconds,
     GeoRestrictedError,
+    HTTPConnectionPool,
     int_or_none,
     ISO3166Utils,
-    locked_file,
     make_HTTPS_handler,
     MaxDownloadsReached,
     orderedSet,
@@ -76,6 +84,7 @@ from .utils import (
     register_socks_protocols,
     render_table,
     replace_extension,
+    RequestScheduler,
     SameFileError,
     sanitize_filename,
     sanitize_path,
@@ -94,8 +103,10 @@ from .utils import (
     YoutubeDLHandler,
     YoutubeDLRedirectHandler,
 )
-from .cache import Cache
+from .archive import open_download_archive
+from .cache import Cache, HTTPCache, ResponseMemo
 from .extractor import get_info_extractor, gen_extractor_classes, _LAZY_LOADER
+from .extractor.dispatch import ExtractorDispatchIndex
 from .extractor.openload import PhantomJSwrapper
 from .downloader import get_suitable_downloader
 from .downloader.rtmp import rtmpdump_version
@@ -114,6 +125,135 @@ if compat_os_name == 'nt':
     import ctypes
 
 
+class _PlaylistEntryPrefetcher(object):
+    """
+    Extract the entries of a playlist in worker threads, ahead of the entry
+    being processed, while they are still processed one at a time and in
+    order by the main thread.
+
+    Iterating over it yields (entry, future) tuples, future being None if
+    the entry was not submitted for extraction.
+    """
+
+    def __init__(self, ydl, entries, concurrency):
+        self._ydl = ydl
+        self._entries = iter(entries)
+        self._concurrency = concurrency
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+        self._pending = collections.deque()
+
+    def submit(self, entry):
+        return self._executor.submit(self._ydl._prefetch_playlist_entry, entry)
+
+    def _fill(self):
+        while len(self._pending) < self._concurrency:
+            try:
+                entry = next(self._entries)
+            except StopIteration:
+                break
+            future = None
+            # The download archive only grows, an entry rejected now will be
+            # rejected when it is processed
+            if self._ydl._match_entry(entry, incomplete=True) is None:
+                future = self.submit(entry)
+            self._pending.append((entry, future))
+
+    def __iter__(self):
+        self._fill()
+        while self._pending:
+            entry, future = self._pending.popleft()
+            self._fill()
+            yield entry, future
+
+    def close(self):
+        for _, future in self._pending:
+            if future is not None:
+                future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+
+
+class _PlaylistSync(object):
+    """
+    Entries of a playlist processed by the previous runs, kept in the cache
+    so that the next runs skip them and stop paging once they reach them.
+
+    Entries are known if their id was seen or if they were uploaded before
+    the newest video of the last complete sync. A few known entries in a
+    row are needed to stop, which tolerates some reordering of the feed.
+
+    Only the runs that download record entries: a dry run still skips the
+    known entries but leaves the state unchanged.
+    """
+
+    _CACHE_SECTION = 'playlist-sync'
+    # Number of consecutive known entries after which the rest of the
+    # playlist is assumed known
+    KNOWN_ENTRIES_TO_STOP = 3
+    # Number of ids kept, the most recent ones
+    MAX_IDS = 1000
+
+    def __init__(self, ydl, ie_result, dry_run=False):
+        self._ydl = ydl
+        self._dry_run = dry_run
+        self._key = re.sub(
+            r'[^a-zA-Z0-9_.-]', '_', '%s_%s' % (ie_result['extractor_key'], ie_result['id']))
+        state = ydl.cache.load(self._CACHE_SECTION, self._key) or {}
+        self._ids = state.get('ids') or []
+        self._known_ids = set(self._ids)
+        self._upload_date = state.get('upload_date')
+        self._seen_ids = []
+        self._newest_upload_date = None
+        self._failed = False
+
+    def _is_known(self, entry):
+        if entry.get('id') in self._known_ids:
+            return True
+        upload_date = entry.get('upload_date')
+        return bool(upload_date and self._upload_date and upload_date < self._upload_date)
+
+    def new_entries(self, entries):
+        """ Yield the entries that are not known, until a run of known ones """
+        known = 0
+        for entry in entries:
+            if not self._is_known(entry):
+                known = 0
+                yield entry
+                continue
+            known += 1
+            if known >= self.KNOWN_ENTRIES_TO_STOP:
+                self._ydl.to_screen(
+                    '[download] Reached the entries of the previous sync, stopping')
+                return
+
+    def record(self, entry, entry_result):
+        """ Record a processed entry, entry_result is None if it failed """
+        if self._dry_run:
+            return
+        if entry_result is None:
+            self._failed = True
+            return
+        entry_id = entry.get('id') or entry_result.get('id')
+        if entry_id is not None:
+            self._seen_ids.append(entry_id)
+        upload_date = entry_result.get('upload_date') or entry.get('upload_date')
+        if upload_date and (self._newest_upload_date is None or upload_date > self._newest_upload_date):
+            self._newest_upload_date = upload_date
+
+    def save(self):
+        if self._dry_run:
+            return
+        ids = orderedSet(self._seen_ids + self._ids)[:self.MAX_IDS]
+        upload_date = self._upload_date
+        # The failed entries must not be skipped by the date on the next run
+        if not self._failed and self._newest_upload_date:
+            upload_date = max(upload_date or '', self._newest_upload_date)
+        self._ydl.cache.store(self._CACHE_SECTION, self._key, {
+            'ids': ids,
+            'upload_date': upload_date,
+        })
+
+
 class YoutubeDL(object):
     """YoutubeDL class.
 
@@ -174,6 +314,25 @@ class YoutubeDL(object):
     playlist_items:    Specific indices of playlist to download.
     playlistreverse:   Download playlist items in reverse order.
     playlistrandom:    Download playlist items in random order.
+    lazy_playlist:     Process the entries of generator based playlists as
+                       they are yielded, n_entries is then unknown. The
+                       processed entries are only kept in the result when
+                       not downloading or with dump_single_json. Ignored
+                       with playlist_items, playlistreverse or playlistrandom.
+    concurrent_playlist_entries: Number of playlist entries extracted in
+                       parallel (default 1, requires concurrent.futures).
+                       Entries are still downloaded one at a time and in
+                       order, and their output is printed in order.
+    concurrent_pages:  Number of pages of a paged playlist (PagedList)
+                       fetched in parallel (default 1, requires
+                       concurrent.futures). For the playlists whose pages
+                       are chained, like YouTube's continuations, number
+                       of pages requested ahead of the entries being
+                       processed, 0 to request them in the calling thread
+                       when their entries are needed.
+    extractor_retries: Number of retries for a page of a playlist listing
+                       failing with a network error (default 3), for the
+                       extractors using InfoExtractor._paginate.
     matchtitle:        Download only matching titles.
     rejecttitle:       Reject downloads for matching titles.
     logger:            Log messages to a logging.Logger instance.
@@ -195,6 +354,15 @@ class YoutubeDL(object):
     skip_download:     Skip the actual download of the video file
     cachedir:          Location of the cache files in the filesystem.
                        False to disable filesystem cache.
+    http_cache:        Store the webpages downloaded by the extractors in the
+                       cache directory and reuse them while they are fresh
+                       or after revalidating them with the server.
+    http_cache_size:   Size in bytes above which the least recently used
+                       webpages are removed from the HTTP cache (default
+                       128 MiB).
+    webpage_memo:      Reuse the response to an identical webpage request
+                       made in the last minute of the run, or wait for it if
+                       it is in flight (default True).
     noplaylist:        Download single video instead of a playlist if in doubt.
     age_limit:         An integer representing the user's age in years.
                        Unsuitable videos for the given age are skipped.
@@ -210,8 +378,22 @@ class YoutubeDL(object):
     download_archive:  File name of a file where all downloads are recorded.
                        Videos already present in the file are not downloaded
                        again.
+    download_archive_format: Format of the download_archive file, "text"
+                       (one ID per line, loaded in memory) or "sqlite"
+                       (indexed database, suited to large archives shared
+                       by several processes). Detected from the file if
+                       not set, new files are created as text.
     break_on_existing: Stop the download process after attempting to download a file that's
                        in the archive.
+    break_on_dateafter: Stop processing a playlist at the first entry uploaded
+                       before the start of daterange, for playlists sorted
+                       by upload date, newest first.
+    playlist_sync:     Remember the downloaded entries of the playlists in the
+                       cache, only process the new entries on the next runs
+                       and stop fetching the playlist once the entries of
+                       the previous run are reached. For playlists sorted
+                       newest first. Runs that do not download (simulate,
+                       skip_download) leave the state unchanged.
     cookiefile:        File name where cookies should be read from and dumped to.
     nocheckcertificate:Do not verify SSL certificates
     prefer_insecure:   Use HTTP instead of HTTPS to retrieve information.
@@ -267,6 +449,14 @@ class YoutubeDL(object):
                        - "detect_or_warn": check whether we can do anything
                                            about it, warn otherwise (default)
     source_address:    Client-side IP address to bind to.
+    keep_alive:        Reuse HTTP connections across requests (default True,
+                       Python 3 only).
+    host_limits:       A dictionary mapping hosts, which also match their
+                       subdomains, or "*" for any other host to tuples
+                       (rate, concurrency): the maximum number of requests per
+                       second and of requests opening at the same time. Either
+                       may be None. The requests to a host answering 429 or
+                       503 are held back regardless.
     call_home:         Boolean, true iff we are allowed to contact the
                        youtube-dlc servers for debugging.
     sleep_interval:    Number of seconds to sleep before each download when
@@ -285,6 +475,10 @@ class YoutubeDL(object):
                        every video.
                        If it returns a message, the video is ignored.
                        If it returns None, the video is downloaded.
+                       If its supports_incomplete attribute is true, it is
+                       also called with incomplete=True for the playlist
+                       entries before they are extracted, missing fields
+                       must then not reject the entry.
                        match_filter_func in utils.py is one example for this.
     no_color:          Do not emit color codes in output.
     geo_bypass:        Bypass geographic restriction via faking X-Forwarded-For
@@ -309,7 +503,8 @@ class YoutubeDL(object):
     nopart, updatetime, buffersize, ratelimit, min_filesize, max_filesize, test,
     noresizebuffer, retries, continuedl, noprogress, consoletitle,
     xattr_set_filesize, external_downloader_args, hls_use_mpegts,
-    http_chunk_size.
+    http_chunk_size, fragment_retries, skip_unavailable_fragments,
+    keep_fragments, concurrent_fragment_downloads.
 
     The following options are used by the post processors:
     prefer_ffmpeg:     If False, use avconv instead of ffmpeg if both are available,
@@ -343,6 +538,7 @@ class YoutubeDL(object):
     _download_retcode = None
     _num_downloads = None
     _screen_file = None
+    _IES_INDEX_THRESHOLD = 200
 
     def __init__(self, params=None, auto_init=True):
         """Create a FileDownloader object with the given options."""
@@ -350,6 +546,11 @@ class YoutubeDL(object):
             params = {}
         self._ies = []
         self._ies_instances = {}
+        self._ies_index = None
+        self._ies_lookups = 0
+        self._ies_lock = threading.Lock()
+        # Output of the threads extracting playlist entries ahead
+        self._thread_output = threading.local()
         self._pps = []
         self._progress_hooks = []
         self._download_retcode = 0
@@ -362,23 +563,14 @@ class YoutubeDL(object):
         }
         self.params.update(params)
         self.cache = Cache(self)
+        self.http_cache = HTTPCache(self)
+        self.response_memo = ResponseMemo(self)
+        # Compiled format selectors by format spec
+        self._format_selectors = {}
+        # Fields referenced by the output templates
+        self._outtmpl_fields_cache = {}
         self.archive = set()
 
-        """Preload the archive, if any is specified"""
-        def preload_download_archive(self):
-            fn = self.params.get('download_archive')
-            if fn is None:
-                return False
-            try:
-                with locked_file(fn, 'r', encoding='utf-8') as archive_file:
-                    for line in archive_file:
-                        self.archive.add(line.strip())
-            except IOError as ioe:
-                if ioe.errno != errno.ENOENT:
-                    raise
-                return False
-            return True
-
         def check_deprecated(param, option, suggestion):
             if self.params.get(param) is not None:
                 self.report_warning(
@@ -389,7 +581,9 @@ class YoutubeDL(object):
         if self.params.get('verbose'):
             self.to_stdout('[debug] Loading archive file %r' % self.params.get('download_archive'))
 
-        preload_download_archive(self)
+        if self.params.get('download_archive') is not None:
+            self.archive = open_download_archive(
+                self.params['download_archive'], self.params.get('download_archive_format'))
 
         if check_deprecated('cn_verification_proxy', '--cn-verification-proxy', '--geo-verification-proxy'):
             if self.params.get('geo_verification_proxy') is None:
@@ -478,6 +672,8 @@ class YoutubeDL(object):
     def add_info_extractor(self, ie):
         """Add an InfoExtractor object to the end of the list."""
         self._ies.append(ie)
+        if self._ies_index is not None:
+            self._ies_index.add(ie)
         if not isinstance(ie, type):
             self._ies_instances[ie.ie_key()] = ie
             ie.set_downloader(self)
@@ -488,12 +684,28 @@ class YoutubeDL(object):
         the _ies list, if there's no instance it will create a new one and add
         it to the extractor list.
         """
-        ie = self._ies_instances.get(ie_key)
-        if ie is None:
-            ie = get_info_extractor(ie_key)()
-            self.add_info_extractor(ie)
+        with self._ies_lock:
+            ie = self._ies_instances.get(ie_key)
+            if ie is None:
+                ie = get_info_extractor(ie_key)()
+                self.add_info_extractor(ie)
         return ie
 
+    def _suitable_ie_candidates(self, url):
+        """
+        Return the extractors that may be suitable for url, in the order of
+        the _ies list
+        """
+        with self._ies_lock:
+            if self._ies_index is None:
+                # Building the index costs about as much as a thousand linear
+                # scans, it only pays off when processing many URLs
+                self._ies_lookups += 1
+                if self._ies_lookups <= self._IES_INDEX_THRESHOLD:
+                    return self._ies
+                self._ies_index = ExtractorDispatchIndex(self._ies)
+            return self._ies_index.candidates(url)
+
     def add_default_info_extractors(self):
         """
         Add the InfoExtractors returned by gen_extractors to the end of the list
@@ -530,8 +742,21 @@ class YoutubeDL(object):
     def _write_string(self, s, out=None):
         write_string(s, out=out, encoding=self.params.get('encoding'))
 
+    def _buffer_output(self, func, *args):
+        """
+        Keep the output of a thread extracting playlist entries ahead, it
+        is printed once the main thread reaches its entry.
+        """
+        buffer = getattr(self._thread_output, 'buffer', None)
+        if buffer is None:
+            return False
+        buffer.append((func, args))
+        return True
+
     def to_stdout(self, message, skip_eol=False, check_quiet=False):
         """Print message to stdout if not in quiet mode."""
+        if self._buffer_output(self.to_stdout, message, skip_eol, check_quiet):
+            return
         if self.params.get('logger'):
             self.params['logger'].debug(message)
         elif not check_quiet or not self.params.get('quiet', False):
@@ -544,6 +769,8 @@ class YoutubeDL(object):
     def to_stderr(self, message):
         """Print message to stderr."""
         assert isinstance(message, compat_str)
+        if self._buffer_output(self.to_stderr, message):
+            return
         if self.params.get('logger'):
             self.params['logger'].error(message)
         else:
@@ -590,6 +817,32 @@ class YoutubeDL(object):
         if self.params.get('cookiefile') is not None:
             self.cookiejar.save(ignore_discard=True, ignore_expires=True)
 
+        if self.params.get('download_archive') is not None:
+            self.archive.close()
+
+        if self.params.get('verbose'):
+            if any(self.cache.stats.values()):
+                self.to_stdout(
+                    '[debug] Cache: %(memory_hits)d memory hits, %(disk_hits)d disk hits, '
+                    '%(misses)d misses, %(expired)d expired, %(stores)d stores, '
+                    '%(evictions)d evictions' % self.cache.stats)
+            if any(self.http_cache.stats.values()):
+                self.to_stdout(
+                    '[debug] HTTP cache: %(fresh_hits)d fresh hits, %(revalidated)d revalidated, '
+                    '%(misses)d misses, %(stores)d stores' % self.http_cache.stats)
+            memo_stats = self.response_memo.stats
+            if memo_stats['hits'] or memo_stats['coalesced']:
+                self.to_stdout(
+                    '[debug] Webpage requests: %d saved (%d memoized, %d coalesced), %d sent' % (
+                        memo_stats['hits'] + memo_stats['coalesced'], memo_stats['hits'],
+                        memo_stats['coalesced'], memo_stats['misses']))
+
+        if self._connection_pool is not None:
+            if self.params.get('verbose'):
+                self.to_stdout('[debug] HTTP connections: %d opened, %d reused' % (
+                    self._connection_pool.opened, self._connection_pool.reused))
+            self._connection_pool.close()
+
     def trouble(self, message=None, tb=None):
         """Determine action to take when a download problem appears.
 
@@ -656,23 +909,38 @@ class YoutubeDL(object):
         except UnicodeEncodeError:
             self.to_screen('[download] The file has already been downloaded')
 
+    def _outtmpl_fields(self, outtmpl):
+        """ Return the names of the fields referenced by an output template """
+        fields = self._outtmpl_fields_cache.get(outtmpl)
+        if fields is None:
+            # Literal '%%(...)' sequences are matched as well, the field is
+            # then needlessly formatted
+            fields = self._outtmpl_fields_cache[outtmpl] = frozenset(
+                re.findall(r'%\(([^)]*)\)', outtmpl))
+        return fields
+
     def prepare_filename(self, info_dict):
         """Generate the output filename."""
         try:
-            template_dict = dict(info_dict)
+            outtmpl = self.params.get('outtmpl', DEFAULT_OUTTMPL)
+            # Only the fields used by the template are sanitized
+            fields = self._outtmpl_fields(outtmpl)
+            template_dict = dict(
+                (k, info_dict[k]) for k in fields.union(['n_entries']) if k in info_dict)
 
             template_dict['epoch'] = int(time.time())
             autonumber_size = self.params.get('autonumber_size')
             if autonumber_size is None:
                 autonumber_size = 5
             template_dict['autonumber'] = self.params.get('autonumber_start', 1) - 1 + self._num_downloads
-            if template_dict.get('resolution') is None:
-                if template_dict.get('width') and template_dict.get('height'):
-                    template_dict['resolution'] = '%dx%d' % (template_dict['width'], template_dict['height'])
-                elif template_dict.get('height'):
-                    template_dict['resolution'] = '%sp' % template_dict['height']
-                elif template_dict.get('width'):
-                    template_dict['resolution'] = '%dx?' % template_dict['width']
+            if 'resolution' in fields and template_dict.get('resolution') is None:
+                width, height = info_dict.get('width'), info_dict.get('height')
+                if width and height:
+                    template_dict['resolution'] = '%dx%d' % (width, height)
+                elif height:
+                    template_dict['resolution'] = '%sp' % height
+                elif width:
+                    template_dict['resolution'] = '%dx?' % width
 
             sanitize = lambda k, v: sanitize_filename(
                 compat_str(v),
@@ -683,27 +951,26 @@ class YoutubeDL(object):
                                  if v is not None and not isinstance(v, (list, tuple, dict)))
             template_dict = collections.defaultdict(lambda: 'NA', template_dict)
 
-            outtmpl = self.params.get('outtmpl', DEFAULT_OUTTMPL)
-
             # For fields playlist_index and autonumber convert all occurrences
             # of %(field)s to %(field)0Nd for backward compatibility
-            field_size_compat_map = {
-                'playlist_index': len(str(template_dict['n_entries'])),
-                'autonumber': autonumber_size,
-            }
-            FIELD_SIZE_COMPAT_RE = r'(?<!%)%\((?P<field>autonumber|playlist_index)\)s'
-            mobj = re.search(FIELD_SIZE_COMPAT_RE, outtmpl)
-            if mobj:
-                outtmpl = re.sub(
-                    FIELD_SIZE_COMPAT_RE,
-                    r'%%(\1)0%dd' % field_size_compat_map[mobj.group('field')],
-                    outtmpl)
+            if 'playlist_index' in fields or 'autonumber' in fields:
+                field_size_compat_map = {
+                    'playlist_index': len(str(template_dict['n_entries'])),
+                    'autonumber': autonumber_size,
+                }
+                FIELD_SIZE_COMPAT_RE = r'(?<!%)%\((?P<field>autonumber|playlist_index)\)s'
+                mobj = re.search(FIELD_SIZE_COMPAT_RE, outtmpl)
+                if mobj:
+                    outtmpl = re.sub(
+                        FIELD_SIZE_COMPAT_RE,
+                        r'%%(\1)0%dd' % field_size_compat_map[mobj.group('field')],
+                        outtmpl)
 
             # Missing numeric fields used together with integer presentation types
             # in format specification will break the argument substitution since
             # string 'NA' is returned for missing fields. We will patch output
             # template for missing fields to meet string presentation type.
-            for numeric_field in self._NUMERIC_FIELDS:
+            for numeric_field in self._NUMERIC_FIELDS.intersection(fields):
                 if numeric_field not in template_dict:
                     # As of [1] format syntax is:
                     #  %[mapping_key][conversion_flags][minimum_width][.precision][length_modifier]type
@@ -788,15 +1055,29 @@ class YoutubeDL(object):
         if self.in_download_archive(info_dict):
             return '%s has already been recorded in archive' % video_title
 
-        if not incomplete:
-            match_filter = self.params.get('match_filter')
-            if match_filter is not None:
+        match_filter = self.params.get('match_filter')
+        if match_filter is not None:
+            # Playlist entries are only checked by the filters that can
+            # handle missing fields
+            if not incomplete:
                 ret = match_filter(info_dict)
-                if ret is not None:
-                    return ret
+            elif getattr(match_filter, 'supports_incomplete', False):
+                ret = match_filter(info_dict, incomplete=True)
+            else:
+                ret = None
+            if ret is not None:
+                return ret
 
         return None
 
+    def _uploaded_before_daterange(self, info_dict):
+        """ Whether info_dict was uploaded before the start of the date range """
+        date = info_dict.get('upload_date')
+        daterange = self.params.get('daterange')
+        if date is None or daterange is None:
+            return False
+        return date_from_str(date) < daterange.start
+
     @staticmethod
     def add_extra_info(info_dict, extra_info):
         '''Set the keys from extra_info in info dict if they are missing'''
@@ -817,7 +1098,7 @@ class YoutubeDL(object):
         if ie_key:
             ies = [self.get_info_extractor(ie_key)]
         else:
-            ies = self._ies
+            ies = self._suitable_ie_candidates(url)
 
         for ie in ies:
             if not ie.suitable(url):
@@ -937,25 +1218,9 @@ class YoutubeDL(object):
             if not info:
                 return info
 
-            force_properties = dict(
-                (k, v) for k, v in ie_result.items() if v is not None)
-            for f in ('_type', 'url', 'id', 'extractor', 'extractor_key', 'ie_key'):
-                if f in force_properties:
-                    del force_properties[f]
-            new_result = info.copy()
-            new_result.update(force_properties)
-
-            # Extracted info may not be a video result (i.e.
-            # info.get('_type', 'video') != video) but rather an url or
-            # url_transparent. In such cases outer metadata (from ie_result)
-            # should be propagated to inner one (info). For this to happen
-            # _type of info should be overridden with url_transparent. This
-            # fixes issue from https://github.com/ytdl-org/youtube-dl/pull/11163.
-            if new_result.get('_type') == 'url':
-                new_result['_type'] = 'url_transparent'
-
             return self.process_ie_result(
-                new_result, download=download, extra_info=extra_info)
+                self._merge_url_transparent(ie_result, info),
+                download=download, extra_info=extra_info)
         elif result_type in ('playlist', 'multi_video'):
             # We process each entry in the playlist
             playlist = ie_result.get('title') or ie_result.get('id')
@@ -984,12 +1249,32 @@ class YoutubeDL(object):
 
             ie_entries = ie_result['entries']
 
+            # Ordering options need all the entries beforehand
+            lazy_playlist = (
+                self.params.get('lazy_playlist') and not playlistitems
+                and not self.params.get('playlistreverse')
+                and not self.params.get('playlistrandom'))
+
             def make_playlistitems_entries(list_ie_entries):
                 num_entries = len(list_ie_entries)
                 return [
                     list_ie_entries[i - 1] for i in playlistitems
                     if -num_entries <= i - 1 < num_entries]
 
+            sync = None
+            if self.params.get('playlist_sync') and not playlistitems:
+                if ie_result.get('id') is None:
+                    self.report_warning('Playlist %s has no id, it can not be synced' % playlist)
+                elif not self.cache.enabled:
+                    self.report_warning('Playlists can not be synced without a cache directory')
+                else:
+                    sync = _PlaylistSync(self, ie_result, dry_run=(
+                        not download or self.params.get('simulate')
+                        or self.params.get('skip_download')))
+
+            def new_entries(entries):
+                return sync.new_entries(entries) if sync else entries
+
             def report_download(num_entries):
                 self.to_screen(
                     '[%s] playlist %s: Downloading %d videos' %
@@ -1000,12 +1285,14 @@ class YoutubeDL(object):
                 if playlistitems:
                     entries = make_playlistitems_entries(ie_entries)
                 else:
-                    entries = ie_entries[playliststart:playlistend]
+                    entries = list(new_entries(ie_entries[playliststart:playlistend]))
                 n_entries = len(entries)
                 self.to_screen(
                     '[%s] playlist %s: Collected %d video ids (downloading %d of them)' %
                     (ie_result['extractor'], playlist, n_all_entries, n_entries))
             elif isinstance(ie_entries, PagedList):
+                if self.params.get('concurrent_pages'):
+                    ie_entries.concurrency = self.params['concurrent_pages']
                 if playlistitems:
                     entries = []
                     for item in playlistitems:
@@ -1013,17 +1300,28 @@ class YoutubeDL(object):
                             item - 1, item
                         ))
                 else:
-                    entries = ie_entries.getslice(
-                        playliststart, playlistend)
+                    entries = list(new_entries(ie_entries.getslice(
+                        playliststart, playlistend)))
                 n_entries = len(entries)
                 report_download(n_entries)
+            elif lazy_playlist:
+                # Entries are processed as they are yielded
+                entries = new_entries(itertools.islice(ie_entries, playliststart, playlistend))
+                n_entries = None
+                self.to_screen(
+                    '[%s] playlist %s: Downloading videos as they are extracted' %
+                    (ie_result['extractor'], playlist))
             else:  # iterable
                 if playlistitems:
                     entries = make_playlistitems_entries(list(itertools.islice(
                         ie_entries, 0, max(playlistitems))))
                 else:
-                    entries = list(itertools.islice(
-                        ie_entries, playliststart, playlistend))
+                    entries = new_entries(itertools.islice(ie_entries, playliststart, playlistend))
+                    if self.params.get('break_on_dateafter'):
+                        # Stop fetching the pages of a date sorted feed
+                        entries = itertools.takewhile(
+                            lambda e: not self._uploaded_before_daterange(e), entries)
+                    entries = list(entries)
                 n_entries = len(entries)
                 report_download(n_entries)
 
@@ -1034,39 +1332,38 @@ class YoutubeDL(object):
                 random.shuffle(entries)
 
             x_forwarded_for = ie_result.get('__x_forwarded_for_ip')
+            if x_forwarded_for:
+                def add_x_forwarded_for(entries):
+                    # This __x_forwarded_for_ip thing is a bit ugly but requires
+                    # minimal changes
+                    for entry in entries:
+                        entry['__x_forwarded_for_ip'] = x_forwarded_for
+                        yield entry
+                entries = add_x_forwarded_for(entries)
+
+            prefetcher = None
+            concurrency = self.params.get('concurrent_playlist_entries') or 1
+            if concurrency > 1 and not self.params.get('extract_flat'):
+                if can_threaded_extraction:
+                    prefetcher = _PlaylistEntryPrefetcher(self, entries, concurrency)
+                else:
+                    self.report_warning('Cannot extract playlist entries in parallel, concurrent.futures is not available')
 
-            for i, entry in enumerate(entries, 1):
-                self.to_screen('[download] Downloading video %s of %s' % (i, n_entries))
-                # This __x_forwarded_for_ip thing is a bit ugly but requires
-                # minimal changes
-                if x_forwarded_for:
-                    entry['__x_forwarded_for_ip'] = x_forwarded_for
-                extra = {
-                    'n_entries': n_entries,
-                    'playlist': playlist,
-                    'playlist_id': ie_result.get('id'),
-                    'playlist_title': ie_result.get('title'),
-                    'playlist_uploader': ie_result.get('uploader'),
-                    'playlist_uploader_id': ie_result.get('uploader_id'),
-                    'playlist_index': playlistitems[i - 1] if playlistitems else i + playliststart,
-                    'extractor': ie_result['extractor'],
-                    'webpage_url': ie_result['webpage_url'],
-                    'webpage_url_basename': url_basename(ie_result['webpage_url']),
-                    'extractor_key': ie_result['extractor_key'],
-                }
-
-                reason = self._match_entry(entry, incomplete=True)
-                if reason is not None:
-                    if reason.endswith('has already been recorded in the archive') and self.params.get('break_on_existing'):
-                        print('[download] tried downloading a file that\'s already in the archive, stopping since --break-on-existing is set.')
-                        break
-                    else:
-                        self.to_screen('[download] ' + reason)
-                        continue
-
-                entry_result = self.__process_iterable_entry(entry, download, extra)
-                # TODO: skip failed (empty) entries?
-                playlist_results.append(entry_result)
+            # Streamed playlists do not keep the processed entries in memory
+            # unless they are returned or dumped
+            keep_results = (
+                not lazy_playlist or not download
+                or self.params.get('dump_single_json'))
+            try:
+                playlist_results = self.__process_playlist_entries(
+                    ie_result, prefetcher or ((entry, None) for entry in entries),
+                    prefetcher, download, playlist, playlistitems, playliststart,
+                    n_entries, keep_results, sync)
+            finally:
+                if prefetcher is not None:
+                    prefetcher.close()
+            if sync is not None:
+                sync.save()
             ie_result['entries'] = playlist_results
             self.to_screen('[download] Finished downloading playlist: %s' % playlist)
             return ie_result
@@ -1094,11 +1391,127 @@ class YoutubeDL(object):
         else:
             raise Exception('Invalid result type: %s' % result_type)
 
+    def __process_playlist_entries(self, ie_result, entries, prefetcher, download, playlist,
+                                   playlistitems, playliststart, n_entries, keep_results, sync):
+        playlist_results = []
+        for i, (entry, future) in enumerate(entries, 1):
+            if n_entries is None:
+                self.to_screen('[download] Downloading video %s' % i)
+            else:
+                self.to_screen('[download] Downloading video %s of %s' % (i, n_entries))
+            extra = {
+                'n_entries': n_entries,
+                'playlist': playlist,
+                'playlist_id': ie_result.get('id'),
+                'playlist_title': ie_result.get('title'),
+                'playlist_uploader': ie_result.get('uploader'),
+                'playlist_uploader_id': ie_result.get('uploader_id'),
+                'playlist_index': playlistitems[i - 1] if playlistitems else i + playliststart,
+                'extractor': ie_result['extractor'],
+                'webpage_url': ie_result['webpage_url'],
+                'webpage_url_basename': url_basename(ie_result['webpage_url']),
+                'extractor_key': ie_result['extractor_key'],
+            }
+
+            if self.params.get('break_on_dateafter') and self._uploaded_before_daterange(entry):
+                self.to_screen('[download] %s was uploaded before the date range, stopping since --break-on-dateafter is set' % entry.get('id', 'video'))
+                break
+
+            reason = self._match_entry(entry, incomplete=True)
+            if reason is not None:
+                if reason.endswith('has already been recorded in the archive') and self.params.get('break_on_existing'):
+                    print('[download] tried downloading a file that\'s already in the archive, stopping since --break-on-existing is set.')
+                    break
+                else:
+                    self.to_screen('[download] ' + reason)
+                    # Entries rejected by a filter may be wanted by a later
+                    # run, only the archived ones were processed before
+                    if sync is not None and reason.endswith('has already been recorded in archive'):
+                        sync.record(entry, entry)
+                    continue
+
+            if prefetcher is not None:
+                entry_result = self.__process_prefetched_entry(
+                    future or prefetcher.submit(entry), download, extra)
+            else:
+                entry_result = self.__process_iterable_entry(entry, download, extra)
+            # TODO: skip failed (empty) entries?
+            if keep_results:
+                playlist_results.append(entry_result)
+            if sync is not None:
+                sync.record(entry, entry_result)
+            # The flat entry may have had no date
+            if (self.params.get('break_on_dateafter') and entry_result
+                    and self._uploaded_before_daterange(entry_result)):
+                self.to_screen('[download] %s was uploaded before the date range, stopping since --break-on-dateafter is set' % entry_result.get('id', 'video'))
+                break
+        return playlist_results
+
+    @staticmethod
+    def _merge_url_transparent(ie_result, info):
+        force_properties = dict(
+            (k, v) for k, v in ie_result.items() if v is not None)
+        for f in ('_type', 'url', 'id', 'extractor', 'extractor_key', 'ie_key'):
+            if f in force_properties:
+                del force_properties[f]
+        new_result = info.copy()
+        new_result.update(force_properties)
+
+        # Extracted info may not be a video result (i.e.
+        # info.get('_type', 'video') != video) but rather an url or
+        # url_transparent. In such cases outer metadata (from ie_result)
+        # should be propagated to inner one (info). For this to happen
+        # _type of info should be overridden with url_transparent. This
+        # fixes issue from https://github.com/ytdl-org/youtube-dl/pull/11163.
+        if new_result.get('_type') == 'url':
+            new_result['_type'] = 'url_transparent'
+        return new_result
+
     @__handle_extraction_exceptions
     def __process_iterable_entry(self, entry, download, extra_info):
         return self.process_ie_result(
             entry, download=download, extra_info=extra_info)
 
+    def _extract_playlist_entry(self, entry):
+        """
+        Run the extraction part of process_ie_result for a playlist entry,
+        return an entry that process_ie_result can handle without extracting
+        it again (or None if the extraction failed)
+        """
+        result_type = entry.get('_type', 'video')
+        if result_type not in ('url', 'url_transparent'):
+            return entry
+        entry['url'] = sanitize_url(entry['url'])
+        info = self.extract_info(
+            entry['url'], download=False, info_dict=entry if result_type == 'url' else None,
+            ie_key=entry.get('ie_key'), process=False)
+        if not info or result_type == 'url':
+            return info
+        return self._merge_url_transparent(entry, info)
+
+    def _prefetch_playlist_entry(self, entry):
+        # Runs in a worker thread, the output and the exception (if any)
+        # are handed over to the main thread
+        buffer = self._thread_output.buffer = []
+        try:
+            return buffer, self._extract_playlist_entry(entry), None
+        except Exception as e:
+            return buffer, None, e
+        finally:
+            self._thread_output.buffer = None
+
+    @__handle_extraction_exceptions
+    def __process_prefetched_entry(self, future, download, extra_info):
+        output, entry, exception = future.result()
+        for func, args in output:
+            func(*args)
+        if exception is not None:
+            raise exception
+        if entry is None:
+            return None
+        return self.process_ie_result(
+            entry, download=download, extra_info=extra_info)
+
     def _build_format_filter(self, filter_spec):
         " Returns a function to filter the formats according to the filter_spec "
 
@@ -1423,14 +1836,15 @@ class YoutubeDL(object):
                 selector_1, selector_2 = map(_build_selector_function, selector.selector)
 
                 def selector_function(ctx):
-                    for pair in itertools.product(
-                            selector_1(copy.deepcopy(ctx)), selector_2(copy.deepcopy(ctx))):
+                    for pair in itertools.product(selector_1(ctx), selector_2(ctx)):
                         yield _merge(pair)
 
             filters = [self._build_format_filter(f) for f in selector.filters]
 
             def final_selector(ctx):
-                ctx_copy = copy.deepcopy(ctx)
+                # The selectors never modify the format dicts, only the
+                # formats list of the context is replaced
+                ctx_copy = dict(ctx)
                 for _filter in filters:
                     ctx_copy['formats'] = list(filter(_filter, ctx_copy['formats']))
                 return selector_function(ctx_copy)
@@ -1463,7 +1877,21 @@ class YoutubeDL(object):
                 self.counter -= 1
 
         parsed_selector = _parse_format_selection(iter(TokenIterator(tokens)))
-        return _build_selector_function(parsed_selector)
+        compiled_selector = _build_selector_function(parsed_selector)
+
+        def format_selector(ctx):
+            # Only the picked formats are copied, not every format at every
+            # step of the selection
+            for format in compiled_selector(ctx):
+                yield copy.deepcopy(format)
+        return format_selector
+
+    def _get_format_selector(self, format_spec):
+        """ Return the selector for format_spec, it is compiled only once """
+        format_selector = self._format_selectors.get(format_spec)
+        if format_selector is None:
+            format_selector = self._format_selectors[format_spec] = self.build_format_selector(format_spec)
+        return format_selector
 
     def _calc_headers(self, info_dict):
         res = std_headers.copy()
@@ -1681,7 +2109,7 @@ class YoutubeDL(object):
             if self.params.get('verbose'):
                 self.to_stdout('[debug] Default format spec: %s' % req_format)
 
-        format_selector = self.build_format_selector(req_format)
+        format_selector = self._get_format_selector(req_format)
 
         # While in format selection we may need to have an access to the original
         # format set in order to calculate some metrics or do some processing.
@@ -2197,7 +2625,7 @@ class YoutubeDL(object):
             if not url:
                 return
             # Try to find matching extractor for the URL and take its ie_key
-            for ie in self._ies:
+            for ie in self._suitable_ie_candidates(url):
                 if ie.suitable(url):
                     extractor = ie.ie_key()
                     break
@@ -2222,8 +2650,6 @@ class YoutubeDL(object):
             return
         vid_id = self._make_archive_id(info_dict)
         assert vid_id
-        with locked_file(fn, 'a', encoding='utf-8') as archive_file:
-            archive_file.write(vid_id + '\n')
         self.archive.add(vid_id)
 
     @staticmethod
@@ -2340,7 +2766,24 @@ class YoutubeDL(object):
         """ Start an HTTP download """
         if isinstance(req, compat_basestring):
             req = sanitized_Request(req)
-        return self._opener.open(req, timeout=self._socket_timeout)
+        host = compat_urllib_parse_urlparse(req.get_full_url()).hostname
+        status = retry_after = None
+        failed = False
+        self._request_scheduler.acquire(host)
+        try:
+            return self._opener.open(req, timeout=self._socket_timeout)
+        except compat_urllib_error.HTTPError as err:
+            status, retry_after = err.code, err.headers.get('Retry-After')
+            raise
+        except Exception:
+            # Connection errors and timeouts say nothing about the load
+            failed = True
+            raise
+        finally:
+            delay = self._request_scheduler.release(host, status, retry_after, failed)
+            if delay is not None and self.params.get('verbose'):
+                self.to_stdout('[debug] %s answered %d, holding back its requests for %d seconds' % (
+                    host, status, delay))
 
     def print_debug_header(self):
         if not self.params.get('verbose'):
@@ -2421,6 +2864,7 @@ class YoutubeDL(object):
     def _setup_opener(self):
         timeout_val = self.params.get('socket_timeout')
         self._socket_timeout = 600 if timeout_val is None else float(timeout_val)
+        self._request_scheduler = RequestScheduler(self.params.get('host_limits') or {})
 
         opts_cookiefile = self.params.get('cookiefile')
         opts_proxy = self.params.get('proxy')
@@ -2446,9 +2890,18 @@ class YoutubeDL(object):
                 proxies['https'] = proxies['http']
         proxy_handler = PerRequestProxyHandler(proxies)
 
+        # Persistent connections rely on Python 3 http.client internals
+        self._connection_pool = None
+        if self.params.get('keep_alive', True) and sys.version_info >= (3, 0):
+            self._connection_pool = HTTPConnectionPool()
+
         debuglevel = 1 if self.params.get('debug_printtraffic') else 0
-        https_handler = make_HTTPS_handler(self.params, debuglevel=debuglevel)
-        ydlh = YoutubeDLHandler(self.params, debuglevel=debuglevel)
+        https_handler = make_HTTPS_handler(
+            self.params, debuglevel=debuglevel,
+            connection_pool=self._connection_pool)
+        ydlh = YoutubeDLHandler(
+            self.params, debuglevel=debuglevel,
+            connection_pool=self._connection_pool)
         redirect_handler = YoutubeDLRedirectHandler()
         data_handler = compat_urllib_request_DataHandler()
 
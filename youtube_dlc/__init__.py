@@ -9,6 +9,7 @@ import codecs
 import io
 import os
 import random
+import re
 import sys
 
 
@@ -25,7 +26,10 @@ from .utils import (
     decodeOption,
     DEFAULT_OUTTMPL,
     DownloadError,
+    error_to_compat_str,
     expand_path,
+    float_or_none,
+    int_or_none,
     match_filter_func,
     MaxDownloadsReached,
     preferredencoding,
@@ -36,6 +40,11 @@ from .utils import (
     write_string,
     render_table,
 )
+from .archive import ARCHIVE_FORMATS
+from .server import (
+    parse_server_address,
+    serve,
+)
 from .update import update_binary
 from .downloader import (
     FileDownloader,
@@ -160,6 +169,20 @@ def _real_main(argv=None):
         if numeric_limit is None:
             parser.error('invalid max_filesize specified')
         opts.max_filesize = numeric_limit
+    host_limits = {}
+    for host_limit in opts.host_limits or []:
+        mobj = re.match(r'^([^:]+):(\d+(?:\.\d*)?)?(?::(\d+))?$', host_limit)
+        if not mobj or not (mobj.group(2) or mobj.group(3)):
+            parser.error('wrong host limit formatting, it should be HOST:RATE[:N], not "%s"' % host_limit)
+        rate, concurrency = float_or_none(mobj.group(2)), int_or_none(mobj.group(3))
+        if rate == 0 or concurrency == 0:
+            parser.error('host limits must be positive')
+        host_limits[mobj.group(1).lower()] = (rate, concurrency)
+    if opts.http_cache_size is not None:
+        numeric_limit = FileDownloader.parse_bytes(opts.http_cache_size)
+        if numeric_limit is None:
+            parser.error('invalid http cache size specified')
+        opts.http_cache_size = numeric_limit
     if opts.sleep_interval is not None:
         if opts.sleep_interval < 0:
             parser.error('sleep interval must be positive or 0')
@@ -188,6 +211,34 @@ def _real_main(argv=None):
         opts.retries = parse_retries(opts.retries)
     if opts.fragment_retries is not None:
         opts.fragment_retries = parse_retries(opts.fragment_retries)
+    if opts.extractor_retries is not None:
+        opts.extractor_retries = parse_retries(opts.extractor_retries)
+    if opts.concurrent_fragment_downloads is not None and opts.concurrent_fragment_downloads < 1:
+        parser.error('concurrent fragments count must be positive')
+    if opts.concurrent_playlist_entries is not None and opts.concurrent_playlist_entries < 1:
+        parser.error('concurrent playlist entries count must be positive')
+    if opts.concurrent_pages is not None and opts.concurrent_pages < 0:
+        parser.error('concurrent pages count must not be negative')
+    if opts.lazy_playlist and (opts.playlist_items or opts.playlist_reverse or opts.playlist_random):
+        parser.error('--lazy-playlist cannot be used with --playlist-items, --playlist-reverse or --playlist-random')
+    if opts.break_on_dateafter and opts.dateafter is None and opts.date is None:
+        parser.error('--break-on-dateafter requires --dateafter or --date')
+    if opts.download_archive_format is not None and opts.download_archive_format not in ARCHIVE_FORMATS:
+        parser.error('invalid download archive format %r, must be one of %s' % (
+            opts.download_archive_format, ', '.join(ARCHIVE_FORMATS)))
+    if (opts.import_archive is not None or opts.export_archive is not None) and opts.download_archive is None:
+        parser.error('--import-archive and --export-archive require --download-archive')
+    if opts.import_archive is not None and not os.path.isfile(expand_path(opts.import_archive)):
+        parser.error('archive file %s does not exist' % opts.import_archive)
+    if opts.playlist_sync and opts.playlist_items:
+        parser.error('--playlist-sync cannot be used with --playlist-items')
+    if opts.server is not None:
+        try:
+            parse_server_address(opts.server)
+        except ValueError as err:
+            parser.error(error_to_compat_str(err))
+        if opts.server_workers < 1:
+            parser.error('server workers count must be positive')
     if opts.buffersize is not None:
         numeric_buffersize = FileDownloader.parse_bytes(opts.buffersize)
         if numeric_buffersize is None:
@@ -358,8 +409,12 @@ def _real_main(argv=None):
         'nooverwrites': opts.nooverwrites,
         'retries': opts.retries,
         'fragment_retries': opts.fragment_retries,
+        'extractor_retries': opts.extractor_retries,
         'skip_unavailable_fragments': opts.skip_unavailable_fragments,
         'keep_fragments': opts.keep_fragments,
+        'concurrent_fragment_downloads': opts.concurrent_fragment_downloads,
+        'concurrent_playlist_entries': opts.concurrent_playlist_entries,
+        'concurrent_pages': opts.concurrent_pages,
         'buffersize': opts.buffersize,
         'noresizebuffer': opts.noresizebuffer,
         'http_chunk_size': opts.http_chunk_size,
@@ -370,6 +425,8 @@ def _real_main(argv=None):
         'playlistend': opts.playlistend,
         'playlistreverse': opts.playlist_reverse,
         'playlistrandom': opts.playlist_random,
+        'lazy_playlist': opts.lazy_playlist,
+        'playlist_sync': opts.playlist_sync,
         'noplaylist': opts.noplaylist,
         'logtostderr': opts.outtmpl == '-',
         'consoletitle': opts.consoletitle,
@@ -402,10 +459,15 @@ def _real_main(argv=None):
         'max_views': opts.max_views,
         'daterange': date,
         'cachedir': opts.cachedir,
+        'http_cache': opts.http_cache,
+        'http_cache_size': opts.http_cache_size,
+        'webpage_memo': opts.webpage_memo,
         'youtube_print_sig_code': opts.youtube_print_sig_code,
         'age_limit': opts.age_limit,
         'download_archive': download_archive_fn,
+        'download_archive_format': opts.download_archive_format,
         'break_on_existing': opts.break_on_existing,
+        'break_on_dateafter': opts.break_on_dateafter,
         'cookiefile': opts.cookiefile,
         'nocheckcertificate': opts.no_check_certificate,
         'prefer_insecure': opts.prefer_insecure,
@@ -426,10 +488,12 @@ def _real_main(argv=None):
         'postprocessors': postprocessors,
         'fixup': opts.fixup,
         'source_address': opts.source_address,
+        'keep_alive': opts.keep_alive,
         'call_home': opts.call_home,
         'sleep_interval': opts.sleep_interval,
         'max_sleep_interval': opts.max_sleep_interval,
         'sleep_interval_subtitles': opts.sleep_interval_subtitles,
+        'host_limits': host_limits,
         'external_downloader': opts.external_downloader,
         'list_thumbnails': opts.list_thumbnails,
         'playlist_items': opts.playlist_items,
@@ -462,9 +526,22 @@ def _real_main(argv=None):
         if opts.rm_cachedir:
             ydl.cache.remove()
 
+        if opts.import_archive is not None:
+            ydl.to_screen('[download] Importing %s into the download archive' % opts.import_archive)
+            ydl.archive.import_text(expand_path(opts.import_archive))
+
+        if opts.export_archive is not None:
+            ydl.to_screen('[download] Exporting the download archive to %s' % opts.export_archive)
+            ydl.archive.export_text(expand_path(opts.export_archive))
+
+        if opts.server is not None:
+            serve(ydl, ydl_opts, opts.server, opts.server_workers)
+            sys.exit()
+
         # Maybe do nothing
         if (len(all_urls) < 1) and (opts.load_info_filename is None):
-            if opts.update_self or opts.rm_cachedir:
+            if (opts.update_self or opts.rm_cachedir
+                    or opts.import_archive is not None or opts.export_archive is not None):
                 sys.exit()
 
             ydl.warn_if_short_id(sys.argv[1:] if argv is None else argv)
@@ -0,0 +1,190 @@
+from __future__ import unicode_literals
+
+import errno
+import threading
+
+from .compat import compat_str
+from .utils import (
+    encodeFilename,
+    locked_file,
+    YoutubeDLError,
+)
+
+try:
+    import sqlite3
+except ImportError:  # Python built without sqlite3
+    sqlite3 = None
+
+
+ARCHIVE_FORMATS = ('text', 'sqlite')
+
+_SQLITE_MAGIC = b'SQLite format 3\x00'
+
+
+def detect_archive_format(fn):
+    """ Return the format of an existing archive file, 'text' otherwise """
+    try:
+        with open(encodeFilename(fn), 'rb') as f:
+            if f.read(len(_SQLITE_MAGIC)) == _SQLITE_MAGIC:
+                return 'sqlite'
+    except IOError as ioe:
+        if ioe.errno != errno.ENOENT:
+            raise
+    return 'text'
+
+
+def open_download_archive(fn, archive_format=None):
+    """ Open a download archive, its format is detected if not given """
+    if archive_format is None:
+        archive_format = detect_archive_format(fn)
+    if archive_format == 'sqlite':
+        return SQLiteDownloadArchive(fn)
+    elif archive_format == 'text':
+        return TextDownloadArchive(fn)
+    raise ValueError('unknown download archive format %r' % archive_format)
+
+
+def read_text_archive(fn):
+    """ Yield the IDs listed in a text archive file """
+    with locked_file(fn, 'r', encoding='utf-8') as archive_file:
+        for line in archive_file:
+            line = line.strip()
+            if line:
+                yield line
+
+
+class DownloadArchive(object):
+    """
+    Set of the IDs of the downloaded videos, backed by a file.
+
+    Subclasses implement __contains__, __iter__ and update. Entries are
+    never removed, other processes may add entries at any time.
+    """
+
+    def __init__(self, fn):
+        self.filename = fn
+
+    def __contains__(self, archive_id):
+        raise NotImplementedError('This method must be implemented by subclasses')
+
+    def __iter__(self):
+        raise NotImplementedError('This method must be implemented by subclasses')
+
+    def update(self, archive_ids):
+        raise NotImplementedError('This method must be implemented by subclasses')
+
+    def add(self, archive_id):
+        self.update([archive_id])
+
+    def import_text(self, fn):
+        """ Add the IDs listed in a text archive file """
+        self.update(read_text_archive(fn))
+
+    def export_text(self, fn):
+        """ Write all the IDs to a text archive file """
+        with locked_file(fn, 'w', encoding='utf-8') as archive_file:
+            for archive_id in self:
+                archive_file.write(archive_id + '\n')
+
+    def close(self):
+        pass
+
+
+class TextDownloadArchive(DownloadArchive):
+    """
+    One ID per line, the whole file is loaded in memory. Entries added
+    by other processes are only seen when the archive is opened.
+    """
+
+    def __init__(self, fn):
+        super(TextDownloadArchive, self).__init__(fn)
+        self._ids = set()
+        try:
+            self._ids.update(read_text_archive(fn))
+        except IOError as ioe:
+            if ioe.errno != errno.ENOENT:
+                raise
+
+    def __contains__(self, archive_id):
+        return archive_id in self._ids
+
+    def __iter__(self):
+        return iter(sorted(self._ids))
+
+    def update(self, archive_ids):
+        new_ids = []
+        for archive_id in archive_ids:
+            if archive_id not in self._ids:
+                self._ids.add(archive_id)
+                new_ids.append(archive_id)
+        if not new_ids:
+            return
+        with locked_file(self.filename, 'a', encoding='utf-8') as archive_file:
+            archive_file.write(''.join(archive_id + '\n' for archive_id in new_ids))
+
+
+class SQLiteDownloadArchive(DownloadArchive):
+    """
+    SQLite database with a unique index on the IDs. Lookups query the
+    database, so nothing is preloaded and the entries written by other
+    processes are seen immediately; concurrent writers are serialized by
+    SQLite's locking.
+    """
+
+    # Seconds to wait for a lock held by another writer
+    TIMEOUT = 60
+    # Number of IDs inserted per transaction when importing
+    BATCH_SIZE = 10000
+
+    def __init__(self, fn):
+        if sqlite3 is None:
+            raise YoutubeDLError('The sqlite download archive requires the sqlite3 module')
+        super(SQLiteDownloadArchive, self).__init__(fn)
+        self._lock = threading.Lock()
+        # Autocommit mode, transactions are opened explicitly; the
+        # connection is shared between threads under self._lock
+        self._conn = sqlite3.connect(
+            fn, timeout=self.TIMEOUT, isolation_level=None, check_same_thread=False)
+        try:
+            # Readers do not block the writer in WAL mode
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        except sqlite3.DatabaseError:
+            pass
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS archive (id TEXT NOT NULL PRIMARY KEY)')
+
+    def __contains__(self, archive_id):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT 1 FROM archive WHERE id = ?', (archive_id,)).fetchone() is not None
+
+    def __iter__(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT id FROM archive ORDER BY rowid').fetchall()
+        return (compat_str(row[0]) for row in rows)
+
+    def _insert(self, archive_ids):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO archive (id) VALUES (?)',
+                    ((archive_id,) for archive_id in archive_ids))
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def update(self, archive_ids):
+        batch = []
+        for archive_id in archive_ids:
+            batch.append(archive_id)
+            if len(batch) >= self.BATCH_SIZE:
+                self._insert(batch)
+                batch = []
+        if batch:
+            self._insert(batch)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,23 +1,55 @@
 from __future__ import unicode_literals
 
+import collections
+import copy
+import email
 import errno
+import hashlib
 import io
 import json
 import os
 import re
 import shutil
+import tempfile
+import threading
+import time
 import traceback
 
-from .compat import compat_getenv
+from .compat import (
+    compat_getenv,
+    compat_urllib_response,
+)
 from .utils import (
     expand_path,
+    int_or_none,
+    replace_file,
+    unified_timestamp,
+    update_Request,
     write_json_file,
 )
 
 
 class Cache(object):
+    # Number of entries kept parsed in memory
+    _MEMORY_ENTRIES = 64
+    # Size in bytes above which the least recently used entries are evicted
+    # from the cache directory
+    _MAX_SIZE = 64 * 1024 * 1024
+    # Lifetime in seconds of the entries of the sections holding data that
+    # the sites eventually invalidate
+    _SECTION_TTLS = {
+        'ap-mvpd': 30 * 24 * 60 * 60,
+        'brightcove': 7 * 24 * 60 * 60,
+        'soundcloud': 24 * 60 * 60,
+    }
+
     def __init__(self, ydl):
         self._ydl = ydl
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = False
+        self.stats = dict.fromkeys((
+            'memory_hits', 'disk_hits', 'misses', 'expired', 'stores', 'evictions'), 0)
 
     def _get_root_dir(self):
         res = self._ydl.params.get('cachedir')
@@ -37,6 +69,40 @@ class Cache(object):
     def enabled(self):
         return self._ydl.params.get('cachedir') is not False
 
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _is_expired(self, section, mtime, now=None):
+        ttl = self._SECTION_TTLS.get(section)
+        return ttl is not None and (now or time.time()) - mtime > ttl
+
+    def _remember(self, fn, version, data):
+        with self._lock:
+            self._memory.pop(fn, None)
+            self._memory[fn] = (version, copy.deepcopy(data))
+            while len(self._memory) > self._MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def _recall(self, fn, version):
+        with self._lock:
+            entry = self._memory.pop(fn, None)
+            if entry is None or entry[0] != version:
+                # Unknown or rewritten by another process
+                return None
+            self._memory[fn] = entry
+            self.stats['memory_hits'] += 1
+            return entry
+
+    def _remove_file(self, fn):
+        with self._lock:
+            self._memory.pop(fn, None)
+        try:
+            os.remove(fn)
+        except OSError:
+            return  # Removed by another process
+        self._count('evictions')
+
     def store(self, section, key, data, dtype='json'):
         assert dtype in ('json',)
 
@@ -50,11 +116,20 @@ class Cache(object):
             except OSError as ose:
                 if ose.errno != errno.EEXIST:
                     raise
+            # Atomically replaces the file, concurrent readers get either
+            # the old or the new data
             write_json_file(data, fn)
+            st = os.stat(fn)
         except Exception:
             tb = traceback.format_exc()
             self._ydl.report_warning(
                 'Writing cache to %r failed: %s' % (fn, tb))
+            return
+        self._remember(fn, (st.st_mtime, st.st_size), data)
+        self._count('stores')
+        if not self._evicted:
+            self._evicted = True
+            self.evict()
 
     def load(self, section, key, dtype='json', default=None):
         assert dtype in ('json',)
@@ -63,10 +138,24 @@ class Cache(object):
             return default
 
         cache_fn = self._get_cache_fn(section, key, dtype)
+        try:
+            st = os.stat(cache_fn)
+        except OSError:
+            self._count('misses')
+            return default  # No cache available
+        if self._is_expired(section, st.st_mtime):
+            self._count('expired')
+            self._remove_file(cache_fn)
+            return default
+        version = (st.st_mtime, st.st_size)
+        entry = self._recall(cache_fn, version)
+        if entry is not None:
+            return copy.deepcopy(entry[1])
+
         try:
             try:
                 with io.open(cache_fn, 'r', encoding='utf-8') as cachef:
-                    return json.load(cachef)
+                    data = json.load(cachef)
             except ValueError:
                 try:
                     file_size = os.path.getsize(cache_fn)
@@ -74,10 +163,75 @@ class Cache(object):
                     file_size = str(oe)
                 self._ydl.report_warning(
                     'Cache retrieval from %s failed (%s)' % (cache_fn, file_size))
+                return default
         except IOError:
-            pass  # No cache available
+            self._count('misses')
+            return default  # Removed by another process
+
+        self._count('disk_hits')
+        self._remember(cache_fn, version, data)
+        try:
+            # Record the access for the eviction, the modification time
+            # stays the time the entry was stored
+            os.utime(cache_fn, (time.time(), st.st_mtime))
+        except OSError:
+            pass
+        return data
+
+    def evict(self):
+        """ Remove the expired entries, then the least recently used ones until the cache directory fits in _MAX_SIZE """
+        if not self.enabled:
+            return
+
+        root_dir = self._get_root_dir()
+        now = time.time()
+        entries = []
+        try:
+            sections = os.listdir(root_dir)
+        except OSError:
+            return  # No cache yet
+        for section in sections:
+            section_dir = os.path.join(root_dir, section)
+            try:
+                for fn in os.listdir(section_dir):
+                    if not fn.endswith('.json'):
+                        continue  # Temporary files of a concurrent store
+                    path = os.path.join(section_dir, fn)
+                    st = os.stat(path)
+                    if self._is_expired(section, st.st_mtime, now):
+                        self._remove_file(path)
+                        continue
+                    entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+            except OSError:
+                pass  # Not a section or removed by another process
 
-        return default
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self._MAX_SIZE:
+                break
+            self._remove_file(path)
+            size -= entry_size
+
+    def prune(self, section, max_entries, dtype='json'):
+        """ Remove the oldest entries of section, keeping the max_entries last stored """
+        assert dtype in ('json',)
+
+        if not self.enabled:
+            return
+
+        section_dir = os.path.dirname(self._get_cache_fn(section, 'prune', dtype))
+        try:
+            entries = []
+            for fn in os.listdir(section_dir):
+                if not fn.endswith('.' + dtype):
+                    continue
+                path = os.path.join(section_dir, fn)
+                entries.append((os.path.getmtime(path), path))
+            entries.sort(reverse=True)
+            for _, path in entries[max_entries:]:
+                self._remove_file(path)
+        except OSError:
+            pass  # Pruned by another process or no cache yet
 
     def remove(self):
         if not self.enabled:
@@ -90,7 +244,304 @@ class Cache(object):
 
         self._ydl.to_screen(
             'Removing cache dir %s .' % cachedir, skip_eol=True)
+        with self._lock:
+            self._memory.clear()
         if os.path.exists(cachedir):
             self._ydl.to_screen('.', skip_eol=True)
             shutil.rmtree(cachedir)
         self._ydl.to_screen('.')
+
+
+def _cookie_header(ydl, req):
+    """ Return the Cookie header the opener will send with req """
+    cookie_req = update_Request(req)
+    ydl.cookiejar.add_cookie_header(cookie_req)
+    return cookie_req.get_header('Cookie')
+
+
+class HTTPCache(object):
+    """ Cache of the responses to the GET requests of the extractors
+
+    Responses are reused without a request while they are fresh according
+    to their Cache-Control or Expires headers, and then revalidated with
+    If-None-Match and If-Modified-Since when they carry a validator.
+    """
+
+    _SECTION = 'http'
+    # Default size in bytes above which the least recently used responses
+    # are evicted
+    _MAX_SIZE = 128 * 1024 * 1024
+    # Headers describing the transfer rather than the stored body
+    _SKIPPED_HEADERS = (
+        'connection', 'content-encoding', 'content-length', 'keep-alive',
+        'transfer-encoding')
+
+    def __init__(self, ydl):
+        self._ydl = ydl
+        self._lock = threading.Lock()
+        self._evicted = False
+        self.stats = dict.fromkeys(('fresh_hits', 'revalidated', 'misses', 'stores'), 0)
+
+    @property
+    def enabled(self):
+        return bool(self._ydl.params.get('http_cache')) and self._ydl.cache.enabled
+
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _get_cache_fn(self, req):
+        # Responses depend on the cookies the opener adds as well
+        key = '\n'.join([req.get_full_url()] + [
+            '%s: %s' % header for header in sorted(req.header_items())] + [
+            'Cookie: %s' % (_cookie_header(self._ydl, req) or '')])
+        return os.path.join(
+            self._ydl.cache._get_root_dir(), self._SECTION,
+            '%s.http' % hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+    @staticmethod
+    def _expiry(headers, now, credentials=False):
+        """ Return the time until which the response is fresh, None if it must not be stored """
+        directives = {}
+        for directive in headers.get('Cache-Control', '').split(','):
+            name, _, value = directive.strip().partition('=')
+            directives[name.lower()] = value.strip('"')
+        vary = headers.get('Vary', '').lower()
+        # Responses setting or depending on cookies are specific to the session
+        if 'no-store' in directives or headers.get('Set-Cookie') or '*' in vary or 'cookie' in vary:
+            return None
+        # Private responses to authenticated requests are specific to the user
+        if 'private' in directives and credentials:
+            return None
+        if 'no-cache' in directives:
+            return now
+        max_age = int_or_none(directives.get('max-age'))
+        if max_age is not None:
+            return now + max_age - (int_or_none(headers.get('Age')) or 0)
+        expires = headers.get('Expires')
+        if expires:
+            expires = unified_timestamp(expires)
+            if expires is None:
+                return now  # Invalid dates mean already expired
+            return now + expires - (unified_timestamp(headers.get('Date')) or now)
+        return now
+
+    def _write(self, fn, entry, body):
+        try:
+            os.makedirs(os.path.dirname(fn))
+        except OSError as ose:
+            if ose.errno != errno.EEXIST:
+                raise
+        tf = tempfile.NamedTemporaryFile(
+            prefix=os.path.basename(fn) + '.', suffix='.tmp',
+            dir=os.path.dirname(fn), delete=False)
+        try:
+            with tf:
+                tf.write(json.dumps(entry).encode('utf-8') + b'\n')
+                tf.write(body)
+            replace_file(tf.name, fn)
+        except Exception:
+            try:
+                os.remove(tf.name)
+            except OSError:
+                pass
+            raise
+
+    def _make_entry(self, req, url, headers, body):
+        credentials = bool(
+            req.has_header('Authorization') or _cookie_header(self._ydl, req))
+        expires = self._expiry(headers, time.time(), credentials)
+        if expires is None:
+            return None
+        entry = {
+            'url': url,
+            'headers': [
+                [name, value] for name, value in headers.items()
+                if name.lower() not in self._SKIPPED_HEADERS],
+            'expires': expires,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+        }
+        if expires <= time.time() and not (entry['etag'] or entry['last_modified']):
+            return None  # Could neither be reused nor revalidated
+        fn = self._get_cache_fn(req)
+        try:
+            self._write(fn, entry, body)
+        except Exception:
+            tb = traceback.format_exc()
+            self._ydl.report_warning(
+                'Writing HTTP cache to %r failed: %s' % (fn, tb))
+            return None
+        self._count('stores')
+        if not self._evicted:
+            self._evicted = True
+            self.evict()
+        return entry
+
+    def load(self, req):
+        """ Return the stored entry for req or None """
+        if not self.enabled or req.get_method() != 'GET':
+            return None
+
+        fn = self._get_cache_fn(req)
+        try:
+            with open(fn, 'rb') as f:
+                entry = json.loads(f.readline().decode('utf-8'))
+                entry['body'] = f.read()
+        except (IOError, ValueError):
+            self._count('misses')
+            return None
+        try:
+            # Record the access for the eviction
+            os.utime(fn, None)
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry):
+        if entry['expires'] <= time.time():
+            return False
+        self._count('fresh_hits')
+        return True
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    @staticmethod
+    def response(entry):
+        """ Return a response handle replaying entry """
+        headers = email.message_from_string(''.join(
+            '%s: %s\n' % (name, value) for name, value in entry['headers']))
+        return compat_urllib_response.addinfourl(
+            io.BytesIO(entry['body']), headers, entry['url'], 200)
+
+    def store(self, req, urlh):
+        """ Read the response to req, storing it if it may be reused, and return a handle replaying it """
+        body = urlh.read()
+        if self.enabled and req.get_method() == 'GET' and urlh.getcode() == 200:
+            self._make_entry(req, urlh.geturl(), urlh.headers, body)
+        res = compat_urllib_response.addinfourl(
+            io.BytesIO(body), urlh.headers, urlh.geturl(), urlh.getcode())
+        res.msg = getattr(urlh, 'msg', None)
+        return res
+
+    def refresh(self, req, entry, urlh):
+        """ Update entry with the headers of a 304 response and return a handle replaying it """
+        self._count('revalidated')
+        updated = dict((name.lower(), value) for name, value in urlh.headers.items())
+        headers = [
+            [name, updated.pop(name.lower(), value)] for name, value in entry['headers']]
+        headers.extend([name, value] for name, value in updated.items())
+        res = self.response(dict(entry, headers=headers))
+        self._make_entry(req, entry['url'], res.headers, entry['body'])
+        return res
+
+    def evict(self):
+        """ Remove the least recently used responses until they fit in http_cache_size bytes """
+        max_size = self._ydl.params.get('http_cache_size') or self._MAX_SIZE
+        cache_dir = os.path.join(self._ydl.cache._get_root_dir(), self._SECTION)
+        entries = []
+        try:
+            for fn in os.listdir(cache_dir):
+                if not fn.endswith('.http'):
+                    continue  # Temporary files of a concurrent store
+                path = os.path.join(cache_dir, fn)
+                st = os.stat(path)
+                entries.append((max(st.st_atime, st.st_mtime), st.st_size, path))
+        except OSError:
+            return  # No cache yet or removed by another process
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Removed by another process
+            size -= entry_size
+
+
+class ResponseMemo(object):
+    """ Short-lived memo of the responses to the GET requests of a run
+
+    Identical requests, with the same URL, headers, cookies and body, made
+    while one is in flight wait for its response instead of being sent again.
+    """
+
+    # Lifetime in seconds of the memoized responses
+    _TTL = 60
+    # Total size in bytes of the bodies kept in memory
+    _MAX_SIZE = 32 * 1024 * 1024
+
+    def __init__(self, ydl):
+        self._ydl = ydl
+        self._lock = threading.Lock()
+        self._memo = collections.OrderedDict()
+        self._size = 0
+        self._in_flight = {}
+        self.stats = dict.fromkeys(('hits', 'coalesced', 'misses'), 0)
+
+    @staticmethod
+    def _replay(entry):
+        _, url, code, headers, body = entry
+        return compat_urllib_response.addinfourl(io.BytesIO(body), headers, url, code)
+
+    def _remember(self, key, urlh):
+        """ Memoize the response if it may be reused and return a handle replaying it """
+        body = urlh.read()
+        entry = (time.time() + self._TTL, urlh.geturl(), urlh.getcode(), urlh.headers, body)
+        cache_control = urlh.headers.get('Cache-Control', '').lower()
+        if len(body) <= self._MAX_SIZE and 'no-store' not in cache_control:
+            with self._lock:
+                self._memo[key] = entry
+                self._size += len(body)
+                while self._size > self._MAX_SIZE:
+                    _, (_, _, _, _, evicted) = self._memo.popitem(last=False)
+                    self._size -= len(evicted)
+        return self._replay(entry)
+
+    def fetch(self, req, request_func):
+        """ Return the response to req, calling request_func() unless it is memoized or in flight """
+        if req.get_method() != 'GET' or not self._ydl.params.get('webpage_memo', True):
+            return request_func()
+
+        # The bodies are decoded, whatever encodings were accepted
+        key = (
+            req.get_full_url(),
+            tuple(sorted(h for h in req.header_items() if h[0] != 'Accept-encoding')),
+            _cookie_header(self._ydl, req), req.data)
+        waited = False
+        while True:
+            with self._lock:
+                entry = self._memo.pop(key, None)
+                if entry is not None:
+                    if entry[0] > time.time():
+                        self._memo[key] = entry
+                        self.stats['coalesced' if waited else 'hits'] += 1
+                        return self._replay(entry)
+                    self._size -= len(entry[4])
+                event = self._in_flight.get(key)
+                if event is None:
+                    event = self._in_flight[key] = threading.Event()
+                    self.stats['misses'] += 1
+                    break
+            # Retried if the response could not be memoized
+            event.wait()
+            waited = True
+
+        try:
+            urlh = request_func()
+            if urlh is False or not 200 <= (urlh.getcode() or 0) < 300:
+                return urlh
+            return self._remember(key, urlh)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            event.set()
@@ -2360,6 +2360,11 @@ try:
 except ImportError:
     import BaseHTTPServer as compat_http_server
 
+try:
+    import socketserver as compat_socketserver
+except ImportError:  # Python 2
+    import SocketServer as compat_socketserver
+
 try:
     compat_str = unicode  # Python 2
 except NameError:
@@ -3026,6 +3031,7 @@ __all__ = [
     'compat_shlex_quote',
     'compat_shlex_split',
     'compat_socket_create_connection',
+    'compat_socketserver',
     'compat_str',
     'compat_struct_pack',
     'compat_struct_unpack',
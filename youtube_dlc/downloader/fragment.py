@@ -1,12 +1,22 @@
 from __future__ import division, unicode_literals
 
+import collections
+import io
 import os
 import time
 import json
 
+try:
+    import concurrent.futures
+    can_threaded_download = True
+except ImportError:
+    can_threaded_download = False
+
 from .common import FileDownloader
 from .http import HttpFD
+from ..compat import compat_urllib_error
 from ..utils import (
+    DownloadError,
     error_to_compat_str,
     encodeFilename,
     sanitize_open,
@@ -30,7 +40,11 @@ class FragmentFD(FileDownloader):
     skip_unavailable_fragments:
                         Skip unavailable fragments (DASH and hlsnative only)
     keep_fragments:     Keep downloaded fragments on disk after downloading is
-                        finished
+                        finished. Otherwise fragments are downloaded into memory
+                        and never written to disk on their own
+    concurrent_fragment_downloads:
+                        Number of fragments to download in parallel (DASH and
+                        hlsnative only, requires concurrent.futures)
 
     For each incomplete fragment download youtube-dlc keeps on disk a special
     bookkeeping file with download state and metadata (in future such files will
@@ -47,12 +61,23 @@ class FragmentFD(FileDownloader):
             current_fragment:
                 Dictionary with current (being downloaded) fragment data:
                 index:  0-based index of current fragment among all fragments
+                byte_offset:
+                        Size of the destination file up to the current
+                        fragment
             fragment_count:
                 Total count of fragments
 
+    To avoid rewriting it after every fragment, the .ytdl file is only updated
+    every _CHECKPOINT_FRAGMENTS fragments or _CHECKPOINT_INTERVAL seconds.
+    Fragments appended to the destination file after the last checkpoint are
+    discarded and downloaded again when resuming.
+
     This feature is experimental and file format may change in future.
     """
 
+    _CHECKPOINT_FRAGMENTS = 16
+    _CHECKPOINT_INTERVAL = 5
+
     def report_retry_fragment(self, err, frag_index, count, retries):
         self.to_screen(
             '[download] Got server HTTP error: %s. Retrying fragment %d (attempt %d of %s)...'
@@ -77,7 +102,9 @@ class FragmentFD(FileDownloader):
         assert 'ytdl_corrupt' not in ctx
         stream, _ = sanitize_open(self.ytdl_filename(ctx['filename']), 'r')
         try:
-            ctx['fragment_index'] = json.loads(stream.read())['downloader']['current_fragment']['index']
+            current_fragment = json.loads(stream.read())['downloader']['current_fragment']
+            ctx['fragment_index'] = current_fragment['index']
+            ctx['ytdl_byte_offset'] = current_fragment.get('byte_offset')
         except Exception:
             ctx['ytdl_corrupt'] = True
         finally:
@@ -88,6 +115,7 @@ class FragmentFD(FileDownloader):
         downloader = {
             'current_fragment': {
                 'index': ctx['fragment_index'],
+                'byte_offset': ctx['dest_size'],
             },
         }
         if ctx.get('fragment_count') is not None:
@@ -95,33 +123,180 @@ class FragmentFD(FileDownloader):
         frag_index_stream.write(json.dumps({'downloader': downloader}))
         frag_index_stream.close()
 
-    def _download_fragment(self, ctx, frag_url, info_dict, headers=None):
-        fragment_filename = '%s-Frag%d' % (ctx['tmpfilename'], ctx['fragment_index'])
+    def _fetch_fragment(self, ctx, frag_url, info_dict, headers, frag_num, dl):
         fragment_info_dict = {
             'url': frag_url,
             'http_headers': headers or info_dict.get('http_headers'),
         }
-        success = ctx['dl'].download(fragment_filename, fragment_info_dict)
-        if not success:
-            return False, None
+        if self.params.get('keep_fragments', False):
+            fragment_filename = '%s-Frag%d' % (ctx['tmpfilename'], frag_num)
+            success = dl.download(fragment_filename, fragment_info_dict)
+            if not success:
+                return False, None
+            down, _ = sanitize_open(fragment_filename, 'rb')
+            frag_content = down.read()
+            down.close()
+        else:
+            # Fragment bodies go straight from the response into memory
+            frag_buffer = io.BytesIO()
+            success = dl.download(frag_buffer, fragment_info_dict)
+            if not success:
+                return False, None
+            frag_content = frag_buffer.getvalue()
         if fragment_info_dict.get('filetime'):
             ctx['fragment_filetime'] = fragment_info_dict.get('filetime')
-        down, frag_sanitized = sanitize_open(fragment_filename, 'rb')
-        ctx['fragment_filename_sanitized'] = frag_sanitized
-        frag_content = down.read()
-        down.close()
         return True, frag_content
 
+    def _download_fragment(self, ctx, frag_url, info_dict, headers=None):
+        return self._fetch_fragment(
+            ctx, frag_url, info_dict, headers, ctx['fragment_index'], ctx['dl'])
+
     def _append_fragment(self, ctx, frag_content):
-        try:
-            ctx['dest_stream'].write(frag_content)
+        ctx['dest_stream'].write(frag_content)
+        if not self.__do_ytdl_file(ctx):
             ctx['dest_stream'].flush()
-        finally:
-            if self.__do_ytdl_file(ctx):
-                self._write_ytdl_file(ctx)
-            if not self.params.get('keep_fragments', False):
-                os.remove(encodeFilename(ctx['fragment_filename_sanitized']))
-            del ctx['fragment_filename_sanitized']
+            return
+        ctx['frags_since_checkpoint'] += 1
+        if (ctx['frags_since_checkpoint'] >= self._CHECKPOINT_FRAGMENTS
+                or time.time() - ctx['checkpoint_time'] >= self._CHECKPOINT_INTERVAL):
+            self._checkpoint_frag_download(ctx)
+
+    def _checkpoint_frag_download(self, ctx):
+        # Destination file must be flushed first so that it is never shorter
+        # than the byte offset recorded in the .ytdl file
+        ctx['dest_stream'].flush()
+        ctx['dest_size'] = ctx['dest_stream'].tell()
+        self._write_ytdl_file(ctx)
+        ctx['frags_since_checkpoint'] = 0
+        ctx['checkpoint_time'] = time.time()
+
+    def _download_and_append_fragments(self, ctx, fragments, info_dict, pack_func=None):
+        """
+        Download fragments and append them to the destination file in order.
+
+        fragments is a list of dictionaries with the following keys:
+            frag_index: 1-based index of the fragment among all fragments
+            url:        URL of the fragment
+            headers:    (optional) HTTP headers to use for this fragment
+            fatal:      (optional) whether the whole download should be
+                        aborted if the fragment can not be downloaded,
+                        defaults to not skip_unavailable_fragments
+
+        Fragments with an index not greater than ctx['fragment_index'] have
+        already been downloaded and are skipped. If pack_func is given it is
+        called as pack_func(frag_content, fragment) and its result is appended
+        instead of the raw fragment content.
+
+        Up to concurrent_fragment_downloads fragments are downloaded in
+        parallel, but they are always appended in their original order.
+        Returns False if the download has failed.
+        """
+        fragment_retries = self.params.get('fragment_retries', 0)
+        skip_unavailable_fragments = self.params.get('skip_unavailable_fragments', True)
+        concurrency = self.params.get('concurrent_fragment_downloads') or 1
+        if concurrency > 1 and not can_threaded_download:
+            self.report_warning(
+                'Concurrent fragment downloading is not supported by your Python '
+                'version, fragments will be downloaded one at a time')
+            concurrency = 1
+
+        fragments = [f for f in fragments if f['frag_index'] > ctx['fragment_index']]
+
+        def download_fragment(fragment, dl):
+            # Returns a (success, frag_content) tuple, frag_content being
+            # None for skipped fragments
+            frag_index = fragment['frag_index']
+            fatal = fragment.get('fatal', not skip_unavailable_fragments)
+            count = 0
+            while count <= fragment_retries:
+                try:
+                    return self._fetch_fragment(
+                        ctx, fragment['url'], info_dict, fragment.get('headers'),
+                        frag_index - 1, dl)
+                except compat_urllib_error.HTTPError as err:
+                    # Unavailable (possibly temporary) fragments may be served.
+                    # E.g. YouTube may often return 404 HTTP error for a fragment
+                    # but immediately retrying it with the same request data
+                    # usually succeeds. First we try to retry then either skip
+                    # or abort.
+                    # See https://github.com/ytdl-org/youtube-dl/issues/10165,
+                    # https://github.com/ytdl-org/youtube-dl/issues/10448).
+                    count += 1
+                    if count <= fragment_retries:
+                        self.report_retry_fragment(err, frag_index, count, fragment_retries)
+                except DownloadError:
+                    # Don't retry fragment if error occurred during HTTP downloading
+                    # itself since it has own retry settings
+                    if not fatal:
+                        self.report_skip_fragment(frag_index)
+                        return True, None
+                    raise
+            if not fatal:
+                self.report_skip_fragment(frag_index)
+                return True, None
+            self.report_error('giving up after %s fragment retries' % fragment_retries)
+            return False, None
+
+        def append_fragment(fragment, frag_content):
+            if pack_func:
+                frag_content = pack_func(frag_content, fragment)
+            ctx['fragment_index'] = fragment['frag_index']
+            self._append_fragment(ctx, frag_content)
+
+        if concurrency == 1:
+            for fragment in fragments:
+                success, frag_content = download_fragment(fragment, ctx['dl'])
+                if not success:
+                    return False
+                if frag_content is not None:
+                    append_fragment(fragment, frag_content)
+            return True
+
+        # Worker threads use their own quiet downloaders that do not report
+        # per-byte progress; progress is reported as fragments are appended
+        ctx['concurrent_fragments'] = True
+        pending = collections.deque()
+        fragments_iter = iter(fragments)
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+            try:
+                while True:
+                    # Keep at most concurrency fragments in flight or waiting
+                    # to be appended so that memory usage stays bounded
+                    while len(pending) < concurrency:
+                        fragment = next(fragments_iter, None)
+                        if fragment is None:
+                            break
+                        pending.append((fragment, pool.submit(
+                            download_fragment, fragment, self._create_frag_downloader())))
+                    if not pending:
+                        return True
+                    fragment, future = pending.popleft()
+                    success, frag_content = future.result()
+                    if not success:
+                        return False
+                    if frag_content is not None:
+                        append_fragment(fragment, frag_content)
+                        ctx['frag_progress_hook']({
+                            'status': 'finished',
+                            'total_bytes': len(frag_content),
+                        })
+            finally:
+                for _, future in pending:
+                    future.cancel()
+
+    def _create_frag_downloader(self):
+        return HttpQuietDownloader(
+            self.ydl,
+            {
+                'continuedl': True,
+                'quiet': True,
+                'noprogress': True,
+                'ratelimit': self.params.get('ratelimit'),
+                'retries': self.params.get('retries', 0),
+                'nopart': self.params.get('nopart', False),
+                'test': self.params.get('test', False),
+            }
+        )
 
     def _prepare_frag_download(self, ctx):
         if 'live' not in ctx:
@@ -136,18 +311,7 @@ class FragmentFD(FileDownloader):
         self.to_screen(
             '[%s] Total fragments: %s' % (self.FD_NAME, total_frags_str))
         self.report_destination(ctx['filename'])
-        dl = HttpQuietDownloader(
-            self.ydl,
-            {
-                'continuedl': True,
-                'quiet': True,
-                'noprogress': True,
-                'ratelimit': self.params.get('ratelimit'),
-                'retries': self.params.get('retries', 0),
-                'nopart': self.params.get('nopart', False),
-                'test': self.params.get('test', False),
-            }
-        )
+        dl = self._create_frag_downloader()
         tmpfilename = self.temp_name(ctx['filename'])
         open_mode = 'wb'
         resume_len = 0
@@ -161,13 +325,17 @@ class FragmentFD(FileDownloader):
         ctx.update({
             'tmpfilename': tmpfilename,
             'fragment_index': 0,
+            'dest_size': 0,
         })
 
         if self.__do_ytdl_file(ctx):
             if os.path.isfile(encodeFilename(self.ytdl_filename(ctx['filename']))):
                 self._read_ytdl_file(ctx)
                 is_corrupt = ctx.get('ytdl_corrupt') is True
-                is_inconsistent = ctx['fragment_index'] > 0 and resume_len == 0
+                byte_offset = ctx.pop('ytdl_byte_offset', None)
+                is_inconsistent = ctx['fragment_index'] > 0 and (
+                    resume_len == 0 if byte_offset is None
+                    else resume_len < byte_offset)
                 if is_corrupt or is_inconsistent:
                     message = (
                         '.ytdl file is corrupt' if is_corrupt else
@@ -175,10 +343,21 @@ class FragmentFD(FileDownloader):
                     self.report_warning(
                         '%s. Restarting from the beginning...' % message)
                     ctx['fragment_index'] = resume_len = 0
+                    open_mode = 'wb'
                     if 'ytdl_corrupt' in ctx:
                         del ctx['ytdl_corrupt']
                     self._write_ytdl_file(ctx)
+                elif byte_offset is not None and resume_len > byte_offset:
+                    # Drop fragments appended after the last checkpoint, they
+                    # will be downloaded again
+                    with open(encodeFilename(tmpfilename), 'r+b') as f:
+                        f.truncate(byte_offset)
+                    resume_len = byte_offset
             else:
+                # Without a .ytdl file there is no way to tell what a
+                # leftover destination file contains
+                resume_len = 0
+                open_mode = 'wb'
                 self._write_ytdl_file(ctx)
                 assert ctx['fragment_index'] == 0
 
@@ -187,6 +366,9 @@ class FragmentFD(FileDownloader):
         ctx.update({
             'dl': dl,
             'dest_stream': dest_stream,
+            'dest_size': resume_len,
+            'frags_since_checkpoint': 0,
+            'checkpoint_time': time.time(),
             'tmpfilename': tmpfilename,
             # Total complete fragments downloaded so far in bytes
             'complete_frags_downloaded_bytes': resume_len,
@@ -233,6 +415,15 @@ class FragmentFD(FileDownloader):
                 state['downloaded_bytes'] += frag_total_bytes - ctx['prev_frag_downloaded_bytes']
                 ctx['complete_frags_downloaded_bytes'] = state['downloaded_bytes']
                 ctx['prev_frag_downloaded_bytes'] = 0
+                if ctx.get('concurrent_fragments'):
+                    # No per-byte progress is available for fragments downloaded
+                    # in parallel so speed and ETA are derived from whole fragments
+                    state['speed'] = self.calc_speed(
+                        start, time_now, state['downloaded_bytes'] - resume_len)
+                    if not ctx['live']:
+                        state['eta'] = self.calc_eta(
+                            start, time_now, estimated_size - resume_len,
+                            state['downloaded_bytes'] - resume_len)
             else:
                 frag_downloaded_bytes = s['downloaded_bytes']
                 state['downloaded_bytes'] += frag_downloaded_bytes - ctx['prev_frag_downloaded_bytes']
@@ -246,6 +437,7 @@ class FragmentFD(FileDownloader):
             self._hook_progress(state)
 
         ctx['dl'].add_progress_hook(frag_progress_hook)
+        ctx['frag_progress_hook'] = frag_progress_hook
 
         return start
 
@@ -18,6 +18,7 @@ from ..utils import (
     int_or_none,
     sanitize_open,
     sanitized_Request,
+    timeconvert,
     write_xattr,
     XAttrMetadataError,
     XAttrUnavailableError,
@@ -33,9 +34,13 @@ class HttpFD(FileDownloader):
             __setattr__ = dict.__setitem__
             __delattr__ = dict.__delitem__
 
+        # filename may also be a writable file-like object, e.g. an in-memory
+        # buffer, in which case downloaded data is written straight into it
+        to_buffer = hasattr(filename, 'write')
+
         ctx = DownloadContext()
         ctx.filename = filename
-        ctx.tmpfilename = self.temp_name(filename)
+        ctx.tmpfilename = filename if to_buffer else self.temp_name(filename)
         ctx.stream = None
 
         # Do not include the Accept-Encoding header
@@ -56,7 +61,7 @@ class HttpFD(FileDownloader):
         ctx.start_time = time.time()
         ctx.chunk_size = None
 
-        if self.params.get('continuedl', True):
+        if self.params.get('continuedl', True) and not to_buffer:
             # Establish possible resume length
             if os.path.isfile(encodeFilename(ctx.tmpfilename)):
                 ctx.resume_len = os.path.getsize(
@@ -168,8 +173,9 @@ class HttpFD(FileDownloader):
                             # I decided to implement a suggested change and consider the file
                             # completely downloaded if the file size differs less than 100 bytes from
                             # the one in the hard drive.
-                            self.report_file_already_downloaded(ctx.filename)
-                            self.try_rename(ctx.tmpfilename, ctx.filename)
+                            if not to_buffer:
+                                self.report_file_already_downloaded(ctx.filename)
+                                self.try_rename(ctx.tmpfilename, ctx.filename)
                             self._hook_progress({
                                 'filename': ctx.filename,
                                 'status': 'finished',
@@ -224,7 +230,7 @@ class HttpFD(FileDownloader):
             before = start  # start measuring
 
             def retry(e):
-                to_stdout = ctx.tmpfilename == '-'
+                to_stdout = to_buffer or ctx.tmpfilename == '-'
                 if ctx.stream is not None:
                     if not to_stdout:
                         ctx.stream.close()
@@ -253,8 +259,14 @@ class HttpFD(FileDownloader):
                 if len(data_block) == 0:
                     break
 
+                if ctx.stream is None and to_buffer:
+                    ctx.stream = filename
+                    if ctx.open_mode == 'wb':
+                        # Unable to resume, drop any partially downloaded data
+                        ctx.stream.seek(0)
+                        ctx.stream.truncate()
                 # Open destination file just in time
-                if ctx.stream is None:
+                elif ctx.stream is None:
                     try:
                         ctx.stream, ctx.tmpfilename = sanitize_open(
                             ctx.tmpfilename, ctx.open_mode)
@@ -321,7 +333,7 @@ class HttpFD(FileDownloader):
                 self.to_stderr('\n')
                 self.report_error('Did not get any data blocks')
                 return False
-            if ctx.tmpfilename != '-':
+            if not to_buffer and ctx.tmpfilename != '-':
                 ctx.stream.close()
 
             if data_len is not None and byte_counter != data_len:
@@ -330,11 +342,16 @@ class HttpFD(FileDownloader):
                     retry(err)
                 raise err
 
-            self.try_rename(ctx.tmpfilename, ctx.filename)
+            last_modified = ctx.data.info().get('last-modified', None)
+            if to_buffer:
+                if self.params.get('updatetime', True) and last_modified:
+                    info_dict['filetime'] = timeconvert(last_modified)
+            else:
+                self.try_rename(ctx.tmpfilename, ctx.filename)
 
-            # Update file modification time
-            if self.params.get('updatetime', True):
-                info_dict['filetime'] = self.try_utime(ctx.filename, ctx.data.info().get('last-modified', None))
+                # Update file modification time
+                if self.params.get('updatetime', True):
+                    info_dict['filetime'] = self.try_utime(ctx.filename, last_modified)
 
             self._hook_progress({
                 'downloaded_bytes': byte_counter,
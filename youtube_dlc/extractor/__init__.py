@@ -1,6 +1,13 @@
 from __future__ import unicode_literals
 
+import os
+
+# lazy_extractors.py is generated at build time (see
+# devscripts/make_lazy_extractors.py), it may be stale in a source checkout
+# where extractors are being edited
 try:
+    if os.environ.get('YOUTUBE_DLC_NO_LAZY_EXTRACTORS'):
+        raise ImportError('Lazy loading of extractors is disabled')
     from .lazy_extractors import *
     from .lazy_extractors import _ALL_CLASSES
     _LAZY_LOADER = True
@@ -1,7 +1,6 @@
 # coding: utf-8
 from __future__ import unicode_literals
 
-import itertools
 import re
 
 from .common import InfoExtractor
@@ -1299,21 +1298,22 @@ class BBCCoUkPlaylistBaseIE(InfoExtractor):
     def _entries(self, webpage, url, playlist_id):
         single_page = 'page' in compat_urlparse.parse_qs(
             compat_urlparse.urlparse(url).query)
-        for page_num in itertools.count(2):
-            for video_id in re.findall(
-                    self._VIDEO_ID_TEMPLATE % BBCCoUkIE._ID_REGEX, webpage):
-                yield self.url_result(
-                    self._URL_TEMPLATE % video_id, BBCCoUkIE.ie_key())
+
+        def get_page(page_url, page_num):
+            page = webpage if page_num == 1 else self._download_webpage(
+                page_url, playlist_id, 'Downloading page %d' % page_num)
+            entries = [
+                self.url_result(self._URL_TEMPLATE % video_id, BBCCoUkIE.ie_key())
+                for video_id in re.findall(
+                    self._VIDEO_ID_TEMPLATE % BBCCoUkIE._ID_REGEX, page)]
             if single_page:
-                return
+                return entries, None
             next_page = self._search_regex(
                 r'<li[^>]+class=(["\'])pagination_+next\1[^>]*><a[^>]+href=(["\'])(?P<url>(?:(?!\2).)+)\2',
-                webpage, 'next page url', default=None, group='url')
-            if not next_page:
-                break
-            webpage = self._download_webpage(
-                compat_urlparse.urljoin(url, next_page), playlist_id,
-                'Downloading page %d' % page_num, page_num)
+                page, 'next page url', default=None, group='url')
+            return entries, next_page and compat_urlparse.urljoin(url, next_page)
+
+        return self._paginate(get_page, playlist_id, style='cursor', start=url)
 
     def _real_extract(self, url):
         playlist_id = self._match_id(url)
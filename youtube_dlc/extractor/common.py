@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 import base64
 import datetime
 import hashlib
+import itertools
 import json
 import netrc
 import os
@@ -64,6 +65,7 @@ from ..utils import (
     parse_iso8601,
     parse_m3u8_attributes,
     parse_resolution,
+    prefetch_iter,
     RegexNotFoundError,
     sanitized_Request,
     sanitize_filename,
@@ -383,6 +385,11 @@ class InfoExtractor(object):
     will be used by geo restriction bypass mechanism similarly
     to _GEO_COUNTRIES.
 
+    _HTTP_CACHE attribute may be set to False in order to never reuse the
+    responses stored in the HTTP cache, or memoized earlier in the run, for
+    a particular extractor, whose pages change faster than announced by
+    their caching headers.
+
     Finally, the _WORKING attribute should be set to False for broken IEs
     in order to warn the users and skip the tests.
     """
@@ -393,6 +400,7 @@ class InfoExtractor(object):
     _GEO_BYPASS = True
     _GEO_COUNTRIES = None
     _GEO_IP_BLOCKS = None
+    _HTTP_CACHE = True
     _WORKING = True
 
     def __init__(self, downloader=None):
@@ -581,33 +589,19 @@ class InfoExtractor(object):
         return compat_str(type(self).__name__[:-2])
 
     @staticmethod
-    def __can_accept_status_code(err, expected_status):
-        assert isinstance(err, compat_urllib_error.HTTPError)
+    def __can_accept_status_code(status, expected_status):
         if expected_status is None:
             return False
         if isinstance(expected_status, compat_integer_types):
-            return err.code == expected_status
+            return status == expected_status
         elif isinstance(expected_status, (list, tuple)):
-            return err.code in expected_status
+            return status in expected_status
         elif callable(expected_status):
-            return expected_status(err.code) is True
+            return expected_status(status) is True
         else:
             assert False
 
-    def _request_webpage(self, url_or_request, video_id, note=None, errnote=None, fatal=True, data=None, headers={}, query={}, expected_status=None):
-        """
-        Return the response handle.
-
-        See _download_webpage docstring for arguments specification.
-        """
-        if note is None:
-            self.report_download_webpage(video_id)
-        elif note is not False:
-            if video_id is None:
-                self.to_screen('%s' % (note,))
-            else:
-                self.to_screen('%s: %s' % (video_id, note))
-
+    def _create_request(self, url_or_request, data=None, headers={}, query={}):
         # Some sites check X-Forwarded-For HTTP header in order to figure out
         # the origin of the client behind proxy. This allows bypassing geo
         # restriction by faking this header's value to IP that belongs to some
@@ -618,13 +612,31 @@ class InfoExtractor(object):
                 headers['X-Forwarded-For'] = self._x_forwarded_for_ip
 
         if isinstance(url_or_request, compat_urllib_request.Request):
-            url_or_request = update_Request(
+            return update_Request(
                 url_or_request, data=data, headers=headers, query=query)
-        else:
-            if query:
-                url_or_request = update_url_query(url_or_request, query)
-            if data is not None or headers:
-                url_or_request = sanitized_Request(url_or_request, data, headers)
+        if query:
+            url_or_request = update_url_query(url_or_request, query)
+        if data is not None or headers:
+            url_or_request = sanitized_Request(url_or_request, data, headers)
+        return url_or_request
+
+    def _report_request(self, video_id, note):
+        if note is None:
+            self.report_download_webpage(video_id)
+        elif note is not False:
+            if video_id is None:
+                self.to_screen('%s' % (note,))
+            else:
+                self.to_screen('%s: %s' % (video_id, note))
+
+    def _request_webpage(self, url_or_request, video_id, note=None, errnote=None, fatal=True, data=None, headers={}, query={}, expected_status=None):
+        """
+        Return the response handle.
+
+        See _download_webpage docstring for arguments specification.
+        """
+        self._report_request(video_id, note)
+        url_or_request = self._create_request(url_or_request, data, headers, query)
         exceptions = [compat_urllib_error.URLError, compat_http_client.HTTPException, socket.error]
         if hasattr(ssl, 'CertificateError'):
             exceptions.append(ssl.CertificateError)
@@ -632,7 +644,7 @@ class InfoExtractor(object):
             return self._downloader.urlopen(url_or_request)
         except tuple(exceptions) as err:
             if isinstance(err, compat_urllib_error.HTTPError):
-                if self.__can_accept_status_code(err, expected_status):
+                if self.__can_accept_status_code(err.code, expected_status):
                     # Retain reference to error to prevent file object from
                     # being closed before it can be read. Works around the
                     # effects of <https://bugs.python.org/issue15002>
@@ -662,13 +674,64 @@ class InfoExtractor(object):
         if isinstance(url_or_request, (compat_str, str)):
             url_or_request = url_or_request.partition('#')[0]
 
-        urlh = self._request_webpage(url_or_request, video_id, note, errnote, fatal, data=data, headers=headers, query=query, expected_status=expected_status)
+        request = self._create_request(url_or_request, data, headers, query)
+        if not isinstance(request, compat_urllib_request.Request):
+            request = sanitized_Request(request)
+        urlh = self._request_memoized_webpage(
+            request, video_id, note, errnote, fatal, expected_status=expected_status)
         if urlh is False:
             assert not fatal
             return False
         content = self._webpage_read_content(urlh, url_or_request, video_id, note, errnote, fatal, encoding=encoding)
         return (content, urlh)
 
+    def _request_memoized_webpage(self, request, video_id, note=None, errnote=None, fatal=True, expected_status=None):
+        """
+        Return the response handle to request, shared with the identical
+        requests of the run and read from or stored in the HTTP cache
+        unless _HTTP_CACHE is False.
+
+        See _download_webpage docstring for arguments specification.
+        """
+        http_cache = self._downloader.http_cache
+
+        def request_webpage():
+            if self._HTTP_CACHE and http_cache.enabled:
+                return self._request_cached_webpage(
+                    http_cache, request, video_id, errnote, fatal,
+                    expected_status=expected_status)
+            return self._request_webpage(
+                request, video_id, False, errnote, fatal,
+                expected_status=expected_status)
+
+        self._report_request(video_id, note)
+        if self._HTTP_CACHE:
+            return self._downloader.response_memo.fetch(request, request_webpage)
+        return request_webpage()
+
+    def _request_cached_webpage(self, http_cache, request, video_id, errnote=None, fatal=True, expected_status=None):
+        """
+        Return the response handle, read from or stored in the HTTP cache.
+
+        See _download_webpage docstring for arguments specification.
+        """
+        entry = http_cache.load(request)
+        if entry is None:
+            urlh = self._request_webpage(request, video_id, False, errnote, fatal, expected_status=expected_status)
+            return urlh and http_cache.store(request, urlh)
+        if http_cache.is_fresh(entry):
+            return http_cache.response(entry)
+
+        urlh = self._request_webpage(
+            update_Request(request, headers=http_cache.conditional_headers(entry)),
+            video_id, False, errnote, fatal,
+            expected_status=lambda status: status == 304 or self.__can_accept_status_code(status, expected_status))
+        if urlh is False:
+            return False
+        if urlh.getcode() == 304:
+            return http_cache.refresh(request, entry, urlh)
+        return http_cache.store(request, urlh)
+
     @staticmethod
     def _guess_encoding_from_content(content_type, webpage_bytes):
         m = re.match(r'[a-zA-Z0-9_.-]+/[a-zA-Z0-9_.-]+\s*;\s*charset=(.+)', content_type)
@@ -978,6 +1041,115 @@ class InfoExtractor(object):
             video_info['description'] = playlist_description
         return video_info
 
+    @staticmethod
+    def _is_transient_error(err):
+        """ Whether the request that failed with ExtractorError err may succeed when retried """
+        cause = err.cause
+        if isinstance(cause, compat_urllib_error.HTTPError):
+            return cause.code == 429 or cause.code >= 500
+        return isinstance(cause, (compat_urllib_error.URLError, compat_http_client.HTTPException, socket.error))
+
+    def _paginate(self, page_func, playlist_id, style='pages', start=None, page_size=None, prefetch=0):
+        """
+        Yield the entries of a paginated listing.
+
+        page_func(value, page_num) downloads the page_num-th page, counting
+        from 1, and returns its entries, value depending on style:
+        'pages':  the page number, counting from start (default 1)
+        'offset': the offset of the first entry of the page, from start
+                  (default 0), increased by page_size if given or else by
+                  the number of entries of each page
+        'cursor': the cursor of the page, from start (default None);
+                  page_func returns (entries, next_cursor)
+        The pagination stops at the first page without entries, at a page
+        with fewer than page_size entries if given, or, for the cursor
+        style, when there is no next cursor. With the pages and offset
+        styles, page_func may instead tell whether another page follows by
+        returning (entries, has_more), which requires page_size for the
+        offset style if a page may have no entries. None entries are
+        counted but not yielded, page_func may return None for the items
+        of the page that are not videos.
+
+        By default the pages are downloaded in the calling thread, when the
+        entries are needed. With a positive prefetch, or None for the
+        concurrent_pages param, page_func must be thread-safe: from the
+        second page on, the following pages are downloaded in the
+        background while the entries are processed, at most prefetch pages
+        ahead. The pages failing with a transient network error are
+        retried extractor_retries times with an exponential backoff,
+        page_func must then be fatal.
+        """
+        if style not in ('pages', 'offset', 'cursor'):
+            raise ValueError('unknown pagination style %r' % style)
+        if prefetch is None:
+            prefetch = self._downloader.params.get('concurrent_pages')
+            if prefetch is None:
+                prefetch = 1
+        retries = self._downloader.params.get('extractor_retries')
+        if retries is None:
+            retries = 3
+        stats = {'pages': 0, 'retries': 0, 'time': 0.0, 'slowest': 0.0}
+
+        def timed_page_func(value, page_num):
+            page_start = time.time()
+            try:
+                return page_func(value, page_num)
+            finally:
+                elapsed = time.time() - page_start
+                stats['time'] += elapsed
+                stats['slowest'] = max(stats['slowest'], elapsed)
+
+        def download_page(value, page_num):
+            for attempt in itertools.count(1):
+                try:
+                    return timed_page_func(value, page_num)
+                except ExtractorError as e:
+                    if attempt > retries or not self._is_transient_error(e):
+                        raise
+                    stats['retries'] += 1
+                    backoff = min(2 ** (attempt - 1), 30)
+                    self.report_warning(
+                        'Unable to download page %d: %s. Retrying in %d seconds (%d/%s)'
+                        % (page_num, error_to_compat_str(e.cause), backoff, attempt, retries),
+                        playlist_id)
+                    time.sleep(backoff)
+
+        def pages():
+            value = start
+            if value is None:
+                value = {'pages': 1, 'offset': 0}.get(style)
+            for page_num in itertools.count(1):
+                result = download_page(value, page_num)
+                stats['pages'] += 1
+                has_more = None
+                if style == 'cursor':
+                    result, value = result
+                    has_more = bool(value)
+                elif isinstance(result, tuple):
+                    result, has_more = result
+                result = list(result or [])
+                yield [entry for entry in result if entry is not None]
+                if has_more is None:
+                    has_more = result and not (page_size and len(result) < page_size)
+                if not has_more:
+                    break
+                if style == 'pages':
+                    value += 1
+                elif style == 'offset':
+                    value += page_size or len(result)
+
+        try:
+            for entries in prefetch_iter(pages(), prefetch):
+                for entry in entries:
+                    yield entry
+        finally:
+            if self._downloader.params.get('verbose', False) and stats['pages']:
+                self._downloader.to_screen(
+                    '[debug] %s: %s: %d pages downloaded in %.2fs, %.2fs per page, '
+                    'slowest %.2fs, %d retries' % (
+                        self.IE_NAME, playlist_id, stats['pages'], stats['time'],
+                        stats['time'] / stats['pages'], stats['slowest'], stats['retries']))
+
     def _search_regex(self, pattern, string, name, default=NO_DEFAULT, fatal=True, flags=0, group=None):
         """
         Perform a regex search on the given string, using a single or a list of
@@ -0,0 +1,298 @@
+from __future__ import unicode_literals
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+from .common import InfoExtractor
+from ..compat import (
+    compat_chr,
+    compat_str,
+)
+
+try:
+    from .lazy_extractors import LazyLoadExtractor
+except ImportError:
+    LazyLoadExtractor = None
+
+
+# Characters that may end the host part of a _VALID_URL pattern
+_HOST_TERMINATORS = '/?#:'
+# Host part of a pattern running up to the end of the string ($)
+_END = None
+
+_SCHEME_CHARS = 'abcdefghijklmnopqrstuvwxyz0123456789+.-'
+_SCHEME_SEPARATOR = (':', '/', '/')
+
+_MAX_EXPANSIONS = 512
+
+# Implementations of suitable() that only match _VALID_URL
+_DEFAULT_SUITABLE = tuple(
+    cls.suitable.__func__ for cls in (InfoExtractor, LazyLoadExtractor)
+    if cls is not None)
+
+
+class _TooComplex(Exception):
+    pass
+
+
+class _Wildcard(object):
+    """ Any string that may contain some of the host terminators """
+
+    def __init__(self, terminators):
+        self.terminators = terminators
+
+
+def _is_literal(item):
+    return isinstance(item, compat_str)
+
+
+def _class_matches(items, char):
+    code = ord(char)
+    negate = False
+    for op, av in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            if av == code:
+                return not negate
+        elif op == sre_parse.RANGE:
+            if av[0] <= code <= av[1]:
+                return not negate
+        elif op == sre_parse.CATEGORY and av in (
+                sre_parse.CATEGORY_DIGIT, sre_parse.CATEGORY_WORD,
+                sre_parse.CATEGORY_SPACE):
+            # None of the host terminators is a digit, word or space character
+            continue
+        else:
+            return True
+    return negate
+
+
+def _matchable_terminators(nodes):
+    """ Return the host terminators a subpattern may consume """
+    terminators = set()
+    for op, av in nodes:
+        if op == sre_parse.LITERAL:
+            if compat_chr(av) in _HOST_TERMINATORS:
+                terminators.add(compat_chr(av))
+        elif op == sre_parse.NOT_LITERAL:
+            terminators.update(c for c in _HOST_TERMINATORS if ord(c) != av)
+        elif op == sre_parse.IN:
+            terminators.update(c for c in _HOST_TERMINATORS if _class_matches(av, c))
+        elif op == sre_parse.BRANCH:
+            for branch in av[1]:
+                terminators.update(_matchable_terminators(branch))
+        elif op == sre_parse.SUBPATTERN:
+            terminators.update(_matchable_terminators(av[-1]))
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            terminators.update(_matchable_terminators(av[2]))
+        elif op in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            continue
+        else:
+            return set(_HOST_TERMINATORS)
+    return terminators
+
+
+def _host_start(items):
+    """
+    Return the index at which the host starts in an expansion, 0 if it has
+    no scheme or None if that is not known yet
+    """
+    for i, item in enumerate(items):
+        if _is_literal(item) and item in _SCHEME_CHARS:
+            continue
+        tail = tuple(items[i:i + 3])
+        if i > 0 and tail == _SCHEME_SEPARATOR[:len(tail)]:
+            return i + 3 if len(tail) == 3 else None
+        return 0
+    return None
+
+
+def _is_complete(items):
+    """ Whether an expansion already covers the whole host """
+    # Complete expansions are never extended, so only the last item may
+    # have completed it
+    if not items or not (items[-1] is _END or _is_literal(items[-1]) and items[-1] in _HOST_TERMINATORS):
+        return False
+    host_start = _host_start(items)
+    if host_start is None:
+        return False
+    return any(
+        item is _END or _is_literal(item) and item in _HOST_TERMINATORS
+        for item in items[host_start:])
+
+
+def _expand(nodes, prefixes):
+    """
+    Expand a parsed pattern into the list of item sequences it may match
+    up to the end of the host, items being single literal characters
+    (lowercased), _Wildcard instances or _END
+    """
+    complete = set()
+    for op, av in nodes:
+        new_prefixes = []
+        for prefix in prefixes:
+            if prefix in complete or _is_complete(prefix):
+                complete.add(prefix)
+                new_prefixes.append(prefix)
+            elif op == sre_parse.LITERAL:
+                new_prefixes.append(prefix + (compat_chr(av).lower(),))
+            elif op == sre_parse.IN and len(av) <= 4 and all(o == sre_parse.LITERAL for o, _ in av):
+                for _, c in av:
+                    new_prefixes.append(prefix + (compat_chr(c).lower(),))
+            elif op == sre_parse.BRANCH:
+                for branch in av[1]:
+                    new_prefixes.extend(_expand(branch, [prefix]))
+            elif op == sre_parse.SUBPATTERN:
+                new_prefixes.extend(_expand(av[-1], [prefix]))
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and av[1] == 1:
+                if av[0] == 0:
+                    new_prefixes.append(prefix)
+                new_prefixes.extend(_expand(av[2], [prefix]))
+            elif op == sre_parse.AT:
+                if av in (sre_parse.AT_END, sre_parse.AT_END_STRING):
+                    new_prefixes.append(prefix + (_END,))
+                else:
+                    new_prefixes.append(prefix)
+            elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+                # Zero-width, ignoring them only makes the pattern broader
+                new_prefixes.append(prefix)
+            else:
+                new_prefixes.append(prefix + (_Wildcard(_matchable_terminators([(op, av)])),))
+        if len(new_prefixes) > _MAX_EXPANSIONS:
+            raise _TooComplex()
+        prefixes = new_prefixes
+    return prefixes
+
+
+def _host_key(items):
+    """
+    Return a (has_scheme, terminator, suffix) tuple such that the host of
+    every URL matched by the expansion, i.e. the text following the scheme
+    (if any) up to the first terminator, ends with suffix.
+    Return None if there is no such suffix.
+    """
+    host_start = _host_start(items) or 0
+    suffix = ''
+    wildcards = []
+    for item in items[host_start:]:
+        if isinstance(item, _Wildcard):
+            wildcards.append(item)
+            suffix = ''
+        elif item is _END or item in _HOST_TERMINATORS:
+            terminator = item
+            break
+        else:
+            suffix += item
+    else:
+        # re.match only anchors at the start, so the host may go on
+        return None
+    # With $ the host is the rest of the URL and the wildcards may match anything
+    if not suffix or terminator is not _END and any(terminator in w.terminators for w in wildcards):
+        return None
+    return host_start > 0, terminator, suffix
+
+
+def url_host_keys(valid_url):
+    """
+    Return the set of (has_scheme, terminator, host suffix) keys of a
+    _VALID_URL pattern, or None if a URL matching it may have any host.
+    """
+    try:
+        expansions = _expand(sre_parse.parse(valid_url).data, [()])
+    except (_TooComplex, RuntimeError, sre_parse.error):
+        return None
+    keys = set()
+    for items in expansions:
+        key = _host_key(items)
+        if key is None:
+            return None
+        keys.add(key)
+    # A host ending with www.example.com also ends with example.com
+    return set(
+        key for key in keys
+        if not any(
+            other != key and other[:2] == key[:2] and key[2].endswith(other[2])
+            for other in keys))
+
+
+def _url_host(url, has_scheme, terminator):
+    if has_scheme:
+        scheme_end = url.find('://')
+        if scheme_end <= 0:
+            return None
+        url = url[scheme_end + 3:]
+    if terminator is _END:
+        # $ also matches before a trailing newline
+        return url[:-1] if url.endswith('\n') else url
+    return url.partition(terminator)[0]
+
+
+class ExtractorDispatchIndex(object):
+    """
+    Index of info extractors by the hosts their _VALID_URL can match.
+
+    candidates(url) returns, in their original order, the extractors that
+    may be suitable for url: the ones whose _VALID_URL only matches hosts
+    that url's host ends with, plus every extractor that can not be indexed
+    (custom suitable(), host-agnostic _VALID_URL, etc.). Looking for the
+    first suitable extractor among the candidates therefore gives the same
+    result as looking for it among all extractors.
+    """
+
+    def __init__(self, ies=()):
+        self._ies = []
+        self._fallback = []
+        # (has_scheme, terminator) -> host suffix -> positions
+        self._indexes = {}
+        self._suffix_lengths = {}
+        for ie in ies:
+            self.add(ie)
+
+    def add(self, ie):
+        """ Add an extractor after all the ones already indexed """
+        pos = len(self._ies)
+        self._ies.append(ie)
+        keys = self._ie_keys(ie)
+        if keys is None:
+            self._fallback.append(pos)
+            return
+        for has_scheme, terminator, suffix in keys:
+            key = (has_scheme, terminator)
+            self._indexes.setdefault(key, {}).setdefault(suffix, []).append(pos)
+            lengths = self._suffix_lengths.setdefault(key, [])
+            if len(suffix) not in lengths:
+                lengths.append(len(suffix))
+                lengths.sort()
+
+    @staticmethod
+    def _ie_keys(ie):
+        ie_class = ie if isinstance(ie, type) else type(ie)
+        suitable = getattr(ie_class.suitable, '__func__', ie_class.suitable)
+        if suitable not in _DEFAULT_SUITABLE:
+            return None
+        valid_url = getattr(ie_class, '_VALID_URL', None)
+        if not isinstance(valid_url, compat_str):
+            return None
+        return url_host_keys(valid_url)
+
+    def candidates(self, url):
+        try:
+            url.encode('ascii')
+        except UnicodeError:
+            # Case-insensitive matching of non-ASCII characters does not
+            # always agree with lower()
+            return list(self._ies)
+        lower_url = url.lower()
+        positions = set(self._fallback)
+        for (has_scheme, terminator), index in self._indexes.items():
+            host = _url_host(lower_url, has_scheme, terminator)
+            if host is None:
+                continue
+            for length in self._suffix_lengths[(has_scheme, terminator)]:
+                if length > len(host):
+                    break
+                positions.update(index.get(host[-length:], ()))
+        return [self._ies[pos] for pos in sorted(positions)]
@@ -2360,7 +2360,12 @@ class GenericIE(InfoExtractor):
             # It may probably better to solve this by checking Content-Type for application/octet-stream
             # after HEAD request finishes, but not sure if we can rely on this.
             request.add_header('Accept-Encoding', '*')
-            full_response = self._request_webpage(request, video_id)
+            if re.match(r'^(?:text/html|application/xhtml\+xml)', content_type):
+                # A webpage, which the extractor of an embedded video may
+                # request as well
+                full_response = self._request_memoized_webpage(request, video_id)
+            else:
+                full_response = self._request_webpage(request, video_id)
 
         first_bytes = full_response.read(512)
 
@@ -1,6 +1,5 @@
 from __future__ import unicode_literals
 
-import itertools
 import hashlib
 import json
 import re
@@ -252,7 +251,7 @@ class InstagramPlaylistIE(InfoExtractor):
 
     def _extract_graphql(self, data, url):
         # Parses GraphQL queries containing videos and generates a playlist.
-        def get_count(suffix):
+        def get_count(node, suffix):
             return int_or_none(try_get(
                 node, lambda x: x['edge_media_' + suffix]['count']))
 
@@ -260,8 +259,7 @@ class InstagramPlaylistIE(InfoExtractor):
         csrf_token = data['config']['csrf_token']
         rhx_gis = data.get('rhx_gis') or '3c7ca9dcefcf966d11dacf1f151335e8'
 
-        cursor = ''
-        for page_num in itertools.count(1):
+        def get_page(cursor, page_num):
             variables = {
                 'first': 12,
                 'after': cursor,
@@ -306,8 +304,9 @@ class InstagramPlaylistIE(InfoExtractor):
 
             edges = media.get('edges')
             if not edges or not isinstance(edges, list):
-                break
+                return [], None
 
+            entries = []
             for edge in edges:
                 node = edge.get('node')
                 if not node or not isinstance(node, dict):
@@ -328,8 +327,8 @@ class InstagramPlaylistIE(InfoExtractor):
                 thumbnail = node.get('thumbnail_src') or node.get('display_src')
                 timestamp = int_or_none(node.get('taken_at_timestamp'))
 
-                comment_count = get_count('to_comment')
-                like_count = get_count('preview_like')
+                comment_count = get_count(node, 'to_comment')
+                like_count = get_count(node, 'preview_like')
                 view_count = int_or_none(node.get('video_view_count'))
 
                 info.update({
@@ -341,19 +340,22 @@ class InstagramPlaylistIE(InfoExtractor):
                     'view_count': view_count,
                 })
 
-                yield info
+                entries.append(info)
 
             page_info = media.get('page_info')
             if not page_info or not isinstance(page_info, dict):
-                break
+                return entries, None
 
             has_next_page = page_info.get('has_next_page')
             if not has_next_page:
-                break
+                return entries, None
 
             cursor = page_info.get('end_cursor')
             if not cursor or not isinstance(cursor, compat_str):
-                break
+                return entries, None
+            return entries, cursor
+
+        return self._paginate(get_page, uploader_id, style='cursor', start='')
 
     def _real_extract(self, url):
         user_or_tag = self._match_id(url)
@@ -1,7 +1,6 @@
 # coding: utf-8
 from __future__ import unicode_literals
 
-import itertools
 import json
 import re
 
@@ -315,18 +314,16 @@ class MailRuMusicSearchIE(MailRuMusicSearchBaseIE):
     def _real_extract(self, url):
         query = compat_urllib_parse_unquote(self._match_id(url))
 
-        entries = []
-
         LIMIT = 100
-        offset = 0
 
-        for _ in itertools.count(1):
+        def get_page(offset, _):
             search = self._search(query, url, query, LIMIT, offset)
 
             music_data = search.get('MusicData')
             if not music_data or not isinstance(music_data, list):
-                break
+                return [], None
 
+            entries = []
             for t in music_data:
                 track = self._extract_track(t, fatal=False)
                 if track:
@@ -337,8 +334,10 @@ class MailRuMusicSearchIE(MailRuMusicSearchBaseIE):
 
             if total is not None:
                 if offset > total:
-                    break
+                    return entries, None
+
+            return entries, offset + LIMIT
 
-            offset += LIMIT
+        entries = list(self._paginate(get_page, query, style='cursor', start=0))
 
         return self.playlist_result(entries, query)
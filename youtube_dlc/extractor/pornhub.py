@@ -2,7 +2,6 @@
 from __future__ import unicode_literals
 
 import functools
-import itertools
 import operator
 import re
 
@@ -469,22 +468,21 @@ class PornHubPagedPlaylistBaseIE(PornHubPlaylistBaseIE):
         page = int_or_none(self._search_regex(
             r'\bpage=(\d+)', url, 'page', default=None))
 
-        entries = []
-        for page_num in (page, ) if page is not None else itertools.count(1):
+        def get_page(page_num, _):
             try:
                 webpage = self._download_webpage(
                     url, item_id, 'Downloading page %d' % page_num,
                     query={'page': page_num})
             except ExtractorError as e:
                 if isinstance(e.cause, compat_HTTPError) and e.cause.code == 404:
-                    break
+                    return []
                 raise
             page_entries = self._extract_entries(webpage, host)
-            if not page_entries:
-                break
-            entries.extend(page_entries)
-            if not self._has_more(webpage):
-                break
+            # Only the page in the URL if any
+            return page_entries, bool(
+                page_entries and page is None and self._has_more(webpage))
+
+        entries = list(self._paginate(get_page, item_id, start=page))
 
         return self.playlist_result(orderedSet(entries), item_id)
 
@@ -2,7 +2,6 @@
 from __future__ import unicode_literals
 
 import re
-import itertools
 
 from .common import InfoExtractor
 from ..compat import (
@@ -195,8 +194,7 @@ class RutubePlaylistBaseIE(RutubeBaseIE):
         return self._PAGE_TEMPLATE % (playlist_id, page_num)
 
     def _entries(self, playlist_id, *args, **kwargs):
-        next_page_url = None
-        for pagenum in itertools.count(1):
+        def get_page(next_page_url, pagenum):
             page = self._download_json(
                 next_page_url or self._next_page_url(
                     pagenum, playlist_id, *args, **kwargs),
@@ -204,8 +202,9 @@ class RutubePlaylistBaseIE(RutubeBaseIE):
 
             results = page.get('results')
             if not results or not isinstance(results, list):
-                break
+                return [], None
 
+            entries = []
             for result in results:
                 video_url = url_or_none(result.get('video_url'))
                 if not video_url:
@@ -216,11 +215,13 @@ class RutubePlaylistBaseIE(RutubeBaseIE):
                     'url': video_url,
                     'ie_key': RutubeIE.ie_key(),
                 })
-                yield entry
+                entries.append(entry)
 
-            next_page_url = page.get('next')
-            if not next_page_url or not page.get('has_next'):
-                break
+            if not page.get('has_next'):
+                return entries, None
+            return entries, page.get('next')
+
+        return self._paginate(get_page, playlist_id, style='cursor')
 
     def _extract_playlist(self, playlist_id, *args, **kwargs):
         return self.playlist_result(
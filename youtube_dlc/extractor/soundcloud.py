@@ -1,7 +1,6 @@
 # coding: utf-8
 from __future__ import unicode_literals
 
-import itertools
 import re
 import json
 import random
@@ -659,13 +658,23 @@ class SoundcloudPagedPlaylistBaseIE(SoundcloudIE):
         query = COMMON_QUERY.copy()
         query['offset'] = 0
 
-        next_href = base_url
+        def resolve_entry(candidates):
+            for cand in candidates:
+                if not isinstance(cand, dict):
+                    continue
+                permalink_url = url_or_none(cand.get('permalink_url'))
+                if not permalink_url:
+                    continue
+                return self.url_result(
+                    permalink_url,
+                    SoundcloudIE.ie_key() if SoundcloudIE.suitable(permalink_url) else None,
+                    str_or_none(cand.get('id')), cand.get('title'))
 
-        entries = []
-        for i in itertools.count():
+        def get_page(cursor, page_num):
+            next_href, query = cursor
             response = self._download_json(
                 next_href, playlist_id,
-                'Downloading track page %s' % (i + 1), query=query, headers=self._HEADERS)
+                'Downloading track page %s' % page_num, query=query, headers=self._HEADERS)
 
             collection = response['collection']
 
@@ -674,32 +683,21 @@ class SoundcloudPagedPlaylistBaseIE(SoundcloudIE):
 
             # Empty collection may be returned, in this case we proceed
             # straight to next_href
-
-            def resolve_entry(candidates):
-                for cand in candidates:
-                    if not isinstance(cand, dict):
-                        continue
-                    permalink_url = url_or_none(cand.get('permalink_url'))
-                    if not permalink_url:
-                        continue
-                    return self.url_result(
-                        permalink_url,
-                        SoundcloudIE.ie_key() if SoundcloudIE.suitable(permalink_url) else None,
-                        str_or_none(cand.get('id')), cand.get('title'))
-
-            for e in collection:
-                entry = resolve_entry((e, e.get('track'), e.get('playlist')))
-                if entry:
-                    entries.append(entry)
+            entries = [
+                resolve_entry((e, e.get('track'), e.get('playlist')))
+                for e in collection]
 
             next_href = response.get('next_href')
             if not next_href:
-                break
+                return entries, None
 
-            next_href = response['next_href']
             parsed_next_href = compat_urlparse.urlparse(next_href)
             query = compat_urlparse.parse_qs(parsed_next_href.query)
             query.update(COMMON_QUERY)
+            return entries, (next_href, query)
+
+        entries = list(self._paginate(
+            get_page, playlist_id, style='cursor', start=(base_url, query)))
 
         return {
             '_type': 'playlist',
@@ -877,29 +875,24 @@ class SoundcloudSearchIE(SearchInfoExtractor, SoundcloudIE):
         })
         next_url = update_url_query(self._API_V2_BASE + endpoint, query)
 
-        collected_results = 0
+        collected_results = [0]  # Python 2 does not support nonlocal
 
-        for i in itertools.count(1):
+        def get_page(next_url, page_num):
             response = self._download_json(
-                next_url, collection_id, 'Downloading page {0}'.format(i),
+                next_url, collection_id, 'Downloading page {0}'.format(page_num),
                 'Unable to download API page', headers=self._HEADERS)
 
-            collection = response.get('collection', [])
-            if not collection:
-                break
-
-            collection = list(filter(bool, collection))
-            collected_results += len(collection)
-
-            for item in collection:
-                yield self.url_result(item['uri'], SoundcloudIE.ie_key())
+            collection = list(filter(bool, response.get('collection') or []))
+            collected_results[0] += len(collection)
+            entries = [
+                self.url_result(item['uri'], SoundcloudIE.ie_key())
+                for item in collection]
 
-            if not collection or collected_results >= limit:
-                break
+            if not collection or collected_results[0] >= limit:
+                return entries, None
+            return entries, response.get('next_href')
 
-            next_url = response.get('next_href')
-            if not next_url:
-                break
+        return self._paginate(get_page, collection_id, style='cursor', start=next_url)
 
     def _get_n_results(self, query, n):
         tracks = self._get_collection('search/tracks', query, limit=n, q=query)
@@ -2,7 +2,6 @@
 from __future__ import unicode_literals
 
 import collections
-import itertools
 import json
 import random
 import re
@@ -41,6 +40,8 @@ class TwitchBaseIE(InfoExtractor):
     _LOGIN_POST_URL = 'https://passport.twitch.tv/login'
     _CLIENT_ID = 'kimne78kx3ncx6brgo4mv6wki5h1ko'
     _NETRC_MACHINE = 'twitch'
+    # The live status and the usher tokens change faster than announced
+    _HTTP_CACHE = False
 
     def _handle_error(self, response):
         if not isinstance(response, dict):
@@ -402,10 +403,10 @@ class TwitchCollectionIE(TwitchGraphQLBaseIE):
 
 class TwitchPlaylistBaseIE(TwitchGraphQLBaseIE):
     def _entries(self, channel_name, *args):
-        cursor = None
         variables_common = self._make_variables(channel_name, *args)
         entries_key = '%ss' % self._ENTRY_KIND
-        for page_num in itertools.count(1):
+
+        def get_page(cursor, page_num):
             variables = variables_common.copy()
             variables['limit'] = self._PAGE_LIMIT
             if cursor:
@@ -418,11 +419,13 @@ class TwitchPlaylistBaseIE(TwitchGraphQLBaseIE):
                 'Downloading %ss GraphQL page %s' % (self._NODE_KIND, page_num),
                 fatal=False)
             if not page:
-                break
+                return [], None
             edges = try_get(
                 page, lambda x: x[0]['data']['user'][entries_key]['edges'], list)
             if not edges:
-                break
+                return [], None
+            entries = []
+            next_cursor = None
             for edge in edges:
                 if not isinstance(edge, dict):
                     continue
@@ -435,22 +438,24 @@ class TwitchPlaylistBaseIE(TwitchGraphQLBaseIE):
                     continue
                 entry = self._extract_entry(node)
                 if entry:
-                    cursor = edge.get('cursor')
-                    yield entry
-            if not cursor or not isinstance(cursor, compat_str):
-                break
+                    next_cursor = edge.get('cursor')
+                    entries.append(entry)
+            if not isinstance(next_cursor, compat_str):
+                next_cursor = None
+            return entries, next_cursor
+
+        return self._paginate(get_page, channel_name, style='cursor')
 
     # Deprecated kraken v5 API
     def _entries_kraken(self, channel_name, broadcast_type, sort):
         access_token = self._download_access_token(channel_name)
         channel_id = self._extract_channel_id(access_token['token'], channel_name)
-        offset = 0
-        counter_override = None
-        for counter in itertools.count(1):
+
+        def get_page(offset, page_num):
             response = self._call_api(
                 'kraken/channels/%s/videos/' % channel_id,
                 channel_id,
-                'Downloading video JSON page %s' % (counter_override or counter),
+                'Downloading video JSON page %s' % page_num,
                 query={
                     'offset': offset,
                     'limit': self._PAGE_LIMIT,
@@ -459,14 +464,15 @@ class TwitchPlaylistBaseIE(TwitchGraphQLBaseIE):
                 })
             videos = response.get('videos')
             if not isinstance(videos, list):
-                break
+                return []
+            entries = []
             for video in videos:
                 if not isinstance(video, dict):
                     continue
                 video_url = url_or_none(video.get('url'))
                 if not video_url:
                     continue
-                yield {
+                entries.append({
                     '_type': 'url_transparent',
                     'ie_key': TwitchVodIE.ie_key(),
                     'id': video.get('_id'),
@@ -477,11 +483,12 @@ class TwitchPlaylistBaseIE(TwitchGraphQLBaseIE):
                     'duration': float_or_none(video.get('length')),
                     'view_count': int_or_none(video.get('views')),
                     'language': video.get('language'),
-                }
-            offset += self._PAGE_LIMIT
+                })
             total = int_or_none(response.get('_total'))
-            if total and offset >= total:
-                break
+            return entries, not (total and offset + self._PAGE_LIMIT >= total)
+
+        return self._paginate(
+            get_page, channel_id, style='offset', page_size=self._PAGE_LIMIT)
 
 
 class TwitchVideosIE(TwitchPlaylistBaseIE):
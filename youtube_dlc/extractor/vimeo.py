@@ -5,7 +5,6 @@ import base64
 import functools
 import json
 import re
-import itertools
 
 from .common import InfoExtractor
 from ..compat import (
@@ -843,39 +842,42 @@ class VimeoChannelIE(VimeoBaseInfoExtractor):
         return self._TITLE or self._html_search_regex(
             self._TITLE_RE, webpage, 'list title', fatal=False)
 
-    def _title_and_entries(self, list_id, base_url):
-        for pagenum in itertools.count(1):
-            page_url = self._page_url(base_url, pagenum)
-            webpage = self._download_webpage(
-                page_url, list_id,
-                'Downloading page %s' % pagenum)
+    def _extract_page_entries(self, base_url, webpage):
+        # Try extracting href first since not all videos are available via
+        # short https://vimeo.com/id URL (e.g. https://vimeo.com/channels/tributes/6213729)
+        clips = re.findall(
+            r'id="clip_(\d+)"[^>]*>\s*<a[^>]+href="(/(?:[^/]+/)*\1)(?:[^>]+\btitle="([^"]+)")?', webpage)
+        if clips:
+            return [
+                self.url_result(
+                    compat_urlparse.urljoin(base_url, video_url),
+                    VimeoIE.ie_key(), video_id=video_id, video_title=video_title)
+                for video_id, video_url, video_title in clips]
+        # More relaxed fallback
+        return [
+            self.url_result(
+                'https://vimeo.com/%s' % video_id,
+                VimeoIE.ie_key(), video_id=video_id)
+            for video_id in re.findall(r'id=["\']clip_(\d+)', webpage)]
 
+    def _extract_videos(self, list_id, base_url):
+        first_page = self._download_webpage(
+            self._page_url(base_url, 1), list_id, 'Downloading page 1')
+
+        def get_page(pagenum, _):
             if pagenum == 1:
-                yield self._extract_list_title(webpage)
-
-            # Try extracting href first since not all videos are available via
-            # short https://vimeo.com/id URL (e.g. https://vimeo.com/channels/tributes/6213729)
-            clips = re.findall(
-                r'id="clip_(\d+)"[^>]*>\s*<a[^>]+href="(/(?:[^/]+/)*\1)(?:[^>]+\btitle="([^"]+)")?', webpage)
-            if clips:
-                for video_id, video_url, video_title in clips:
-                    yield self.url_result(
-                        compat_urlparse.urljoin(base_url, video_url),
-                        VimeoIE.ie_key(), video_id=video_id, video_title=video_title)
-            # More relaxed fallback
+                webpage = first_page
             else:
-                for video_id in re.findall(r'id=["\']clip_(\d+)', webpage):
-                    yield self.url_result(
-                        'https://vimeo.com/%s' % video_id,
-                        VimeoIE.ie_key(), video_id=video_id)
-
-            if re.search(self._MORE_PAGES_INDICATOR, webpage, re.DOTALL) is None:
-                break
+                webpage = self._download_webpage(
+                    self._page_url(base_url, pagenum), list_id,
+                    'Downloading page %s' % pagenum)
+            return (
+                self._extract_page_entries(base_url, webpage),
+                re.search(self._MORE_PAGES_INDICATOR, webpage, re.DOTALL) is not None)
 
-    def _extract_videos(self, list_id, base_url):
-        title_and_entries = self._title_and_entries(list_id, base_url)
-        list_title = next(title_and_entries)
-        return self.playlist_result(title_and_entries, list_id, list_title)
+        return self.playlist_result(
+            self._paginate(get_page, list_id),
+            list_id, self._extract_list_title(first_page))
 
     def _real_extract(self, url):
         channel_id = self._match_id(url)
@@ -1,7 +1,6 @@
 # coding: utf-8
 from __future__ import unicode_literals
 
-import itertools
 import json
 
 from .naver import NaverBaseIE
@@ -285,10 +284,9 @@ class VLiveChannelIE(VLiveBaseIE):
             'decodeChannelCode', 'Code', channel_code,
             'decode channel code', {})['channelSeq']
 
-        channel_name = None
-        entries = []
+        channel_name = [None]  # Python 2 does not support nonlocal
 
-        for page_num in itertools.count(1):
+        def get_page(page_num, _):
             video_list = self._call_api(
                 'getChannelVideoList', 'Seq', channel_seq,
                 'channel list page #%d' % page_num, {
@@ -302,8 +300,8 @@ class VLiveChannelIE(VLiveBaseIE):
                 }
             )
 
-            if not channel_name:
-                channel_name = try_get(
+            if not channel_name[0]:
+                channel_name[0] = try_get(
                     video_list,
                     lambda x: x['channelInfo']['channelName'],
                     compat_str)
@@ -311,8 +309,9 @@ class VLiveChannelIE(VLiveBaseIE):
             videos = try_get(
                 video_list, lambda x: x['videoList'], list)
             if not videos:
-                break
+                return []
 
+            entries = []
             for video in videos:
                 video_id = video.get('videoSeq')
                 video_type = video.get('videoType')
@@ -343,6 +342,10 @@ class VLiveChannelIE(VLiveBaseIE):
                         self.url_result(
                             'http://www.vlive.tv/video/%s' % video_id,
                             ie=VLiveIE.ie_key(), video_id=video_id))
+            # Pages whose videos were all skipped are not the last one
+            return entries, True
+
+        entries = list(self._paginate(get_page, channel_code))
 
         return self.playlist_result(
-            entries, channel_code, channel_name)
+            entries, channel_code, channel_name[0])
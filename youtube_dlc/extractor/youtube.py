@@ -5,6 +5,7 @@ from __future__ import unicode_literals
 
 import itertools
 import json
+import operator
 import os.path
 import random
 import re
@@ -37,6 +38,7 @@ from ..utils import (
     parse_codecs,
     parse_count,
     parse_duration,
+    prefetch_iter,
     remove_quotes,
     remove_start,
     smuggle_url,
@@ -63,6 +65,9 @@ class YoutubeBaseInfoExtractor(InfoExtractor):
     _CHALLENGE_URL = 'https://accounts.google.com/_/signin/sl/challenge'
     _TFA_URL = 'https://accounts.google.com/_/signin/challenge?hl=en&TL={0}'
 
+    # The pages embed the state of the session and expiring stream URLs
+    _HTTP_CACHE = False
+
     _RESERVED_NAMES = (
         r'course|embed|channel|c|user|playlist|watch|w|results|storefront|oops|'
         r'shared|index|account|reporthistory|t/terms|about|upload|signin|logout|'
@@ -1109,9 +1114,14 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
         },
     ]
 
+    # Number of player JS files kept in the cache
+    _PLAYER_CACHE_SIZE = 10
+
     def __init__(self, *args, **kwargs):
         super(YoutubeIE, self).__init__(*args, **kwargs)
         self._player_cache = {}
+        # Interpreted signature functions by player URL
+        self._sig_interpreters = {}
 
     def report_video_info_webpage_download(self, video_id):
         """Report attempt to download video info webpage."""
@@ -1143,45 +1153,73 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
             raise ExtractorError('Cannot identify player %r' % player_url)
         return id_m.group('ext'), id_m.group('id')
 
-    def _extract_signature_function(self, video_id, player_url, example_sig):
-        player_type, player_id = self._extract_player_info(player_url)
-
-        # Read from filesystem cache
-        func_id = '%s_%s_%s' % (
-            player_type, player_id, self._signature_cache_id(example_sig))
-        assert os.path.basename(func_id) == func_id
-
-        cache_spec = self._downloader.cache.load('youtube-sigfuncs', func_id)
-        if cache_spec is not None:
-            return lambda s: ''.join(s[i] for i in cache_spec)
-
-        download_note = (
+    @staticmethod
+    def _compile_sig_spec(cache_spec):
+        """ Return the signature function reordering the characters as in cache_spec """
+        if not cache_spec:
+            return lambda s: ''
+        getter = operator.itemgetter(*cache_spec)
+        return lambda s: ''.join(getter(s))
+
+    def _player_download_note(self, player_url, player_type, player_id):
+        return (
             'Downloading player %s' % player_url
             if self._downloader.params.get('verbose') else
             'Downloading %s player %s' % (player_type, player_id)
         )
+
+    def _load_player_code(self, video_id, player_url, player_type, player_id):
+        """ Return the code of the JS player, downloaded or from the cache """
+        cache_id = '%s_%s' % (player_type, player_id)
+        assert os.path.basename(cache_id) == cache_id
+        code = self._downloader.cache.load('youtube-players', cache_id)
+        if code is not None:
+            return code
+
+        code = self._download_webpage(
+            player_url, video_id,
+            note=self._player_download_note(player_url, player_type, player_id),
+            errnote='Download of %s failed' % player_url)
+        self._downloader.cache.store('youtube-players', cache_id, code)
+        self._downloader.cache.prune('youtube-players', self._PLAYER_CACHE_SIZE)
+        return code
+
+    def _get_sig_interpreter(self, video_id, player_url, player_type, player_id):
+        """ Return the signature function interpreted from the player """
+        if player_url in self._sig_interpreters:
+            return self._sig_interpreters[player_url]
         if player_type == 'js':
-            code = self._download_webpage(
-                player_url, video_id,
-                note=download_note,
-                errnote='Download of %s failed' % player_url)
+            code = self._load_player_code(video_id, player_url, player_type, player_id)
             res = self._parse_sig_js(code)
         elif player_type == 'swf':
             urlh = self._request_webpage(
                 player_url, video_id,
-                note=download_note,
+                note=self._player_download_note(player_url, player_type, player_id),
                 errnote='Download of %s failed' % player_url)
             code = urlh.read()
             res = self._parse_sig_swf(code)
         else:
             assert False, 'Invalid player type %r' % player_type
+        self._sig_interpreters[player_url] = res
+        return res
 
-        test_string = ''.join(map(compat_chr, range(len(example_sig))))
-        cache_res = res(test_string)
-        cache_spec = [ord(c) for c in cache_res]
+    def _extract_signature_function(self, video_id, player_url, example_sig):
+        player_type, player_id = self._extract_player_info(player_url)
 
-        self._downloader.cache.store('youtube-sigfuncs', func_id, cache_spec)
-        return res
+        # Read from filesystem cache
+        func_id = '%s_%s_%s' % (
+            player_type, player_id, self._signature_cache_id(example_sig))
+        assert os.path.basename(func_id) == func_id
+
+        cache_spec = self._downloader.cache.load('youtube-sigfuncs', func_id)
+        if cache_spec is None:
+            # The signature functions only reorder the characters, the
+            # interpreter is run once per signature length to find out how
+            res = self._get_sig_interpreter(video_id, player_url, player_type, player_id)
+            test_string = ''.join(map(compat_chr, range(len(example_sig))))
+            cache_spec = [ord(c) for c in res(test_string)]
+            self._downloader.cache.store('youtube-sigfuncs', func_id, cache_spec)
+        return self._compile_sig_spec(cache_spec)
 
     def _print_sig_code(self, func, example_sig):
         def gen_sig_code(idxs):
@@ -3031,7 +3069,8 @@ class YoutubeTabIE(YoutubeBaseInfoExtractor):
                 'itct': ctp,
             }
 
-    def _entries(self, tab, identity_token):
+    def _entry_pages(self, tab, identity_token):
+        """ Yield the entries of the tab and of its continuations, a list per page """
 
         def extract_entries(parent_renderer):  # this needs to called again for continuation to work with feeds
             contents = try_get(parent_renderer, lambda x: x['contents'], list) or []
@@ -3089,8 +3128,7 @@ class YoutubeTabIE(YoutubeBaseInfoExtractor):
         parent_renderer = (
             try_get(tab, lambda x: x['sectionListRenderer'], dict)
             or try_get(tab, lambda x: x['richGridRenderer'], dict) or {})
-        for entry in extract_entries(parent_renderer):
-            yield entry
+        yield list(extract_entries(parent_renderer))
         continuation = continuation_list[0]
 
         headers = {
@@ -3118,28 +3156,28 @@ class YoutubeTabIE(YoutubeBaseInfoExtractor):
             if continuation_contents:
                 continuation_renderer = continuation_contents.get('playlistVideoListContinuation')
                 if continuation_renderer:
-                    for entry in self._playlist_entries(continuation_renderer):
-                        yield entry
+                    entries = list(self._playlist_entries(continuation_renderer))
                     continuation = self._extract_continuation(continuation_renderer)
+                    yield entries
                     continue
                 continuation_renderer = continuation_contents.get('gridContinuation')
                 if continuation_renderer:
-                    for entry in self._grid_entries(continuation_renderer):
-                        yield entry
+                    entries = list(self._grid_entries(continuation_renderer))
                     continuation = self._extract_continuation(continuation_renderer)
+                    yield entries
                     continue
                 continuation_renderer = continuation_contents.get('itemSectionContinuation')
                 if continuation_renderer:
-                    for entry in self._post_thread_continuation_entries(continuation_renderer):
-                        yield entry
+                    entries = list(self._post_thread_continuation_entries(continuation_renderer))
                     continuation = self._extract_continuation(continuation_renderer)
+                    yield entries
                     continue
                 continuation_renderer = continuation_contents.get('sectionListContinuation')  # for feeds
                 if continuation_renderer:
                     continuation_list = [None]
-                    for entry in extract_entries(continuation_renderer):
-                        yield entry
+                    entries = list(extract_entries(continuation_renderer))
                     continuation = continuation_list[0]
+                    yield entries
                     continue
 
             continuation_items = try_get(
@@ -3151,12 +3189,23 @@ class YoutubeTabIE(YoutubeBaseInfoExtractor):
                 renderer = continuation_item.get('playlistVideoRenderer') or continuation_item.get('itemSectionRenderer')
                 if renderer:
                     video_list_renderer = {'contents': continuation_items}
-                    for entry in self._playlist_entries(video_list_renderer):
-                        yield entry
+                    entries = list(self._playlist_entries(video_list_renderer))
                     continuation = self._extract_continuation(video_list_renderer)
+                    yield entries
                     continue
             break
 
+    def _entries(self, tab, identity_token):
+        # From the second page on, the next continuation is requested in the
+        # background as soon as its token is known, while the entries of the
+        # page are processed
+        depth = self._downloader.params.get('concurrent_pages')
+        if depth is None:
+            depth = 1
+        for entries in prefetch_iter(self._entry_pages(tab, identity_token), depth):
+            for entry in entries:
+                yield entry
+
     @staticmethod
     def _extract_selected_tab(tabs):
         for tab in tabs:
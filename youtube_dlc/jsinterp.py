@@ -26,6 +26,383 @@ _ASSIGN_OPERATORS.append(('=', lambda cur, right: right))
 
 _NAME_RE = r'[a-zA-Z_$][a-zA-Z_$0-9]*'
 
+# Binary operators by increasing precedence, all left-associative
+_PRECEDENCE = (('|',), ('^',), ('&',), ('>>', '<<'), ('-', '+'), ('%', '/', '*'))
+_BINARY_OPERATORS = dict(_OPERATORS)
+_ASSIGN_OPERATORS_DICT = dict(_ASSIGN_OPERATORS)
+
+_TOKEN_RE = re.compile(r'''(?x)
+    \s*(?:
+        (?P<num>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)|
+        (?P<str>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')|
+        (?P<name>%s)|
+        (?P<op>>>=|<<=|>>|<<|[-+*/%%&|^]=?|[=()\[\],.;])
+    )''' % _NAME_RE)
+
+_CONSTANTS = {
+    'true': True,
+    'false': False,
+    'null': None,
+}
+_RESERVED_NAMES = frozenset((
+    'break', 'case', 'catch', 'continue', 'delete', 'do', 'else', 'for',
+    'function', 'if', 'in', 'instanceof', 'new', 'return', 'switch', 'this',
+    'throw', 'try', 'typeof', 'var', 'void', 'while',
+))
+
+# Compiled code by source, shared by all the interpreters since the same
+# functions are found in many players
+_COMPILED_CACHE = {}
+_COMPILED_CACHE_SIZE = 2000
+
+
+def _tokenize(code):
+    tokens = []
+    pos = 0
+    end = len(code.rstrip())
+    while pos < end:
+        m = _TOKEN_RE.match(code, pos)
+        if not m:
+            raise ExtractorError('Unsupported JS expression %r' % code)
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == 'num':
+            value = int(value) if value.isdigit() else float(value)
+        elif kind == 'str':
+            if value[0] == "'":
+                value = '"%s"' % value[1:-1].replace("\\'", "'").replace('"', '\\"')
+            value = json.loads(value)
+        tokens.append((kind, value))
+        pos = m.end()
+    return tokens
+
+
+class _Parser(object):
+    """
+    Parse the tokens of a JS function body, a statement or an expression
+    into a tree of tuples, the first item of each node being its type.
+    """
+
+    def __init__(self, code, max_depth=100):
+        self._code = code
+        self._tokens = _tokenize(code)
+        self._pos = 0
+        self._max_depth = max_depth
+        self._depth = 0
+
+    def _error(self):
+        return ExtractorError('Unsupported JS expression %r' % self._code)
+
+    def _peek(self):
+        if self._pos < len(self._tokens):
+            return self._tokens[self._pos]
+        return None, None
+
+    def _next(self):
+        token = self._peek()
+        self._pos += 1
+        return token
+
+    def _accept(self, op):
+        if self._peek() == ('op', op):
+            self._pos += 1
+            return True
+        return False
+
+    def _expect(self, op):
+        if not self._accept(op):
+            raise self._error()
+
+    def at_end(self):
+        return self._pos >= len(self._tokens)
+
+    def parse_body(self):
+        statements = [self.parse_statement()]
+        while self._accept(';'):
+            statements.append(self.parse_statement())
+        if not self.at_end():
+            raise self._error()
+        return statements
+
+    def parse_statement(self):
+        kind, value = self._peek()
+        if kind is None or (kind, value) == ('op', ';'):
+            return ('empty',)
+        if (kind, value) == ('name', 'var'):
+            self._pos += 1
+            declarations = []
+            while True:
+                kind, name = self._next()
+                if kind != 'name' or name in _RESERVED_NAMES:
+                    raise self._error()
+                value = self.parse_expression() if self._accept('=') else None
+                declarations.append((name, value))
+                if not self._accept(','):
+                    return ('var', declarations)
+        if (kind, value) == ('name', 'return'):
+            self._pos += 1
+            if self.at_end() or self._peek() == ('op', ';'):
+                return ('return', None)
+            return ('return', self.parse_expression())
+        return ('expr', self.parse_expression())
+
+    def parse_expression(self):
+        self._depth += 1
+        if self._depth > self._max_depth:
+            raise ExtractorError('Recursion limit reached')
+        left = self._parse_binary(0)
+        kind, op = self._peek()
+        if kind == 'op' and op in _ASSIGN_OPERATORS_DICT:
+            if left[0] not in ('name', 'member', 'index'):
+                raise self._error()
+            self._pos += 1
+            left = ('assign', op, left, self.parse_expression())
+        self._depth -= 1
+        return left
+
+    def _parse_binary(self, level):
+        if level == len(_PRECEDENCE):
+            return self._parse_unary()
+        left = self._parse_binary(level + 1)
+        while True:
+            kind, op = self._peek()
+            if kind != 'op' or op not in _PRECEDENCE[level]:
+                return left
+            self._pos += 1
+            left = ('binary', op, left, self._parse_binary(level + 1))
+
+    def _parse_unary(self):
+        if self._accept('-'):
+            operand = self._parse_unary()
+            if operand[0] == 'const' and isinstance(operand[1], (int, float)):
+                return ('const', -operand[1])
+            return ('neg', operand)
+        return self._parse_postfix(self._parse_primary())
+
+    def _parse_list(self, closing):
+        items = []
+        if self._accept(closing):
+            return items
+        while True:
+            items.append(self.parse_expression())
+            if self._accept(closing):
+                return items
+            self._expect(',')
+
+    def _parse_primary(self):
+        kind, value = self._next()
+        if kind in ('num', 'str'):
+            return ('const', value)
+        if kind == 'name':
+            if value in _CONSTANTS:
+                return ('const', _CONSTANTS[value])
+            if value in _RESERVED_NAMES:
+                raise self._error()
+            return ('name', value)
+        if (kind, value) == ('op', '('):
+            expr = self.parse_expression()
+            self._expect(')')
+            return expr
+        if (kind, value) == ('op', '['):
+            return ('array', self._parse_list(']'))
+        raise self._error()
+
+    def _parse_postfix(self, node):
+        while True:
+            if self._accept('.'):
+                kind, member = self._next()
+                if kind != 'name':
+                    raise self._error()
+                node = ('member', node, member)
+            elif self._accept('['):
+                node = ('index', node, self.parse_expression())
+                self._expect(']')
+            elif self._accept('('):
+                node = ('call', node, self._parse_list(')'))
+            else:
+                return node
+
+
+def _compile_object(node):
+    """ Compile the object of a member access, the global objects are looked up in the code """
+    if node[0] == 'name':
+        name = node[1]
+
+        def get_object(jsi, local_vars):
+            if name in local_vars:
+                return local_vars[name]
+            return jsi._get_object(name)
+        return get_object
+    return _compile_expression(node)
+
+
+def _call_method(obj, member, argvals):
+    if member == 'split':
+        assert argvals == ('',)
+        return list(obj)
+    if member == 'join':
+        assert len(argvals) == 1
+        return argvals[0].join(obj)
+    if member == 'reverse':
+        assert len(argvals) == 0
+        obj.reverse()
+        return obj
+    if member == 'slice':
+        assert len(argvals) == 1
+        return obj[argvals[0]:]
+    if member == 'splice':
+        assert isinstance(obj, list)
+        index, howMany = argvals
+        res = []
+        for i in range(index, min(index + howMany, len(obj))):
+            res.append(obj.pop(index))
+        return res
+    return obj[member](argvals)
+
+
+def _compile_args(arg_nodes):
+    args = [_compile_expression(arg) for arg in arg_nodes]
+    return lambda jsi, local_vars: tuple([arg(jsi, local_vars) for arg in args])
+
+
+def _compile_expression(node):
+    """ Return a function of (interpreter, local variables) evaluating node """
+    node_type = node[0]
+
+    if node_type == 'const':
+        value = node[1]
+        return lambda jsi, local_vars: value
+
+    if node_type == 'name':
+        name = node[1]
+        return lambda jsi, local_vars: local_vars[name]
+
+    if node_type == 'array':
+        items = [_compile_expression(item) for item in node[1]]
+        return lambda jsi, local_vars: [item(jsi, local_vars) for item in items]
+
+    if node_type == 'neg':
+        operand = _compile_expression(node[1])
+        return lambda jsi, local_vars: -operand(jsi, local_vars)
+
+    if node_type == 'binary':
+        opfunc = _BINARY_OPERATORS[node[1]]
+        left = _compile_expression(node[2])
+        right = _compile_expression(node[3])
+        return lambda jsi, local_vars: opfunc(left(jsi, local_vars), right(jsi, local_vars))
+
+    if node_type == 'member':
+        obj = _compile_object(node[1])
+        member = node[2]
+        if member == 'length':
+            return lambda jsi, local_vars: len(obj(jsi, local_vars))
+        return lambda jsi, local_vars: obj(jsi, local_vars)[member]
+
+    if node_type == 'index':
+        obj = _compile_object(node[1])
+        idx = _compile_expression(node[2])
+        return lambda jsi, local_vars: obj(jsi, local_vars)[idx(jsi, local_vars)]
+
+    if node_type == 'call':
+        callee = node[1]
+        args = _compile_args(node[2])
+        if callee[0] == 'name':
+            funcname = callee[1]
+            return lambda jsi, local_vars: jsi._get_function(funcname)(args(jsi, local_vars))
+        if callee[0] == 'member':
+            obj = _compile_object(callee[1])
+            member = callee[2]
+            return lambda jsi, local_vars: _call_method(
+                obj(jsi, local_vars), member, args(jsi, local_vars))
+        if callee[0] == 'index':
+            obj = _compile_object(callee[1])
+            member = _compile_expression(callee[2])
+            return lambda jsi, local_vars: _call_method(
+                obj(jsi, local_vars), member(jsi, local_vars), args(jsi, local_vars))
+        raise ExtractorError('Unsupported JS function call')
+
+    if node_type == 'assign':
+        opfunc = _ASSIGN_OPERATORS_DICT[node[1]]
+        target = node[2]
+        right = _compile_expression(node[3])
+        if target[0] == 'name':
+            name = target[1]
+
+            def assign(jsi, local_vars):
+                right_val = right(jsi, local_vars)
+                val = local_vars[name] = opfunc(local_vars.get(name), right_val)
+                return val
+            return assign
+
+        obj = _compile_object(target[1])
+        if target[0] == 'member':
+            member = target[2]
+            key = lambda jsi, local_vars: member
+        else:
+            key = _compile_expression(target[2])
+
+        def assign_item(jsi, local_vars):
+            right_val = right(jsi, local_vars)
+            lvar = obj(jsi, local_vars)
+            idx = key(jsi, local_vars)
+            val = lvar[idx] = opfunc(lvar[idx], right_val)
+            return val
+        return assign_item
+
+    assert False, 'Unknown JS node %r' % (node_type,)
+
+
+def _compile_statement(node):
+    """ Return a function of (interpreter, local variables) returning (value, should_abort) """
+    node_type = node[0]
+
+    if node_type == 'empty':
+        return lambda jsi, local_vars: (None, False)
+
+    if node_type == 'return':
+        if node[1] is None:
+            return lambda jsi, local_vars: (None, True)
+        expr = _compile_expression(node[1])
+        return lambda jsi, local_vars: (expr(jsi, local_vars), True)
+
+    if node_type == 'var':
+        declarations = [
+            (name, value and _compile_expression(value)) for name, value in node[1]]
+
+        def declare(jsi, local_vars):
+            val = None
+            for name, value in declarations:
+                val = local_vars[name] = value(jsi, local_vars) if value else None
+            return val, False
+        return declare
+
+    expr = _compile_expression(node[1])
+    return lambda jsi, local_vars: (expr(jsi, local_vars), False)
+
+
+def _compile(kind, code, max_depth=100):
+    """ Parse and compile code, memoized by source """
+    key = (kind, code, max_depth)
+    compiled = _COMPILED_CACHE.get(key)
+    if compiled is not None:
+        return compiled
+
+    parser = _Parser(code, max_depth)
+    if kind == 'body':
+        compiled = [_compile_statement(stmt) for stmt in parser.parse_body()]
+    elif kind == 'statement':
+        compiled = _compile_statement(parser.parse_statement())
+    else:
+        compiled = _compile_expression(
+            parser.parse_expression() if not parser.at_end() else ('const', None))
+    if not parser.at_end():
+        raise parser._error()
+
+    if len(_COMPILED_CACHE) >= _COMPILED_CACHE_SIZE:
+        _COMPILED_CACHE.clear()
+    _COMPILED_CACHE[key] = compiled
+    return compiled
+
 
 class JSInterpreter(object):
     def __init__(self, code, objects=None):
@@ -36,179 +413,20 @@ class JSInterpreter(object):
         self._objects = objects
 
     def interpret_statement(self, stmt, local_vars, allow_recursion=100):
-        if allow_recursion < 0:
-            raise ExtractorError('Recursion limit reached')
-
-        should_abort = False
-        stmt = stmt.lstrip()
-        stmt_m = re.match(r'var\s', stmt)
-        if stmt_m:
-            expr = stmt[len(stmt_m.group(0)):]
-        else:
-            return_m = re.match(r'return(?:\s+|$)', stmt)
-            if return_m:
-                expr = stmt[len(return_m.group(0)):]
-                should_abort = True
-            else:
-                # Try interpreting it as an expression
-                expr = stmt
-
-        v = self.interpret_expression(expr, local_vars, allow_recursion)
-        return v, should_abort
+        return _compile('statement', stmt, allow_recursion)(self, local_vars)
 
     def interpret_expression(self, expr, local_vars, allow_recursion):
-        expr = expr.strip()
-        if expr == '':  # Empty expression
-            return None
-
-        if expr.startswith('('):
-            parens_count = 0
-            for m in re.finditer(r'[()]', expr):
-                if m.group(0) == '(':
-                    parens_count += 1
-                else:
-                    parens_count -= 1
-                    if parens_count == 0:
-                        sub_expr = expr[1:m.start()]
-                        sub_result = self.interpret_expression(
-                            sub_expr, local_vars, allow_recursion)
-                        remaining_expr = expr[m.end():].strip()
-                        if not remaining_expr:
-                            return sub_result
-                        else:
-                            expr = json.dumps(sub_result) + remaining_expr
-                        break
-            else:
-                raise ExtractorError('Premature end of parens in %r' % expr)
-
-        for op, opfunc in _ASSIGN_OPERATORS:
-            m = re.match(r'''(?x)
-                (?P<out>%s)(?:\[(?P<index>[^\]]+?)\])?
-                \s*%s
-                (?P<expr>.*)$''' % (_NAME_RE, re.escape(op)), expr)
-            if not m:
-                continue
-            right_val = self.interpret_expression(
-                m.group('expr'), local_vars, allow_recursion - 1)
-
-            if m.groupdict().get('index'):
-                lvar = local_vars[m.group('out')]
-                idx = self.interpret_expression(
-                    m.group('index'), local_vars, allow_recursion)
-                assert isinstance(idx, int)
-                cur = lvar[idx]
-                val = opfunc(cur, right_val)
-                lvar[idx] = val
-                return val
-            else:
-                cur = local_vars.get(m.group('out'))
-                val = opfunc(cur, right_val)
-                local_vars[m.group('out')] = val
-                return val
+        return _compile('expression', expr, allow_recursion)(self, local_vars)
 
-        if expr.isdigit():
-            return int(expr)
-
-        var_m = re.match(
-            r'(?!if|return|true|false)(?P<name>%s)$' % _NAME_RE,
-            expr)
-        if var_m:
-            return local_vars[var_m.group('name')]
-
-        try:
-            return json.loads(expr)
-        except ValueError:
-            pass
-
-        m = re.match(
-            r'(?P<in>%s)\[(?P<idx>.+)\]$' % _NAME_RE, expr)
-        if m:
-            val = local_vars[m.group('in')]
-            idx = self.interpret_expression(
-                m.group('idx'), local_vars, allow_recursion - 1)
-            return val[idx]
-
-        m = re.match(
-            r'(?P<var>%s)(?:\.(?P<member>[^(]+)|\[(?P<member2>[^]]+)\])\s*(?:\(+(?P<args>[^()]*)\))?$' % _NAME_RE,
-            expr)
-        if m:
-            variable = m.group('var')
-            member = remove_quotes(m.group('member') or m.group('member2'))
-            arg_str = m.group('args')
-
-            if variable in local_vars:
-                obj = local_vars[variable]
-            else:
-                if variable not in self._objects:
-                    self._objects[variable] = self.extract_object(variable)
-                obj = self._objects[variable]
-
-            if arg_str is None:
-                # Member access
-                if member == 'length':
-                    return len(obj)
-                return obj[member]
-
-            assert expr.endswith(')')
-            # Function call
-            if arg_str == '':
-                argvals = tuple()
-            else:
-                argvals = tuple([
-                    self.interpret_expression(v, local_vars, allow_recursion)
-                    for v in arg_str.split(',')])
-
-            if member == 'split':
-                assert argvals == ('',)
-                return list(obj)
-            if member == 'join':
-                assert len(argvals) == 1
-                return argvals[0].join(obj)
-            if member == 'reverse':
-                assert len(argvals) == 0
-                obj.reverse()
-                return obj
-            if member == 'slice':
-                assert len(argvals) == 1
-                return obj[argvals[0]:]
-            if member == 'splice':
-                assert isinstance(obj, list)
-                index, howMany = argvals
-                res = []
-                for i in range(index, min(index + howMany, len(obj))):
-                    res.append(obj.pop(index))
-                return res
-
-            return obj[member](argvals)
-
-        for op, opfunc in _OPERATORS:
-            m = re.match(r'(?P<x>.+?)%s(?P<y>.+)' % re.escape(op), expr)
-            if not m:
-                continue
-            x, abort = self.interpret_statement(
-                m.group('x'), local_vars, allow_recursion - 1)
-            if abort:
-                raise ExtractorError(
-                    'Premature left-side return of %s in %r' % (op, expr))
-            y, abort = self.interpret_statement(
-                m.group('y'), local_vars, allow_recursion - 1)
-            if abort:
-                raise ExtractorError(
-                    'Premature right-side return of %s in %r' % (op, expr))
-            return opfunc(x, y)
-
-        m = re.match(
-            r'^(?P<func>%s)\((?P<args>[a-zA-Z0-9_$,]*)\)$' % _NAME_RE, expr)
-        if m:
-            fname = m.group('func')
-            argvals = tuple([
-                int(v) if v.isdigit() else local_vars[v]
-                for v in m.group('args').split(',')]) if len(m.group('args')) > 0 else tuple()
-            if fname not in self._functions:
-                self._functions[fname] = self.extract_function(fname)
-            return self._functions[fname](argvals)
-
-        raise ExtractorError('Unsupported JS expression %r' % expr)
+    def _get_object(self, objname):
+        if objname not in self._objects:
+            self._objects[objname] = self.extract_object(objname)
+        return self._objects[objname]
+
+    def _get_function(self, funcname):
+        if funcname not in self._functions:
+            self._functions[funcname] = self.extract_function(funcname)
+        return self._functions[funcname]
 
     def extract_object(self, objname):
         _FUNC_NAME_RE = r'''(?:[a-zA-Z$0-9]+|"[a-zA-Z$0-9]+"|'[a-zA-Z$0-9]+')'''
@@ -252,10 +470,15 @@ class JSInterpreter(object):
         return f(args)
 
     def build_function(self, argnames, code):
+        argnames = [argname.strip() for argname in argnames]
+        # Parsed once, the statements are then evaluated for every call
+        statements = _compile('body', code)
+
         def resf(args):
             local_vars = dict(zip(argnames, args))
-            for stmt in code.split(';'):
-                res, abort = self.interpret_statement(stmt, local_vars)
+            res = None
+            for stmt in statements:
+                res, abort = stmt(self, local_vars)
                 if abort:
                     break
             return res
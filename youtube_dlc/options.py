@@ -198,6 +198,19 @@ def parseOpts(overrideArguments=None):
         action='store_true', dest='no_color',
         default=False,
         help='Do not emit color codes in output')
+    general.add_option(
+        '--server',
+        dest='server', metavar='ADDRESS',
+        help=(
+            'Run as a server accepting download jobs through a JSON HTTP API instead of downloading the given URLs. '
+            'ADDRESS is either [HOST:]PORT (HOST defaults to 127.0.0.1) or unix:PATH for a Unix socket. '
+            'POST {"url": URL, "params": {...}} as application/json to /jobs to queue a job, params being YoutubeDL options (see youtube_dlc/YoutubeDL.py) '
+            'selecting what is downloaded, such as format, playlist_items, match_filter or the subtitle ones, that override the command line ones; '
+            'GET /jobs/ID returns its status and progress, DELETE /jobs/ID cancels it while it is queued'))
+    general.add_option(
+        '--server-workers',
+        dest='server_workers', metavar='N', default=1, type=int,
+        help='Number of jobs run at the same time in server mode (default is %default)')
 
     network = optparse.OptionGroup(parser, 'Network Options')
     network.add_option(
@@ -226,6 +239,11 @@ def parseOpts(overrideArguments=None):
         action='store_const', const='::', dest='source_address',
         help='Make all connections via IPv6',
     )
+    network.add_option(
+        '--no-keep-alive',
+        action='store_false', dest='keep_alive', default=True,
+        help='Do not reuse HTTP connections, open a new one for every request',
+    )
 
     geo = optparse.OptionGroup(parser, 'Geo Restriction')
     geo.add_option(
@@ -344,10 +362,31 @@ def parseOpts(overrideArguments=None):
         '--download-archive', metavar='FILE',
         dest='download_archive',
         help='Download only videos not listed in the archive file. Record the IDs of all downloaded videos in it.')
+    selection.add_option(
+        '--archive-format', metavar='FORMAT',
+        dest='download_archive_format', default=None,
+        help=(
+            'Format of the archive file: "text" (one ID per line, loaded in memory) or "sqlite" '
+            '(indexed database, for large archives shared by several processes). '
+            'Detected from the file by default, new files are created as text'))
+    selection.add_option(
+        '--import-archive', metavar='FILE',
+        dest='import_archive', default=None,
+        help='Add the IDs listed in a text archive file to the --download-archive')
+    selection.add_option(
+        '--export-archive', metavar='FILE',
+        dest='export_archive', default=None,
+        help='Write the IDs recorded in the --download-archive to a text archive file')
     selection.add_option(
         '--break-on-existing',
         action='store_true', dest='break_on_existing', default=False,
         help="Stop the download process after attempting to download a file that's in the archive.")
+    selection.add_option(
+        '--break-on-dateafter',
+        action='store_true', dest='break_on_dateafter', default=False,
+        help=(
+            'Stop processing a playlist at the first video uploaded before --dateafter. '
+            'Only use it with playlists sorted by upload date, newest first'))
     selection.add_option(
         '--include-ads',
         dest='include_ads', action='store_true',
@@ -474,6 +513,10 @@ def parseOpts(overrideArguments=None):
         '--fragment-retries',
         dest='fragment_retries', metavar='RETRIES', default=10,
         help='Number of retries for a fragment (default is %default), or "infinite" (DASH, hlsnative and ISM)')
+    downloader.add_option(
+        '--extractor-retries',
+        dest='extractor_retries', metavar='RETRIES', default=3,
+        help='Number of retries for a page of a playlist listing failing with a network error (default is %default), or "infinite"')
     downloader.add_option(
         '--skip-unavailable-fragments',
         action='store_true', dest='skip_unavailable_fragments', default=True,
@@ -486,6 +529,24 @@ def parseOpts(overrideArguments=None):
         '--keep-fragments',
         action='store_true', dest='keep_fragments', default=False,
         help='Keep downloaded fragments on disk after downloading is finished; fragments are erased by default')
+    downloader.add_option(
+        '-N', '--concurrent-fragments',
+        dest='concurrent_fragment_downloads', metavar='N', default=1, type=int,
+        help='Number of fragments to download concurrently (default is %default) (DASH and hlsnative)')
+    downloader.add_option(
+        '--concurrent-playlist-entries',
+        dest='concurrent_playlist_entries', metavar='N', default=1, type=int,
+        help=(
+            'Number of playlist entries to extract concurrently (default is %default). '
+            'The videos are still downloaded one at a time and in playlist order'))
+    downloader.add_option(
+        '--concurrent-pages',
+        dest='concurrent_pages', metavar='N', default=1, type=int,
+        help=(
+            'Number of pages of a playlist listing to download concurrently, '
+            'or ahead of the videos being processed, for the sites whose '
+            'playlists are paged (default is %default). With 0, the pages are '
+            'downloaded one at a time when their videos are needed'))
     downloader.add_option(
         '--buffer-size',
         dest='buffersize', metavar='SIZE', default='1024',
@@ -511,6 +572,21 @@ def parseOpts(overrideArguments=None):
         '--playlist-random',
         action='store_true',
         help='Download playlist videos in random order')
+    downloader.add_option(
+        '--lazy-playlist',
+        action='store_true', dest='lazy_playlist', default=False,
+        help=(
+            'Download the videos of playlists as their entries are extracted instead of collecting all of them first. '
+            'The total number of entries is then unknown. Cannot be used with --playlist-items, '
+            '--playlist-reverse or --playlist-random'))
+    downloader.add_option(
+        '--playlist-sync',
+        action='store_true', dest='playlist_sync', default=False,
+        help=(
+            'Remember the downloaded entries of each playlist in the cache directory. The next runs only '
+            'process the new entries and stop fetching the playlist once they reach the entries seen before. '
+            'Runs that do not download, e.g. with --simulate, leave it unchanged. '
+            'For playlists sorted newest first, cannot be used with --playlist-items'))
     downloader.add_option(
         '--xattr-set-filesize',
         dest='xattr_set_filesize', action='store_true',
@@ -584,6 +660,15 @@ def parseOpts(overrideArguments=None):
             'Upper bound of a range for randomized sleep before each download '
             '(maximum possible number of seconds to sleep). Must only be used '
             'along with --min-sleep-interval.'))
+    workarounds.add_option(
+        '--host-limit',
+        metavar='HOST:RATE[:N]', dest='host_limits', action='append',
+        help=(
+            'Send at most RATE requests per second, and open at most N '
+            'requests at once, to HOST and its subdomains, or to any other host '
+            'if HOST is "*" (e.g. example.com:2:4 or example.com::4). The '
+            'requests to a host answering 429 or 503 are always held back for '
+            'a while. You can use this option multiple times'))
     workarounds.add_option(
         '--sleep-subtitles',
         dest='sleep_interval_subtitles', default=0, type=int,
@@ -775,6 +860,27 @@ def parseOpts(overrideArguments=None):
     filesystem.add_option(
         '--no-cache-dir', action='store_const', const=False, dest='cachedir',
         help='Disable filesystem caching')
+    filesystem.add_option(
+        '--http-cache',
+        action='store_true', dest='http_cache', default=False,
+        help='Store the webpages downloaded by the extractors in the cache directory and reuse them while they are fresh, '
+             'or after revalidating them with the server, in later runs')
+    filesystem.add_option(
+        '--no-http-cache',
+        action='store_false', dest='http_cache',
+        help='Do not store the webpages downloaded by the extractors (default)')
+    filesystem.add_option(
+        '--http-cache-size',
+        dest='http_cache_size', metavar='SIZE', default=None,
+        help='Size above which the least recently used webpages are removed from the HTTP cache, e.g. 50k or 44.6m (default is 128m)')
+    filesystem.add_option(
+        '--webpage-memo',
+        action='store_true', dest='webpage_memo', default=True,
+        help='Reuse the response to an identical webpage request made in the last minute of the run, or wait for it if it is in flight (default)')
+    filesystem.add_option(
+        '--no-webpage-memo',
+        action='store_false', dest='webpage_memo',
+        help='Send every webpage request made in the run')
     filesystem.add_option(
         '--rm-cache-dir',
         action='store_true', dest='rm_cachedir',
@@ -0,0 +1,384 @@
+from __future__ import unicode_literals
+
+import collections
+import itertools
+import json
+import os
+import re
+import socket
+import stat
+import threading
+import time
+
+from .compat import (
+    compat_http_server,
+    compat_socketserver,
+    compat_str,
+)
+from .utils import (
+    DownloadError,
+    MaxDownloadsReached,
+    error_to_compat_str,
+    match_filter_func,
+)
+from .YoutubeDL import YoutubeDL
+
+try:
+    import queue
+except ImportError:  # Python 2
+    import Queue as queue
+
+
+# Parameters a job may override: they only select what is downloaded.
+# Others could run commands (external_downloader_args) or write files
+# anywhere (outtmpl, cachedir) on behalf of whoever can reach the server
+_JOB_PARAMS = (
+    'allsubtitles', 'format', 'match_filter', 'matchtitle', 'max_downloads',
+    'max_filesize', 'max_views', 'min_filesize', 'min_views', 'noplaylist',
+    'playlist_items', 'playlistend', 'playlistrandom', 'playlistreverse',
+    'playliststart', 'rejecttitle', 'skip_download', 'subtitlesformat',
+    'subtitleslangs', 'writeautomaticsub', 'writesubtitles',
+)
+
+# Progress fields reported in the job status
+_PROGRESS_FIELDS = (
+    'status', 'filename', 'downloaded_bytes', 'total_bytes',
+    'total_bytes_estimate', 'speed', 'eta', 'elapsed',
+    'fragment_index', 'fragment_count',
+)
+
+
+def _is_socket(path):
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+def parse_server_address(address):
+    """
+    Parse a --server address: unix:PATH or [HOST:]PORT.
+    Return a (socket family, address) tuple.
+    """
+    if address.startswith('unix:'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('Unix sockets are not supported on this platform')
+        path = address[len('unix:'):]
+        if os.path.exists(path) and not _is_socket(path):
+            raise ValueError('%s already exists and is not a socket' % path)
+        return socket.AF_UNIX, path
+    mobj = re.match(r'^(?:(?P<host>.*):)?(?P<port>\d+)$', address)
+    if not mobj:
+        raise ValueError('invalid server address %r' % address)
+    host = (mobj.group('host') or '127.0.0.1').strip('[]')
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    return family, (host, int(mobj.group('port')))
+
+
+class Job(object):
+    def __init__(self, job_id, url, params, ydl_params):
+        self.id = job_id
+        self.url = url
+        self.params = params
+        self.ydl_params = ydl_params
+        self.status = 'queued'
+        self.progress = None
+        self.files = []
+        self.error = None
+        self.retcode = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'params': self.params,
+            'status': self.status,
+            'progress': dict(self.progress) if self.progress else None,
+            'files': list(self.files),
+            'error': self.error,
+            'retcode': self.retcode,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class JobManager(object):
+    """
+    Run download jobs through a fixed number of worker threads.
+
+    Each worker owns a YoutubeDL instance which stays alive between jobs,
+    so extractor instances and their caches, the HTTP connections, the
+    cookie jar and the download archive are set up only once. The workers
+    share the HTTP connections, the cookie jar, the download archive and
+    the per host request limits.
+    """
+
+    # Number of finished jobs whose status is kept
+    MAX_FINISHED_JOBS = 1000
+
+    def __init__(self, ydl_opts, workers=1, ydl=None):
+        self._lock = threading.Lock()
+        self._jobs = collections.OrderedDict()
+        self._finished_ids = collections.deque()
+        self._ids = itertools.count(1)
+        self._queue = queue.Queue()
+        self._ydl_opts = ydl_opts
+        self._ydls = []
+        self._threads = []
+        for _ in range(workers):
+            worker_ydl = self._make_ydl(ydl if not self._ydls else None)
+            self._ydls.append(worker_ydl)
+            thread = threading.Thread(target=self._work, args=(worker_ydl,))
+            thread.daemon = True
+            self._threads.append(thread)
+        for thread in self._threads:
+            thread.start()
+
+    def _make_ydl(self, ydl=None):
+        if ydl is None and not self._ydls:
+            ydl = YoutubeDL(self._ydl_opts)
+        elif ydl is None:
+            # Share the state loaded from disk with the first worker, the
+            # download archive is not opened again
+            first_ydl = self._ydls[0]
+            ydl = YoutubeDL(dict(self._ydl_opts, download_archive=None))
+            ydl.params['download_archive'] = first_ydl.params.get('download_archive')
+            ydl.archive = first_ydl.archive
+            ydl.cookiejar = first_ydl.cookiejar
+            ydl._opener = first_ydl._opener
+            ydl._connection_pool = first_ydl._connection_pool
+            # The host limits and backoffs apply to all the workers
+            ydl._request_scheduler = first_ydl._request_scheduler
+            # Jobs fetching the same page at once share its response
+            ydl.response_memo = first_ydl.response_memo
+        ydl._server_job = None
+        ydl.add_progress_hook(lambda d: self._progress_hook(ydl, d))
+        return ydl
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def submit(self, url, params=None):
+        if not isinstance(url, compat_str) or not url:
+            raise ValueError('url must be a non-empty string')
+        params = params or {}
+        if not isinstance(params, dict):
+            raise ValueError('params must be an object')
+        rejected_params = sorted(set(params) - set(_JOB_PARAMS))
+        if rejected_params:
+            raise ValueError('%s can not be set per job' % ', '.join(rejected_params))
+        ydl_params = dict(params)
+        if params.get('match_filter') is not None:
+            if not isinstance(params['match_filter'], compat_str):
+                raise ValueError('match_filter must be a string')
+            ydl_params['match_filter'] = match_filter_func(params['match_filter'])
+        with self._lock:
+            job = Job(compat_str(next(self._ids)), url, params, ydl_params)
+            self._jobs[job.id] = job
+        self._queue.put(job)
+        return job.to_dict()
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel(self, job_id):
+        """ Cancel a queued job, return False if it is already running """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status != 'queued':
+                return False
+            self._finish(job, 'cancelled')
+            return True
+
+    def _finish(self, job, status):
+        # Must be called with the lock held
+        job.status = status
+        job.finished = time.time()
+        self._finished_ids.append(job.id)
+        while len(self._finished_ids) > self.MAX_FINISHED_JOBS:
+            self._jobs.pop(self._finished_ids.popleft(), None)
+
+    def _progress_hook(self, ydl, d):
+        job = ydl._server_job
+        if job is None:
+            return
+        with self._lock:
+            job.progress = dict(
+                (k, d[k]) for k in _PROGRESS_FIELDS if d.get(k) is not None)
+            if d.get('status') == 'finished' and d.get('filename') not in job.files:
+                job.files.append(d.get('filename'))
+
+    def _work(self, ydl):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            with self._lock:
+                if job.status != 'queued':
+                    continue
+                job.status = 'running'
+                job.started = time.time()
+            status, error = self._run(ydl, job)
+            with self._lock:
+                job.error = error
+                self._finish(job, status)
+
+    def _run(self, ydl, job):
+        saved_params = ydl.params
+        ydl.params = dict(saved_params, **job.ydl_params)
+        ydl._server_job = job
+        # Counters and return code are kept per job
+        ydl._num_downloads = 0
+        ydl._download_retcode = 0
+        try:
+            job.retcode = ydl.download([job.url])
+        except MaxDownloadsReached:
+            job.retcode = 101
+        except DownloadError as err:
+            job.retcode = 1
+            return 'error', error_to_compat_str(err)
+        except Exception as err:
+            # Unexpected errors must not stop the worker
+            job.retcode = 1
+            ydl.to_stderr('[server] Job %s failed: %s' % (job.id, error_to_compat_str(err)))
+            return 'error', error_to_compat_str(err)
+        finally:
+            ydl.params = saved_params
+            ydl._server_job = None
+        return ('finished' if job.retcode in (0, 101) else 'error'), None
+
+
+class _JobRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    """
+    JSON API:
+        POST /jobs           {"url": URL, "params": {...}} queues a job
+        GET /jobs            status of all the jobs
+        GET /jobs/ID         status of a job
+        DELETE /jobs/ID      cancels a queued job
+
+    Requests coming from web pages, which carry an Origin header, are
+    rejected so that the pages open in a browser can not use the server.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def parse_request(self):
+        if not compat_http_server.BaseHTTPRequestHandler.parse_request(self):
+            return False
+        if self.headers.get('Origin') is not None:
+            self._send_error(403, 'cross-origin requests are not allowed')
+            return False
+        return True
+
+    def _send_json(self, status, obj):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', compat_str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {'error': message})
+
+    def _job_id(self):
+        mobj = re.match(r'^/jobs/(?P<id>[^/?#]+)$', self.path)
+        return mobj.group('id') if mobj else None
+
+    def do_GET(self):
+        manager = self.server.job_manager
+        if self.path == '/jobs':
+            return self._send_json(200, manager.list())
+        job_id = self._job_id()
+        job = manager.get(job_id) if job_id else None
+        if job is None:
+            return self._send_error(404, 'no such job')
+        self._send_json(200, job)
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            return self._send_error(404, 'not found')
+        content_type = self.headers.get('Content-Type') or ''
+        if content_type.split(';')[0].strip().lower() != 'application/json':
+            return self._send_error(415, 'Content-Type must be application/json')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length).decode('utf-8'))
+            if not isinstance(request, dict):
+                raise ValueError('expected an object')
+            job = self.server.job_manager.submit(request.get('url'), request.get('params'))
+        except ValueError as err:
+            return self._send_error(400, error_to_compat_str(err))
+        self._send_json(201, job)
+
+    def do_DELETE(self):
+        job_id = self._job_id()
+        cancelled = self.server.job_manager.cancel(job_id) if job_id else None
+        if cancelled is None:
+            return self._send_error(404, 'no such job')
+        if not cancelled:
+            return self._send_error(409, 'job is not queued')
+        self._send_json(200, self.server.job_manager.get(job_id))
+
+
+class _HTTPJobServer(compat_socketserver.ThreadingMixIn, compat_http_server.HTTPServer):
+    daemon_threads = True
+
+
+class _HTTP6JobServer(_HTTPJobServer):
+    address_family = socket.AF_INET6
+
+
+if hasattr(socket, 'AF_UNIX'):
+    class _UnixJobServer(compat_socketserver.ThreadingMixIn, compat_socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            request, _ = compat_socketserver.UnixStreamServer.get_request(self)
+            # BaseHTTPRequestHandler expects a (host, port) client address
+            return request, ('local', 0)
+
+
+def make_server(address, job_manager):
+    family, address = parse_server_address(address)
+    if family == socket.AF_INET:
+        server = _HTTPJobServer(address, _JobRequestHandler)
+    elif family == socket.AF_INET6:
+        server = _HTTP6JobServer(address, _JobRequestHandler)
+    else:
+        # Only a socket left over by a previous server is replaced, never
+        # a file given by mistake
+        if _is_socket(address):
+            os.remove(address)
+        server = _UnixJobServer(address, _JobRequestHandler)
+    server.job_manager = job_manager
+    return server
+
+
+def serve(ydl, ydl_opts, address, workers=1):
+    """ Serve download jobs on address until interrupted """
+    job_manager = JobManager(ydl_opts, workers=workers, ydl=ydl)
+    server = make_server(address, job_manager)
+    ydl.to_screen('[server] Accepting jobs on %s with %d worker(s)' % (address, workers))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if server.address_family == getattr(socket, 'AF_UNIX', None):
+            os.remove(server.server_address)
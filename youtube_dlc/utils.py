@@ -15,7 +15,6 @@ import email.utils
 import email.header
 import errno
 import functools
-import gzip
 import io
 import itertools
 import json
@@ -31,6 +30,7 @@ import ssl
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import traceback
 import xml.etree.ElementTree
@@ -50,6 +50,7 @@ from .compat import (
     compat_http_client,
     compat_integer_types,
     compat_kwargs,
+    compat_ord,
     compat_os_name,
     compat_parse_qs,
     compat_shlex_quote,
@@ -71,6 +72,20 @@ from .socks import (
     sockssocket,
 )
 
+try:
+    import concurrent.futures
+    can_threaded_pages = True
+except ImportError:  # Python 2 without the futures backport
+    can_threaded_pages = False
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
 
 def register_socks_protocols():
     # "Register" SOCKS protocols
@@ -1672,7 +1687,7 @@ std_headers = {
     'User-Agent': random_user_agent(),
     'Accept-Charset': 'ISO-8859-1,utf-8;q=0.7,*;q=0.7',
     'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-    'Accept-Encoding': 'gzip, deflate',
+    'Accept-Encoding': 'gzip, deflate, br' if brotli else 'gzip, deflate',
     'Accept-Language': 'en-us,en;q=0.5',
 }
 
@@ -1792,6 +1807,22 @@ def preferredencoding():
     return pref
 
 
+def replace_file(src, dst):
+    """ Rename src to dst, atomically if possible """
+    if hasattr(os, 'replace'):
+        # Atomic even on Windows, concurrent readers never miss the file
+        os.replace(src, dst)
+        return
+    if sys.platform == 'win32':
+        # Need to remove existing file on Windows, else os.rename raises
+        # WindowsError or FileExistsError.
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+    os.rename(src, dst)
+
+
 def write_json_file(obj, fn):
     """ Encode obj as JSON and write it to fn, atomically if possible """
 
@@ -1830,20 +1861,13 @@ def write_json_file(obj, fn):
     try:
         with tf:
             json.dump(obj, tf)
-        if sys.platform == 'win32':
-            # Need to remove existing file on Windows, else os.rename raises
-            # WindowsError or FileExistsError.
-            try:
-                os.unlink(fn)
-            except OSError:
-                pass
         try:
             mask = os.umask(0)
             os.umask(mask)
             os.chmod(tf.name, 0o666 & ~mask)
         except OSError:
             pass
-        os.rename(tf.name, fn)
+        replace_file(tf.name, fn)
     except Exception:
         try:
             os.remove(tf.name)
@@ -2547,6 +2571,128 @@ def handle_youtubedl_headers(headers):
     return filtered_headers
 
 
+class _DecodingReader(io.RawIOBase):
+    """Raw stream decoding the gzip, deflate or brotli encoded body of a
+    response while it is read
+
+    Like browsers, junk after the end of the compressed data is ignored,
+    even when it starts like another gzip member.
+    """
+
+    _CHUNK_SIZE = 64 * 1024
+    _ERRORS = (zlib.error, brotli.error) if brotli else (zlib.error, )
+
+    def __init__(self, fp, content_encoding):
+        self._fp = fp
+        self._content_encoding = content_encoding
+        self._decoder = None
+        # Whether the decoder is for a gzip member after the first one and
+        # whether it produced any data, until then it may just be junk
+        self._chained = False
+        self._member_output = False
+        self._buffer = b''
+        self._pos = 0
+        # Whether the body or the compressed data ended
+        self._done = False
+
+    def readable(self):
+        return True
+
+    def _new_decoder(self, data):
+        if self._content_encoding == 'br':
+            return brotli.Decompressor()
+        if self._content_encoding == 'gzip':
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        # deflate is meant to be zlib wrapped, but many servers send a raw stream
+        if len(data) >= 2:
+            cmf, flg = compat_ord(data[0]), compat_ord(data[1])
+            if cmf & 0x0f == 8 and (cmf << 8 | flg) % 31 == 0:
+                return zlib.decompressobj()
+        return zlib.decompressobj(-zlib.MAX_WBITS)
+
+    def _decode_chunk(self):
+        data = self._fp.read(self._CHUNK_SIZE)
+        if not data:
+            self._done = True
+            if self._decoder is None:
+                return b''
+            if self._content_encoding == 'br':
+                if not self._decoder.is_finished():
+                    raise IOError('Truncated br response body')
+                return b''
+            eof = getattr(self._decoder, 'eof', None)
+            if eof is None:
+                # Python 2 decoders have no eof: data past the end of the
+                # stream is left unused, anything else is taken as input
+                try:
+                    eof = not self._decoder.decompress(b'\x00') and bool(self._decoder.unused_data)
+                except zlib.error:
+                    eof = False
+            if not eof:
+                if self._chained and not self._member_output:
+                    return b''  # Junk starting like a gzip member
+                raise IOError('Truncated %s response body' % self._content_encoding)
+            return self._decoder.flush()
+        if self._decoder is None:
+            self._decoder = self._new_decoder(data)
+        try:
+            if self._content_encoding == 'br':
+                return self._decoder.process(data)
+            return self._decompress(data)
+        except self._ERRORS as err:
+            raise IOError('Unable to decode %s response body: %s' % (self._content_encoding, err))
+
+    def _skip_junk(self):
+        # Junk at the end, see http://stackoverflow.com/q/4928560/35070
+        self._done = True
+        self._fp.read()
+
+    def _decompress(self, data):
+        res = b''
+        while True:
+            try:
+                output = self._decoder.decompress(data)
+            except zlib.error:
+                if not self._chained or self._member_output:
+                    raise
+                # Not another gzip member after all
+                self._skip_junk()
+                return res
+            self._member_output = self._member_output or bool(output)
+            res += output
+            data = self._decoder.unused_data
+            if not data:
+                return res
+            # Concatenated gzip members are decoded one after the other
+            if self._content_encoding != 'gzip' or not data.startswith(b'\x1f\x8b'):
+                self._skip_junk()
+                return res
+            self._decoder = self._new_decoder(data)
+            self._chained, self._member_output = True, False
+
+    def readinto(self, b):
+        while self._pos == len(self._buffer):
+            if self._done:
+                return 0
+            self._buffer, self._pos = self._decode_chunk(), 0
+        n = min(len(b), len(self._buffer) - self._pos)
+        b[:n] = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def readall(self):
+        chunks = [self._buffer[self._pos:]]
+        self._buffer, self._pos = b'', 0
+        while not self._done:
+            chunks.append(self._decode_chunk())
+        return b''.join(chunks)
+
+    def close(self):
+        if not self.closed:
+            self._fp.close()
+        io.RawIOBase.close(self)
+
+
 class YoutubeDLHandler(compat_urllib_request.HTTPHandler):
     """Handler for HTTP requests and responses.
 
@@ -2566,6 +2712,7 @@ class YoutubeDLHandler(compat_urllib_request.HTTPHandler):
     """
 
     def __init__(self, params, *args, **kwargs):
+        self._connection_pool = kwargs.pop('connection_pool', None)
         compat_urllib_request.HTTPHandler.__init__(self, *args, **kwargs)
         self._params = params
 
@@ -2577,16 +2724,12 @@ class YoutubeDLHandler(compat_urllib_request.HTTPHandler):
             conn_class = make_socks_conn_class(conn_class, socks_proxy)
             del req.headers['Ytdl-socks-proxy']
 
-        return self.do_open(functools.partial(
-            _create_http_connection, self, conn_class, False),
-            req)
-
-    @staticmethod
-    def deflate(data):
-        try:
-            return zlib.decompress(data, -zlib.MAX_WBITS)
-        except zlib.error:
-            return zlib.decompress(data)
+        http_class = functools.partial(
+            _create_http_connection, self, conn_class, False)
+        if self._connection_pool is not None:
+            return self._connection_pool.do_open(
+                self, http_class, req, ('http', socks_proxy))
+        return self.do_open(http_class, req)
 
     def http_request(self, req):
         # According to RFC 3986, URLs can not contain non-ASCII characters, however this is not
@@ -2621,31 +2764,11 @@ class YoutubeDLHandler(compat_urllib_request.HTTPHandler):
 
     def http_response(self, req, resp):
         old_resp = resp
-        # gzip
-        if resp.headers.get('Content-encoding', '') == 'gzip':
-            content = resp.read()
-            gz = gzip.GzipFile(fileobj=io.BytesIO(content), mode='rb')
-            try:
-                uncompressed = io.BytesIO(gz.read())
-            except IOError as original_ioerror:
-                # There may be junk add the end of the file
-                # See http://stackoverflow.com/q/4928560/35070 for details
-                for i in range(1, 1024):
-                    try:
-                        gz = gzip.GzipFile(fileobj=io.BytesIO(content[:-i]), mode='rb')
-                        uncompressed = io.BytesIO(gz.read())
-                    except IOError:
-                        continue
-                    break
-                else:
-                    raise original_ioerror
-            resp = compat_urllib_request.addinfourl(uncompressed, old_resp.headers, old_resp.url, old_resp.code)
-            resp.msg = old_resp.msg
-            del resp.headers['Content-encoding']
-        # deflate
-        if resp.headers.get('Content-encoding', '') == 'deflate':
-            gz = io.BytesIO(self.deflate(resp.read()))
-            resp = compat_urllib_request.addinfourl(gz, old_resp.headers, old_resp.url, old_resp.code)
+        # Decoded while the body is read
+        content_encoding = resp.headers.get('Content-encoding', '')
+        if content_encoding in ('gzip', 'deflate') or (content_encoding == 'br' and brotli):
+            decoded = io.BufferedReader(_DecodingReader(resp, content_encoding))
+            resp = compat_urllib_request.addinfourl(decoded, old_resp.headers, old_resp.url, old_resp.code)
             resp.msg = old_resp.msg
             del resp.headers['Content-encoding']
         # Percent-encode redirect URL of Location HTTP header to satisfy RFC 3986 (see
@@ -2715,6 +2838,7 @@ def make_socks_conn_class(base_class, socks_proxy):
 
 class YoutubeDLHTTPSHandler(compat_urllib_request.HTTPSHandler):
     def __init__(self, params, https_conn_class=None, *args, **kwargs):
+        self._connection_pool = kwargs.pop('connection_pool', None)
         compat_urllib_request.HTTPSHandler.__init__(self, *args, **kwargs)
         self._https_conn_class = https_conn_class or compat_http_client.HTTPSConnection
         self._params = params
@@ -2733,9 +2857,272 @@ class YoutubeDLHTTPSHandler(compat_urllib_request.HTTPSHandler):
             conn_class = make_socks_conn_class(conn_class, socks_proxy)
             del req.headers['Ytdl-socks-proxy']
 
-        return self.do_open(functools.partial(
-            _create_http_connection, self, conn_class, True),
-            req, **kwargs)
+        http_class = functools.partial(
+            _create_http_connection, self, conn_class, True)
+        if self._connection_pool is not None:
+            return self._connection_pool.do_open(
+                self, http_class, req, ('https', socks_proxy), **kwargs)
+        return self.do_open(http_class, req, **kwargs)
+
+
+class _PooledHTTPResponse(compat_http_client.HTTPResponse):
+    """HTTP response that hands its connection back to the pool once the
+    whole body has been read"""
+
+    _ytdl_release = None
+    _ytdl_reusable = True
+
+    def close(self):
+        if self.fp is not None:
+            # Body has not been read to the end, so the rest of it is still
+            # pending on the socket and the connection can not be reused
+            self._ytdl_reusable = False
+        compat_http_client.HTTPResponse.close(self)
+
+    def _close_conn(self):
+        compat_http_client.HTTPResponse._close_conn(self)
+        release, self._ytdl_release = self._ytdl_release, None
+        if release:
+            release(self._ytdl_reusable)
+
+
+class HTTPConnectionPool(object):
+    """Pool of persistent (keep-alive) HTTP and HTTPS connections.
+
+    Connections are kept per host, proxy and socks proxy and are reused once
+    the body of the previous response on them has been read completely.
+    Only supported on Python 3.
+
+    opened and reused count connections opened and requests served by an
+    already open connection respectively.
+    """
+
+    MAX_IDLE_PER_HOST = 16
+    # Methods that may be sent again when the server closed an idle
+    # connection after receiving the request
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idle = {}
+        self.opened = 0
+        self.reused = 0
+
+    def _acquire(self, key):
+        with self._lock:
+            conns = self._idle.get(key)
+            return conns.pop() if conns else None
+
+    def _release(self, key, conn, reusable):
+        if reusable and conn.sock is not None:
+            with self._lock:
+                conns = self._idle.setdefault(key, [])
+                if len(conns) < self.MAX_IDLE_PER_HOST:
+                    conns.append(conn)
+                    return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def do_open(self, handler, http_class, req, key, **http_conn_args):
+        """Like AbstractHTTPHandler.do_open but with connection reuse"""
+        host = req.host
+        if not host:
+            raise compat_urllib_error.URLError('no host given')
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update(dict(
+            (k, v) for k, v in req.headers.items() if k not in headers))
+        headers['Connection'] = 'keep-alive'
+        headers = dict((name.title(), val) for name, val in headers.items())
+
+        tunnel_headers = {}
+        if req._tunnel_host:
+            proxy_auth_hdr = 'Proxy-Authorization'
+            if proxy_auth_hdr in headers:
+                tunnel_headers[proxy_auth_hdr] = headers.pop(proxy_auth_hdr)
+        key = key + (host, req._tunnel_host, tunnel_headers.get('Proxy-Authorization'))
+
+        request_kwargs = {}
+        if sys.version_info >= (3, 6):
+            request_kwargs['encode_chunked'] = req.has_header('Transfer-encoding')
+
+        while True:
+            conn = self._acquire(key)
+            reused = conn is not None
+            if reused:
+                conn.timeout = req.timeout
+                if conn.sock is not None:
+                    conn.sock.settimeout(req.timeout)
+            else:
+                conn = http_class(host, timeout=req.timeout, **http_conn_args)
+                conn.set_debuglevel(handler._debuglevel)
+                conn.response_class = _PooledHTTPResponse
+                if req._tunnel_host:
+                    conn.set_tunnel(req._tunnel_host, headers=tunnel_headers)
+            sent = False
+            try:
+                try:
+                    conn.request(
+                        req.get_method(), req.selector, req.data, headers,
+                        **request_kwargs)
+                except socket.error as err:
+                    raise compat_urllib_error.URLError(err)
+                sent = True
+                resp = conn.getresponse()
+            except Exception as err:
+                conn.close()
+                # Server may have closed an idle connection, so retry once
+                # with a fresh one unless it may have acted on the request
+                stale = reused and not isinstance(
+                    getattr(err, 'reason', err), socket.timeout) and (
+                    not sent or req.get_method() in self.IDEMPOTENT_METHODS)
+                if stale and isinstance(err, (
+                        socket.error, compat_http_client.HTTPException,
+                        compat_urllib_error.URLError)):
+                    continue
+                raise
+            break
+
+        with self._lock:
+            if reused:
+                self.reused += 1
+            else:
+                self.opened += 1
+
+        resp._ytdl_release = functools.partial(self._release, key, conn)
+        resp.url = req.get_full_url()
+        resp.msg = resp.reason
+        return resp
+
+
+class _HostState(object):
+    def __init__(self, rate, concurrency, backoff):
+        self.max_rate = self.rate = rate
+        self.concurrency = concurrency
+        self.tokens = 1
+        self.updated = time.time()
+        self.active = 0
+        self.blocked_until = 0
+        self.backoff = backoff
+        self.recent = collections.deque(maxlen=100)
+
+
+class RequestScheduler(object):
+    """Per host scheduler of the HTTP requests.
+
+    limits maps hosts, which also match their subdomains, or "*" for any
+    other host to (rate, concurrency) tuples: the number of requests per
+    second, paced with a token bucket, and the number of requests opening
+    at the same time. Either may be None for no limit.
+
+    When a host answers 429 or 503, its requests are held back for the time
+    given by Retry-After, or an exponential backoff, and its rate is halved.
+    Each later successful request raises the rate again until the limit, or
+    until it is lifted for hosts without one.
+    """
+
+    INITIAL_BACKOFF = 1
+    MAX_BACKOFF = 300
+    RAMP_UP = 1.1
+    # Adaptive rate above which hosts without a limit are not paced anymore
+    MAX_ADAPTIVE_RATE = 100
+
+    def __init__(self, limits={}):
+        self._limits = limits
+        self._cond = threading.Condition(threading.Lock())
+        self._hosts = {}
+
+    def _get_state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            parts = host.split('.')
+            limit = next((
+                self._limits[domain]
+                for domain in ('.'.join(parts[i:]) for i in range(len(parts)))
+                if domain in self._limits), self._limits.get('*', (None, None)))
+            state = self._hosts[host] = _HostState(
+                limit[0], limit[1], self.INITIAL_BACKOFF)
+        return state
+
+    def acquire(self, host):
+        """Wait until a request can be sent to host"""
+        if not host:
+            return
+        with self._cond:
+            state = self._get_state(host)
+            while True:
+                now = time.time()
+                wait = state.blocked_until - now
+                if wait <= 0 and state.rate is not None:
+                    state.tokens = min(
+                        max(state.rate, 1),
+                        state.tokens + (now - state.updated) * state.rate)
+                    state.updated = now
+                    wait = (1 - state.tokens) / state.rate
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif state.concurrency and state.active >= state.concurrency:
+                    self._cond.wait()
+                else:
+                    break
+            if state.rate is not None:
+                state.tokens -= 1
+            state.active += 1
+            state.recent.append(now)
+
+    def release(self, host, status=None, retry_after=None, failed=False):
+        """Record the end of a request to host
+
+        status is the HTTP status code of an error response and retry_after
+        the value of its Retry-After header. failed tells that the request
+        got no response at all, which leaves the pacing unchanged. Return
+        the number of seconds the requests to host are held back or None.
+        """
+        if not host:
+            return None
+        with self._cond:
+            state = self._get_state(host)
+            state.active -= 1
+            self._cond.notify_all()
+            if failed:
+                return None
+            now = time.time()
+            if status not in (429, 503):
+                state.backoff = self.INITIAL_BACKOFF
+                if state.rate is not None and state.rate != state.max_rate:
+                    state.rate *= self.RAMP_UP
+                    if state.max_rate is not None:
+                        state.rate = min(state.rate, state.max_rate)
+                    elif state.rate > self.MAX_ADAPTIVE_RATE:
+                        state.rate = None
+                return None
+
+            delay = int_or_none(retry_after)
+            if delay is None and retry_after:
+                retry_at = unified_timestamp(retry_after)
+                if retry_at is not None:
+                    delay = retry_at - now
+            if delay is None:
+                delay = state.backoff
+                state.backoff = min(state.backoff * 2, self.MAX_BACKOFF)
+            delay = min(max(delay, 0), self.MAX_BACKOFF)
+            state.blocked_until = max(state.blocked_until, now + delay)
+            if state.rate is None:
+                # Half the rate the host was actually requested at
+                recent = [t for t in state.recent if t > now - 10]
+                if len(recent) > 1:
+                    state.rate = (len(recent) - 1) / max(now - recent[0], 0.001) / 2
+            else:
+                state.rate = max(state.rate / 2, 1.0 / self.MAX_BACKOFF)
+            state.tokens = 0
+            state.updated = now + delay
+            return delay
 
 
 class YoutubeDLCookieJar(compat_cookiejar.MozillaCookieJar):
@@ -3764,60 +4151,114 @@ def detect_exe_version(output, version_re=None, unrecognized='present'):
 
 
 class PagedList(object):
+    """
+    Entries split in pages, fetched with pagefunc(pagenum) when a slice is
+    requested.
+
+    concurrency is the number of pages fetched at the same time: the pages
+    following the one being read are requested in the background, in
+    worker threads. The pages are still returned in order.
+    """
+
+    concurrency = 1
+
+    _use_cache = False
+    # Maximum number of pages kept in the cache, the least recently used
+    # ones are dropped
+    _cache_size = None
+
     def __len__(self):
         # This is only useful for tests
         return len(self.getslice())
 
+    def _fetch_page(self, pagenum):
+        if not self._use_cache:
+            return list(self._pagefunc(pagenum))
+        with self._cache_lock:
+            page_results = self._cache.pop(pagenum, None)
+            if page_results is not None:
+                # Move it to the end, it is the most recently used
+                self._cache[pagenum] = page_results
+                return page_results
+        page_results = list(self._pagefunc(pagenum))
+        with self._cache_lock:
+            self._cache[pagenum] = page_results
+            while self._cache_size is not None and len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return page_results
+
+    def _iter_pages(self, first, last=None):
+        """ Yield the pages from first to last (included, None for no limit) """
+        pagenums = itertools.count(first) if last is None else range(first, last + 1)
+        if self.concurrency <= 1 or not can_threaded_pages:
+            for pagenum in pagenums:
+                yield self._fetch_page(pagenum)
+            return
+
+        # Pages past the end of an OnDemandPagedList are requested in vain,
+        # at most concurrency - 1 of them
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        pending = collections.deque()
+        try:
+            for pagenum in pagenums:
+                pending.append(executor.submit(self._fetch_page, pagenum))
+                if len(pending) >= self.concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
 
 class OnDemandPagedList(PagedList):
-    def __init__(self, pagefunc, pagesize, use_cache=True):
+    def __init__(self, pagefunc, pagesize, use_cache=True, cache_size=64):
         self._pagefunc = pagefunc
         self._pagesize = pagesize
         self._use_cache = use_cache
+        self._cache_size = cache_size
         if use_cache:
-            self._cache = {}
+            self._cache = collections.OrderedDict()
+            self._cache_lock = threading.Lock()
 
     def getslice(self, start=0, end=None):
         res = []
-        for pagenum in itertools.count(start // self._pagesize):
-            firstid = pagenum * self._pagesize
-            nextfirstid = pagenum * self._pagesize + self._pagesize
-            if start >= nextfirstid:
-                continue
-
-            page_results = None
-            if self._use_cache:
-                page_results = self._cache.get(pagenum)
-            if page_results is None:
-                page_results = list(self._pagefunc(pagenum))
-            if self._use_cache:
-                self._cache[pagenum] = page_results
-
-            startv = (
-                start % self._pagesize
-                if firstid <= start < nextfirstid
-                else 0)
-
-            endv = (
-                ((end - 1) % self._pagesize) + 1
-                if (end is not None and firstid <= end <= nextfirstid)
-                else None)
-
-            if startv != 0 or endv is not None:
-                page_results = page_results[startv:endv]
-            res.extend(page_results)
-
-            # A little optimization - if current page is not "full", ie. does
-            # not contain page_size videos then we can assume that this page
-            # is the last one - there are no more ids on further pages -
-            # i.e. no need to query again.
-            if len(page_results) + startv < self._pagesize:
-                break
+        first_page = start // self._pagesize
+        last_page = None if end is None else max((end - 1) // self._pagesize, first_page)
+        pages = self._iter_pages(first_page, last_page)
+        try:
+            for pagenum, page_results in zip(itertools.count(first_page), pages):
+                firstid = pagenum * self._pagesize
+                nextfirstid = pagenum * self._pagesize + self._pagesize
+
+                startv = (
+                    start % self._pagesize
+                    if firstid <= start < nextfirstid
+                    else 0)
+
+                endv = (
+                    ((end - 1) % self._pagesize) + 1
+                    if (end is not None and firstid <= end <= nextfirstid)
+                    else None)
+
+                if startv != 0 or endv is not None:
+                    page_results = page_results[startv:endv]
+                res.extend(page_results)
+
+                # A little optimization - if current page is not "full", ie. does
+                # not contain page_size videos then we can assume that this page
+                # is the last one - there are no more ids on further pages -
+                # i.e. no need to query again.
+                if len(page_results) + startv < self._pagesize:
+                    break
 
-            # If we got the whole page, but the next page is not interesting,
-            # break out early as well
-            if end == nextfirstid:
-                break
+                # If we got the whole page, but the next page is not interesting,
+                # break out early as well
+                if end == nextfirstid:
+                    break
+        finally:
+            pages.close()
         return res
 
 
@@ -3834,22 +4275,93 @@ class InAdvancePagedList(PagedList):
             self._pagecount if end is None else (end // self._pagesize + 1))
         skip_elems = start - start_page * self._pagesize
         only_more = None if end is None else end - start
-        for pagenum in range(start_page, end_page):
-            page = list(self._pagefunc(pagenum))
-            if skip_elems:
-                page = page[skip_elems:]
-                skip_elems = None
-            if only_more is not None:
-                if len(page) < only_more:
-                    only_more -= len(page)
-                else:
-                    page = page[:only_more]
-                    res.extend(page)
-                    break
-            res.extend(page)
+        pages = self._iter_pages(start_page, end_page - 1)
+        try:
+            for page in pages:
+                if skip_elems:
+                    page = page[skip_elems:]
+                    skip_elems = None
+                if only_more is not None:
+                    if len(page) < only_more:
+                        only_more -= len(page)
+                    else:
+                        page = page[:only_more]
+                        res.extend(page)
+                        break
+                res.extend(page)
+        finally:
+            pages.close()
         return res
 
 
+def prefetch_iter(iterable, depth=1):
+    """
+    Iterate over iterable in a worker thread, at most depth items ahead of
+    the consumer, e.g. to request the next page of a listing while the
+    entries of the current one are processed. The items are yielded in
+    order and the exceptions raised by iterable are re-raised by the
+    consumer. With a depth lower than 1 iterable is iterated in the
+    calling thread.
+
+    The first item is got in the calling thread and the worker only starts
+    once the consumer asks for the second one, so that a consumer stopping
+    after the first item (e.g. --playlist-items 1) causes no extra request.
+    """
+    if depth < 1:
+        for item in iterable:
+            yield item
+        return
+
+    it = iter(iterable)
+    try:
+        first = next(it)
+    except StopIteration:
+        return
+    yield first
+
+    items = collections.deque()
+    # Released by the consumer when it takes an item, acquired by the
+    # worker before getting the next one
+    slots = threading.Semaphore(depth)
+    ready = threading.Semaphore(0)
+    stopped = []
+
+    def produce():
+        while True:
+            slots.acquire()
+            if stopped:
+                return
+            try:
+                items.append((True, next(it)))
+            except StopIteration:
+                items.append((False, None))
+                return
+            except BaseException as e:
+                items.append((False, e))
+                return
+            finally:
+                ready.release()
+
+    # The worker is not joined: when the consumer stops early it only has
+    # to finish the item it is getting
+    worker = threading.Thread(target=produce)
+    worker.daemon = True
+    worker.start()
+    try:
+        while True:
+            ready.acquire()
+            ok, item = items.popleft()
+            if not ok:
+                if item is not None:
+                    raise item
+                return
+            slots.release()
+            yield item
+    finally:
+        stopped.append(True)
+        slots.release()
+
+
 def uppercase_escape(s):
     unicode_escape = codecs.getdecoder('unicode_escape')
     return re.sub(
@@ -4320,90 +4832,132 @@ def render_table(header_row, data):
     return '\n'.join(format_str % tuple(row) for row in table)
 
 
-def _match_one(filter_part, dct):
-    COMPARISON_OPERATORS = {
-        '<': operator.lt,
-        '<=': operator.le,
-        '>': operator.gt,
-        '>=': operator.ge,
-        '=': operator.eq,
-        '!=': operator.ne,
-    }
-    operator_rex = re.compile(r'''(?x)\s*
-        (?P<key>[a-z_]+)
-        \s*(?P<op>%s)(?P<none_inclusive>\s*\?)?\s*
-        (?:
-            (?P<intval>[0-9.]+(?:[kKmMgGtTpPeEzZyY]i?[Bb]?)?)|
-            (?P<quote>["\'])(?P<quotedstrval>(?:\\.|(?!(?P=quote)|\\).)+?)(?P=quote)|
-            (?P<strval>(?![0-9.])[a-z0-9A-Z]*)
-        )
-        \s*$
-        ''' % '|'.join(map(re.escape, COMPARISON_OPERATORS.keys())))
-    m = operator_rex.search(filter_part)
+_MATCH_COMPARISON_OPERATORS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '=': operator.eq,
+    '!=': operator.ne,
+}
+
+_MATCH_COMPARISON_RE = re.compile(r'''(?x)\s*
+    (?P<key>[a-z_]+)
+    \s*(?P<op>%s)(?P<none_inclusive>\s*\?)?\s*
+    (?:
+        (?P<intval>[0-9.]+(?:[kKmMgGtTpPeEzZyY]i?[Bb]?)?)|
+        (?P<quote>["\'])(?P<quotedstrval>(?:\\.|(?!(?P=quote)|\\).)+?)(?P=quote)|
+        (?P<strval>(?![0-9.])[a-z0-9A-Z]*)
+    )
+    \s*$
+    ''' % '|'.join(map(re.escape, _MATCH_COMPARISON_OPERATORS.keys())))
+
+_MATCH_UNARY_OPERATORS = {
+    '': lambda v: (v is True) if isinstance(v, bool) else (v is not None),
+    '!': lambda v: (v is False) if isinstance(v, bool) else (v is None),
+}
+
+_MATCH_UNARY_RE = re.compile(r'''(?x)\s*
+    (?P<op>%s)\s*(?P<key>[a-z_]+)
+    \s*$
+    ''' % '|'.join(map(re.escape, _MATCH_UNARY_OPERATORS.keys())))
+
+
+def _compile_match_one(filter_part):
+    """
+    Parse a filter part once, return a function testing a dict against it.
+    Invalid values are only reported when the part is evaluated, like
+    when the part was parsed for every dict.
+    """
+    m = _MATCH_COMPARISON_RE.search(filter_part)
     if m:
-        op = COMPARISON_OPERATORS[m.group('op')]
-        actual_value = dct.get(m.group('key'))
-        if (m.group('quotedstrval') is not None
-            or m.group('strval') is not None
-            # If the original field is a string and matching comparisonvalue is
-            # a number we should respect the origin of the original field
-            # and process comparison value as a string (see
-            # https://github.com/ytdl-org/youtube-dl/issues/11082).
-            or actual_value is not None and m.group('intval') is not None
-                and isinstance(actual_value, compat_str)):
-            if m.group('op') not in ('=', '!='):
-                raise ValueError(
-                    'Operator %s does not support string values!' % m.group('op'))
-            comparison_value = m.group('quotedstrval') or m.group('strval') or m.group('intval')
-            quote = m.group('quote')
-            if quote is not None:
-                comparison_value = comparison_value.replace(r'\%s' % quote, quote)
-        else:
+        key = m.group('key')
+        op_name = m.group('op')
+        op = _MATCH_COMPARISON_OPERATORS[op_name]
+        none_inclusive = m.group('none_inclusive')
+        intval = m.group('intval')
+        is_string = m.group('quotedstrval') is not None or m.group('strval') is not None
+        str_value = m.group('quotedstrval') or m.group('strval') or intval
+        quote = m.group('quote')
+        if quote is not None:
+            str_value = str_value.replace(r'\%s' % quote, quote)
+        int_value = None
+        if intval is not None:
             try:
-                comparison_value = int(m.group('intval'))
+                int_value = int(intval)
             except ValueError:
-                comparison_value = parse_filesize(m.group('intval'))
-                if comparison_value is None:
-                    comparison_value = parse_filesize(m.group('intval') + 'B')
-                if comparison_value is None:
+                int_value = parse_filesize(intval)
+                if int_value is None:
+                    int_value = parse_filesize(intval + 'B')
+
+        def _match(dct, incomplete=False):
+            actual_value = dct.get(key)
+            if actual_value is None and incomplete:
+                # The field may be available once the entry is extracted
+                return True
+            if (is_string
+                # If the original field is a string and matching comparisonvalue is
+                # a number we should respect the origin of the original field
+                # and process comparison value as a string (see
+                # https://github.com/ytdl-org/youtube-dl/issues/11082).
+                    or actual_value is not None and isinstance(actual_value, compat_str)):
+                if op_name not in ('=', '!='):
+                    raise ValueError(
+                        'Operator %s does not support string values!' % op_name)
+                comparison_value = str_value
+            else:
+                if int_value is None:
                     raise ValueError(
                         'Invalid integer value %r in filter part %r' % (
-                            m.group('intval'), filter_part))
-        if actual_value is None:
-            return m.group('none_inclusive')
-        return op(actual_value, comparison_value)
-
-    UNARY_OPERATORS = {
-        '': lambda v: (v is True) if isinstance(v, bool) else (v is not None),
-        '!': lambda v: (v is False) if isinstance(v, bool) else (v is None),
-    }
-    operator_rex = re.compile(r'''(?x)\s*
-        (?P<op>%s)\s*(?P<key>[a-z_]+)
-        \s*$
-        ''' % '|'.join(map(re.escape, UNARY_OPERATORS.keys())))
-    m = operator_rex.search(filter_part)
+                            intval, filter_part))
+                comparison_value = int_value
+            if actual_value is None:
+                return none_inclusive
+            return op(actual_value, comparison_value)
+        return _match
+
+    m = _MATCH_UNARY_RE.search(filter_part)
     if m:
-        op = UNARY_OPERATORS[m.group('op')]
-        actual_value = dct.get(m.group('key'))
-        return op(actual_value)
+        key = m.group('key')
+        op = _MATCH_UNARY_OPERATORS[m.group('op')]
+        return lambda dct, incomplete=False: (
+            (incomplete and dct.get(key) is None) or op(dct.get(key)))
 
-    raise ValueError('Invalid filter part %r' % filter_part)
+    def _invalid(dct, incomplete=False):
+        raise ValueError('Invalid filter part %r' % filter_part)
+    return _invalid
 
 
-def match_str(filter_str, dct):
+def _match_one(filter_part, dct):
+    return _compile_match_one(filter_part)(dct)
+
+
+def compile_match_str(filter_str):
+    """
+    Parse a filter string for match_str once. Returns a function filtering a
+    dictionary, for filters evaluated against many dictionaries. With
+    incomplete=True the conditions on missing fields are ignored.
+    """
+    matchers = [_compile_match_one(filter_part) for filter_part in filter_str.split('&')]
+    return lambda dct, incomplete=False: all(match(dct, incomplete) for match in matchers)
+
+
+def match_str(filter_str, dct, incomplete=False):
     """ Filter a dictionary with a simple string syntax. Returns True (=passes filter) or false """
 
-    return all(
-        _match_one(filter_part, dct) for filter_part in filter_str.split('&'))
+    return compile_match_str(filter_str)(dct, incomplete)
 
 
 def match_filter_func(filter_str):
-    def _match_func(info_dict):
-        if match_str(filter_str, info_dict):
+    match = compile_match_str(filter_str)
+
+    def _match_func(info_dict, incomplete=False):
+        if match(info_dict, incomplete):
             return None
         else:
             video_title = info_dict.get('title', info_dict.get('id', 'video'))
             return '%s does not pass filter %s, skipping ..' % (video_title, filter_str)
+    _match_func.supports_incomplete = True
     return _match_func
 
 